@@ -0,0 +1,405 @@
+"""Chunked, cached historical bar downloader on top of ``get_hist_data``.
+
+``get_hist_data`` sends one ``reqHistoricalData`` for whatever duration it
+is given; long minute-bar ranges break IB's per-request limits and every
+call downloads the whole range again. ``load_bars`` instead
+
+    * keeps every symbol / bar size / whatToShow / RTH flag in
+      ``data/ib/bars/<key>.npy`` as a structured array (``time`` –
+      datetime64[s] UTC, open/high/low/close/volume/average/barCount)
+      that can be memory-mapped; ``index.json`` remembers the covered
+      range per key;
+    * asks TWS only for the missing head / tail of the requested range,
+      split into IB-legal chunks (``CHUNKS``) that are requested
+      concurrently through the shared pacer (``pacing.py``), so pacing
+      limits hold however long the range is;
+    * never marks the last, possibly unfinished bar as covered: the next
+      call tops it up;
+    * tells an empty answer apart from a failed request: ib_insync returns
+      ``[]`` both for a range without bars (holiday, weekend) and on a
+      timeout or TWS error, so the request is timed (``HIST_TIMEOUT``) and
+      TWS errors are matched to it by reqId. An empty chunk that overlaps
+      a weekday session (``SESSION_UTC``) fails on a timeout or on any
+      error but 162 "query returned no data"; a plain empty answer (an
+      exchange holiday) is settled. Coverage only grows over the unbroken
+      run of good chunks next to what is already covered, so a failed
+      chunk is asked again on the next call.
+
+Example (from the repo root):
+    from tools.IBRK.bar_store import load_bars
+    df = load_bars("AMD", "2025-01-01", "2025-07-01", "1 min")   # DataFrame, UTC index
+    python -m tools.IBRK.bar_store AMD --start 2025-01-01 --bar "5 mins"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from ib_insync import Stock  # type: ignore
+
+from tools.IBRK.ibrkctl import ib, pacer, qualify, session
+from tools.IBRK.pacing import hist_category
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data/ib/bars")
+INDEX_FILE = "index.json"
+BAR_DTYPE = np.dtype([
+    ("time", "datetime64[s]"), ("open", "f8"), ("high", "f8"), ("low", "f8"),
+    ("close", "f8"), ("volume", "f8"), ("average", "f8"), ("barCount", "i8"),
+])
+
+# bar size -> (span covered by one request, durationStr sent to IB).
+# Spans follow IB's documented maximum duration per bar size; where IB counts
+# D/W/M in trading days the request may reach further back, which is harmless
+# because every chunk is trimmed to its own span.
+CHUNKS: Dict[str, Tuple[timedelta, str]] = {
+    "1 secs":   (timedelta(minutes=30), "1800 S"),
+    "5 secs":   (timedelta(hours=1), "3600 S"),
+    "10 secs":  (timedelta(hours=4), "14400 S"),
+    "15 secs":  (timedelta(hours=4), "14400 S"),
+    "30 secs":  (timedelta(hours=8), "28800 S"),
+    "1 min":    (timedelta(days=1), "86400 S"),
+    "2 mins":   (timedelta(days=2), "2 D"),
+    "3 mins":   (timedelta(weeks=1), "1 W"),
+    "5 mins":   (timedelta(weeks=1), "1 W"),
+    "10 mins":  (timedelta(weeks=1), "1 W"),
+    "15 mins":  (timedelta(weeks=2), "2 W"),
+    "20 mins":  (timedelta(days=28), "1 M"),
+    "30 mins":  (timedelta(days=28), "1 M"),
+    "1 hour":   (timedelta(days=28), "1 M"),
+    "2 hours":  (timedelta(days=28), "1 M"),
+    "3 hours":  (timedelta(days=28), "1 M"),
+    "4 hours":  (timedelta(days=28), "1 M"),
+    "8 hours":  (timedelta(days=28), "1 M"),
+    "1 day":    (timedelta(days=365), "1 Y"),
+    "1 week":   (timedelta(days=365), "1 Y"),
+    "1 month":  (timedelta(days=365), "1 Y"),
+}
+# UTC hours in which a weekday surely has bars in both EST and EDT
+# (rth: 9:30-16:00 ET, all hours: 4:00-20:00 ET)
+SESSION_UTC: Dict[bool, Tuple[timedelta, timedelta]] = {
+    True: (timedelta(hours=14, minutes=30), timedelta(hours=20)),
+    False: (timedelta(hours=9), timedelta(hours=24)),
+}
+HIST_TIMEOUT = 60.0  # seconds per reqHistoricalData, as ib_insync's default
+NO_DATA = "returned no data"  # error 162 text when the range simply has no bars
+_UNIT_SECONDS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 31 * 86400}
+
+# ---------------------------------------------------------------------------
+# Index / file helpers
+# ---------------------------------------------------------------------------
+
+
+def bar_seconds(barSize: str) -> int:
+    n, unit = barSize.split()
+    return int(n) * next(s for u, s in _UNIT_SECONDS.items() if unit.startswith(u))
+
+
+def _key(symbol: str, barSize: str, what: str, rth: bool) -> str:
+    safe = symbol.replace("/", "_").replace(" ", "_")
+    return f"{safe}_{barSize.replace(' ', '')}_{what}_{'rth' if rth else 'all'}"
+
+
+def _read_index(cache_dir: Path) -> Dict[str, Dict[str, str]]:
+    path = cache_dir / INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_index(cache_dir: Path, index: Dict[str, Dict[str, str]]) -> None:
+    tmp = cache_dir / (INDEX_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1, sort_keys=True)
+    os.replace(tmp, cache_dir / INDEX_FILE)
+
+
+def _load(cache_dir: Path, key: str) -> np.ndarray:
+    path = cache_dir / f"{key}.npy"
+    if not path.exists():
+        return np.empty(0, dtype=BAR_DTYPE)
+    return np.load(path, mmap_mode="r")
+
+
+def _store(cache_dir: Path, key: str, bars: np.ndarray) -> None:
+    path = cache_dir / f"{key}.npy"
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, bars)
+    os.replace(tmp, path)
+
+
+def _merge(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Union of two bar arrays; on duplicate timestamps the fresh bar wins."""
+    both = np.concatenate([np.asarray(new), np.asarray(old)])
+    _, first = np.unique(both["time"], return_index=True)  # sorted by time
+    return both[first]
+
+
+def _missing_ranges(
+    cov: Optional[Dict[str, str]], start: datetime, end: datetime
+) -> List[Tuple[datetime, datetime]]:
+    """Sub-ranges of ``[start, end)`` not yet covered by ``cov``."""
+    if not cov:
+        return [(start, end)]
+    lo, hi = datetime.fromisoformat(cov["start"]), datetime.fromisoformat(cov["end"])
+    gaps: List[Tuple[datetime, datetime]] = []
+    if start < lo:
+        gaps.append((start, lo))
+    if end > hi:
+        gaps.append((hi, end))
+    return gaps
+
+
+def _chunks(start: datetime, end: datetime, barSize: str) -> List[Tuple[datetime, datetime]]:
+    span, _ = CHUNKS[barSize]
+    out = []
+    while end > start:
+        out.append((max(start, end - span), end))
+        end -= span
+    return out
+
+
+def _expects_bars(lo: datetime, hi: datetime, barSize: str, rth: bool) -> bool:
+    """Whether ``[lo, hi)`` must hold at least one bar (holidays aside)."""
+    daily = bar_seconds(barSize) >= 86400
+    s_off, e_off = SESSION_UTC[rth]
+    day = lo.date()
+    while datetime.combine(day, datetime.min.time()) < hi:
+        midnight = datetime.combine(day, datetime.min.time())
+        if day.weekday() < 5:
+            if daily and lo <= midnight < hi:  # daily bars are stamped at midnight
+                return True
+            if not daily and lo < midnight + e_off and hi > midnight + s_off:
+                return True
+        day += timedelta(days=1)
+    return False
+
+
+def _covered(
+    gap: Tuple[datetime, datetime], done: List[Tuple[datetime, datetime, bool]],
+    cov: Optional[Dict[str, str]],
+) -> Optional[Tuple[datetime, datetime]]:
+    """Part of ``gap`` that may be marked covered given per-chunk success ``done``.
+
+    Coverage must stay one contiguous range, so it grows only over the run of
+    good chunks adjacent to the existing coverage (a tail gap forwards, a head
+    gap backwards; with no coverage yet, backwards from the gap's end).
+    """
+    lo, hi = gap
+    chunks = sorted(done)
+    if cov and lo == datetime.fromisoformat(cov["end"]):
+        end = lo
+        for c_lo, c_hi, ok in chunks:
+            if not ok:
+                break
+            end = c_hi
+        return (lo, end) if end > lo else None
+    start = hi
+    for c_lo, c_hi, ok in reversed(chunks):
+        if not ok:
+            break
+        start = c_lo
+    return (start, hi) if start < hi else None
+
+
+def _utc(ts) -> datetime:
+    """Naive UTC datetime from anything pd.Timestamp accepts (naive input = UTC)."""
+    t = pd.Timestamp(ts)
+    if t.tzinfo is not None:
+        t = t.tz_convert("UTC").tz_localize(None)
+    return t.to_pydatetime().replace(microsecond=0)
+
+
+# ---------------------------------------------------------------------------
+# Download
+# ---------------------------------------------------------------------------
+
+
+def _to_array(bars: List[Any], lo: datetime, hi: datetime) -> np.ndarray:
+    out = np.empty(len(bars), dtype=BAR_DTYPE)
+    for i, b in enumerate(bars):
+        t = b.date
+        if isinstance(t, datetime):
+            t = t.astimezone(timezone.utc).replace(tzinfo=None) if t.tzinfo else t
+        out[i] = (np.datetime64(t, "s"), b.open, b.high, b.low, b.close,
+                  b.volume, b.average, b.barCount)
+    keep = (out["time"] >= np.datetime64(lo, "s")) & (out["time"] < np.datetime64(hi, "s"))
+    return out[keep]
+
+
+class EmptyChunk(RuntimeError):
+    """TWS sent no bars for a range that must have some because the request failed."""
+
+
+async def _request(contract, end: datetime, duration: str, barSize: str, what: str, rth: bool):
+    # ib_insync clears the bars on a timeout instead of raising: tell it apart here
+    t0 = time.monotonic()
+    bars = await ib.reqHistoricalDataAsync(contract, end, duration, barSize, what, int(rth), 2,
+                                           False, timeout=HIST_TIMEOUT)
+    if not bars and time.monotonic() - t0 >= HIST_TIMEOUT:
+        raise TimeoutError(f"reqHistoricalData timed out after {HIST_TIMEOUT:g}s")
+    return bars
+
+
+async def _fetch_chunk(contract, lo: datetime, hi: datetime, barSize: str, what: str,
+                       rth: bool, settled: datetime, errors: Dict[int, Tuple[int, str]]) -> np.ndarray:
+    duration = CHUNKS[barSize][1]
+    end = hi.replace(tzinfo=timezone.utc)
+    bars = await pacer.submit(
+        hist_category(barSize),
+        lambda: _request(contract, end, duration, barSize, what, rth),
+        key=(contract.conId, hi.isoformat(), duration, barSize, what, rth),
+        contract=(contract.conId, contract.exchange, what),
+    )
+    out = _to_array(bars or [], lo, hi)
+    if not len(out) and _expects_bars(lo, min(hi, settled), barSize, rth):
+        code, msg = errors.get(getattr(bars, "reqId", None), (None, ""))
+        if code is not None and not (code == 162 and NO_DATA in msg):
+            raise EmptyChunk(f"no bars for {lo} → {hi}: error {code} {msg}")
+        # no error, or 162 "no data": the exchange was closed (holiday)
+    return out
+
+
+async def _fetch_gaps(contract, gaps, barSize: str, what: str, rth: bool, settled: datetime,
+                      errors: Dict[int, Tuple[int, str]]):
+    """All chunks of all gaps at once; the pacer decides how many really run.
+
+    ``errors`` collects TWS errors by reqId while the downloads run.
+    Returns ``{gap: [(lo, hi, bars or exception), ...]}``.
+    """
+    jobs = [(g, lo, hi) for g in gaps for lo, hi in _chunks(*g, barSize)]
+    logger.info(f"bars: {contract.symbol} {barSize}: {len(jobs)} chunk(s) for {len(gaps)} gap(s)")
+    results = await asyncio.gather(
+        *[_fetch_chunk(contract, lo, hi, barSize, what, rth, settled, errors)
+          for _, lo, hi in jobs],
+        return_exceptions=True,
+    )
+    per_gap: Dict[Tuple[datetime, datetime], List[Tuple[datetime, datetime, Any]]] = {g: [] for g in gaps}
+    for (g, lo, hi), r in zip(jobs, results):
+        per_gap[g].append((lo, hi, r))
+    return per_gap
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def read_bars(
+    symbol: str, start, end, barSize: str = "1 min", what: str = "TRADES", rth: bool = True,
+    cache_dir: Path = CACHE_DIR,
+) -> pd.DataFrame:
+    """Cached bars of one symbol on ``[start, end)`` (UTC), no network."""
+    bars = _load(cache_dir, _key(symbol, barSize, what, rth))
+    a, b = np.searchsorted(bars["time"], [np.datetime64(_utc(start), "s"), np.datetime64(_utc(end), "s")])
+    chunk = np.array(bars[a:b])
+    df = pd.DataFrame({name: chunk[name] for name in BAR_DTYPE.names[1:]},
+                      index=pd.DatetimeIndex(chunk["time"].astype("datetime64[ns]"), name="time"))
+    return df
+
+
+def load_bars(
+    symbol: str,
+    start,
+    end=None,
+    barSize: str = "1 min",
+    what: str = "TRADES",
+    rth: bool = True,
+    *,
+    offline: bool = False,
+    cache_dir: Path = CACHE_DIR,
+) -> pd.DataFrame:
+    """Bars for ``symbol`` on ``[start, end)`` read through the local store.
+
+    end      – default now; naive timestamps are UTC.
+    offline  – never touch TWS, serve whatever is on disk.
+    """
+    if barSize not in CHUNKS:
+        raise ValueError(f"unsupported barSize {barSize!r}; one of {list(CHUNKS)}")
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    start_t, end_t = _utc(start), min(_utc(end) if end is not None else now, now)
+    key = _key(symbol, barSize, what, rth)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index = _read_index(cache_dir)
+
+    gaps = [] if offline else _missing_ranges(index.get(key), start_t, end_t)
+    if gaps:
+        contract = Stock(symbol, "SMART", "USD"); qualify(contract)
+        session.get()  # connect before the event loop runs the downloads
+        # the bar that is still forming must be fetched again next time
+        settled = now - timedelta(seconds=bar_seconds(barSize))
+        errors: Dict[int, Tuple[int, str]] = {}
+
+        def _on_error(reqId, errorCode, errorString, *args):
+            errors[reqId] = (errorCode, errorString)
+
+        ib.errorEvent.connect(_on_error)
+        try:
+            per_gap = ib.run(_fetch_gaps(contract, gaps, barSize, what, rth, settled, errors))
+        finally:
+            ib.errorEvent.disconnect(_on_error)
+
+        cov = index.get(key)
+        fresh = []
+        for gap, results in per_gap.items():
+            errors = [r for _, _, r in results if isinstance(r, BaseException)]
+            fresh.extend(r for _, _, r in results if not isinstance(r, BaseException))
+            if errors:
+                logger.warning(f"bars: {symbol} {gap[0]} → {gap[1]}: {len(errors)} chunk(s) failed "
+                               f"({errors[0]!r}); coverage stops before them")
+            span = _covered(gap, [(lo, hi, not isinstance(r, BaseException)) for lo, hi, r in results],
+                            cov)
+            if span is None:
+                continue
+            lo, hi = span[0], min(span[1], settled)
+            c_lo = min(lo, datetime.fromisoformat(cov["start"])) if cov else lo
+            c_hi = max(hi, datetime.fromisoformat(cov["end"])) if cov else hi
+            cov = {"start": c_lo.isoformat(), "end": max(c_lo, c_hi).isoformat()}
+        if fresh:
+            _store(cache_dir, key, _merge(_load(cache_dir, key), np.concatenate(fresh)))
+        if cov:
+            index[key] = cov
+            _write_index(cache_dir, index)
+
+    return read_bars(symbol, start_t, end_t, barSize, what, rth, cache_dir)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("python -m tools.IBRK.bar_store")
+    p.add_argument("symbols", nargs="+")
+    p.add_argument("--start", required=True)
+    p.add_argument("--end", default=None)
+    p.add_argument("--bar", default="1 min", help="IB barSize, e.g. '1 min', '5 mins', '1 day'")
+    p.add_argument("--what", default="TRADES")
+    p.add_argument("--all-hours", action="store_true", help="include pre/post market")
+    p.add_argument("--offline", action="store_true")
+    args = p.parse_args()
+
+    for sym in args.symbols:
+        df = load_bars(sym, args.start, args.end, args.bar, args.what, not args.all_hours,
+                       offline=args.offline)
+        span = f"{df.index[0]} … {df.index[-1]}" if len(df) else "no data"
+        print(f"✔ {sym} {args.bar}: {len(df)} bars, {span}")
+    print("pacing:", pacer.stats())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)s  %(message)s",
+                        datefmt="%H:%M:%S")
+    main()
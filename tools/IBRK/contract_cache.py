@@ -0,0 +1,123 @@
+"""On-disk cache of qualified IB contracts (contract spec -> conId and details).
+
+``ContractCache.qualify(resolve, *contracts)`` wraps a qualifier such as
+``ib.qualifyContracts``: contracts already seen are filled in from
+``data/ib/contracts.json`` without a TWS round trip, the misses are
+qualified together in one call and remembered.
+
+Invalidation:
+    * options / futures are dropped once their expiry date has passed;
+    * everything else (stocks, FX, indices) is re-qualified after
+      ``MAX_AGE_DAYS`` to pick up ticker changes and delistings.
+
+Example:
+    cache = ContractCache()
+    c = Stock("AMD", "SMART", "USD"); cache.qualify(ib.qualifyContracts, c)   # c.conId set
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path("data/ib/contracts.json")
+MAX_AGE_DAYS = 30
+EXPIRING = {"OPT", "FOP", "FUT", "WAR"}
+
+# fields that make up the request (cache key) and those copied back from TWS
+SPEC_FIELDS = ("secType", "symbol", "lastTradeDateOrContractMonth", "strike", "right",
+               "multiplier", "exchange", "primaryExchange", "currency", "localSymbol",
+               "tradingClass")
+RESOLVED_FIELDS = ("conId", "symbol", "lastTradeDateOrContractMonth", "strike", "right",
+                   "multiplier", "exchange", "primaryExchange", "currency", "localSymbol",
+                   "tradingClass")
+
+
+def spec_key(c) -> str:
+    return "|".join(str(getattr(c, f, "") or "") for f in SPEC_FIELDS)
+
+
+def _expired(expiry: str, today: str) -> bool:
+    if not expiry:
+        return False
+    exp = expiry[:8] if len(expiry) >= 8 else expiry[:6] + "31"  # YYYYMM = whole month
+    return exp < today
+
+
+class ContractCache:
+    def __init__(self, path: Path = CACHE_PATH, max_age_days: float = MAX_AGE_DAYS) -> None:
+        self.path = Path(path)
+        self.max_age = max_age_days * 86400
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None  # loaded on first use
+
+    # ------------------------------------------------------------------
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}
+            if self.purge():
+                self._save()
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._entries, indent=0, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)  # atomic: concurrent tools never see half a file
+
+    def _fresh(self, entry: Dict[str, Any], today: str) -> bool:
+        if entry["secType"] in EXPIRING:
+            return not _expired(entry["lastTradeDateOrContractMonth"], today)
+        return time.time() - entry["cached"] < self.max_age
+
+    def purge(self) -> int:
+        """Drop expired and stale entries; returns how many were removed."""
+        today = dt.date.today().strftime("%Y%m%d")
+        entries = self._entries or {}
+        stale = [k for k, e in entries.items() if not self._fresh(e, today)]
+        for k in stale:
+            del entries[k]
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    def qualify(self, resolve: Callable[..., Any], *contracts) -> List[Any]:
+        """Like ``ib.qualifyContracts``: fills contracts in place, returns the qualified ones.
+        ``resolve(*contracts)`` qualifies the cache misses in place (one TWS call)."""
+        today = dt.date.today().strftime("%Y%m%d")
+        misses = []
+        with self._lock:
+            entries = self._load()
+            for c in contracts:
+                if c.conId:
+                    continue  # already qualified (e.g. from ib.positions())
+                e = entries.get(spec_key(c))
+                if e and self._fresh(e, today):
+                    for f in RESOLVED_FIELDS:
+                        setattr(c, f, e[f])
+                    self.hits += 1
+                else:
+                    misses.append((spec_key(c), c))
+                    self.misses += 1
+
+        if misses:
+            resolve(*[c for _, c in misses])
+            with self._lock:
+                entries = self._load()
+                for key, c in misses:
+                    if c.conId and c.secType != "BAG":
+                        e = {f: getattr(c, f) for f in RESOLVED_FIELDS}
+                        entries[key] = {**e, "secType": c.secType, "cached": time.time()}
+                self._save()
+            logger.debug(f"contract cache: {len(misses)} qualified via TWS")
+        return [c for c in contracts if c.conId]
@@ -18,7 +18,7 @@ from typing import Any, Dict
 
 from ib_insync import Stock, Forex, Option  # type: ignore
 
-from tools.IBRK.ibrkctl import ib, get_greeks
+from tools.IBRK.ibrkctl import ib, get_greeks_bulk, paced
 
 OUT_DIR = Path("data/portfolio")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -30,7 +30,9 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 def _fx_rate(pair: str) -> float:
     """Return previous-day close rate for currency pair like 'EURUSD'. Works even without a subscription."""
     try:
-        bars = ib.reqHistoricalData(Forex(pair), '', '2 D', '1 day', 'MIDPOINT', 1, 1, False)
+        bars = paced("historical",
+                     lambda: ib.reqHistoricalDataAsync(Forex(pair), '', '2 D', '1 day', 'MIDPOINT', 1, 1, False),
+                     key=("fx", pair))
         if bars:
             return bars[-1].close
     except Exception:
@@ -40,7 +42,8 @@ def _fx_rate(pair: str) -> float:
 
 def _get_sector(contract) -> str:
     try:
-        details = ib.reqContractDetails(contract)[0]
+        details = paced("contract_details", lambda: ib.reqContractDetailsAsync(contract),
+                        key=("details", contract.conId))[0]
         industry = details.industry or "Unknown"
         return industry.split(" ")[0]
     except Exception:
@@ -92,6 +95,8 @@ def export() -> Path:
             individual_positions.append(pos)
     
     rows: list[Dict[str, Any]] = []
+    # option rows waiting for greeks: (row, (symbol, expiry, strike, right)), fetched in one batch below
+    greek_rows: list[tuple] = []
     
     # Process spreads
     for spread_key, spread_positions in spreads.items():
@@ -150,8 +155,7 @@ def export() -> Path:
             }
             
             # Append greeks for the spread (take from the long leg)
-            greeks = get_greeks(long_contract.symbol, long_contract.lastTradeDateOrContractMonth, long_leg.contract.strike, long_contract.right)
-            row.update({k: (round(v, 6) if isinstance(v, float) else v) for k, v in greeks.items()})
+            greek_rows.append((row, (long_contract.symbol, long_contract.lastTradeDateOrContractMonth, long_leg.contract.strike, long_contract.right)))
             
             rows.append(row)
         else:
@@ -195,11 +199,16 @@ def export() -> Path:
         }
 
         if c.secType == "OPT":
-            greeks = get_greeks(c.symbol, c.lastTradeDateOrContractMonth, c.strike, c.right)
-            row.update({k: (round(v, 6) if isinstance(v, float) else v) for k, v in greeks.items()})
+            greek_rows.append((row, (c.symbol, c.lastTradeDateOrContractMonth, c.strike, c.right)))
 
         rows.append(row)
 
+    # greeks for all option rows at once: one qualify call, all subscriptions in parallel
+    if greek_rows:
+        all_greeks = get_greeks_bulk([spec for _, spec in greek_rows])
+        for (row, _), greeks in zip(greek_rows, all_greeks):
+            row.update({k: (round(v, 6) if isinstance(v, float) else v) for k, v in greeks.items()})
+
     # collect fieldnames union
     fieldnames: list[str] = []
     for r in rows:
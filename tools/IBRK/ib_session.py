@@ -0,0 +1,210 @@
+"""Lazy, self-healing connection to TWS / IB Gateway shared by the IBRK tools.
+
+Nothing talks to TWS at import time. The first attribute access on the
+proxy returned by ``IBSession.proxy()`` connects; every later access checks
+``isConnected()`` and reconnects transparently after a TWS restart, a
+nightly IB Gateway reset or a dropped socket. The same ``IB`` instance is
+reused across reconnects, so event handlers attached to it survive.
+
+clientIds come from a pool (``IB_CLIENT_IDS``, default ``1-16``). A free id
+is claimed with a lock file, so several tools on the same machine
+(``export_portfolio.py``, the agent, a notebook) never fight over one id;
+an id TWS still rejects (error 326, e.g. held by another machine) is
+skipped as well.
+
+Environment:
+    IB_HOST         default 127.0.0.1
+    IB_PORT         default 7496 (TWS live; 7497 paper, 4001/4002 Gateway)
+    IB_CLIENT_IDS   "1-16" or "1,5,7-9"
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on TWS rejecting duplicate ids
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7496
+DEFAULT_CLIENT_IDS = "1-16"
+CONNECT_TIMEOUT = 4.0
+MARKET_DATA_TYPE = 4  # 4 = delayed-frozen quotes (15-minute delay)
+LOCK_DIR = Path(tempfile.gettempdir()) / "ibrk-clientids"
+
+
+def parse_ids(spec: str) -> List[int]:
+    """'1-4,9' -> [1, 2, 3, 4, 9]"""
+    ids: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        ids.extend(range(int(lo), int(hi or lo) + 1))
+    return ids
+
+
+class _Claim:
+    """Exclusive, process-lifetime claim on one clientId (released on exit or crash)."""
+
+    def __init__(self, port: int, client_id: int) -> None:
+        self.client_id = client_id
+        self._fh = None
+        if fcntl is None:
+            return
+        LOCK_DIR.mkdir(parents=True, exist_ok=True)
+        fh = open(LOCK_DIR / f"{port}-{client_id}.lock", "a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise
+        fh.seek(0); fh.truncate(); fh.write(str(os.getpid())); fh.flush()
+        self._fh = fh
+
+    def release(self) -> None:
+        if self._fh is not None:
+            self._fh.close()  # closing drops the flock
+            self._fh = None
+
+
+class IBSession:
+    """Owns one ``IB`` instance; connects on demand and heals dropped connections."""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        client_ids: Optional[List[int]] = None,
+        timeout: float = CONNECT_TIMEOUT,
+        market_data_type: int = MARKET_DATA_TYPE,
+        ib: Any = None,
+    ) -> None:
+        """``ib``: an existing ``IB`` (or compatible fake) to drive; created on first connect otherwise."""
+        self.host = host or os.getenv("IB_HOST", DEFAULT_HOST)
+        self.port = int(port or os.getenv("IB_PORT", DEFAULT_PORT))
+        self.client_ids = client_ids or parse_ids(os.getenv("IB_CLIENT_IDS", DEFAULT_CLIENT_IDS))
+        self.timeout = timeout
+        self.market_data_type = market_data_type
+        self.connects = 0  # successful (re)connects, for diagnostics
+        self._ib: Any = ib
+        if ib is not None:
+            ib.disconnectedEvent += self._on_disconnect
+        self._claim: Optional[_Claim] = None
+        self._lock = threading.RLock()
+        atexit.register(self.close)
+
+    @property
+    def client_id(self) -> Optional[int]:
+        return self._claim.client_id if self._claim else None
+
+    def is_connected(self) -> bool:
+        return self._ib is not None and self._ib.isConnected()
+
+    def get(self):
+        """Connected ``IB`` instance; connects or reconnects if needed."""
+        ib = self._ib
+        if ib is not None and ib.isConnected():
+            return ib
+        with self._lock:
+            if not self.is_connected():
+                self._connect()
+            return self._ib
+
+    def proxy(self) -> "LazyIB":
+        return LazyIB(self)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._ib is not None and self._ib.isConnected():
+                self._ib.disconnectedEvent -= self._on_disconnect
+                self._ib.disconnect()
+                self._ib.disconnectedEvent += self._on_disconnect
+            if self._claim is not None:
+                self._claim.release()
+                self._claim = None
+
+    # ------------------------------------------------------------------
+    def _candidates(self) -> List[int]:
+        # keep our current id across reconnects, then the rest of the pool
+        first = [self._claim.client_id] if self._claim else []
+        return first + [i for i in self.client_ids if i not in first]
+
+    def _connect(self) -> None:
+        from ib_insync import IB
+
+        if self._ib is None:
+            self._ib = IB()
+            self._ib.disconnectedEvent += self._on_disconnect
+        reconnect = self._claim is not None
+
+        for cid in self._candidates():
+            claim = self._claim if self._claim and self._claim.client_id == cid else None
+            if claim is None:
+                try:
+                    claim = _Claim(self.port, cid)
+                except OSError:
+                    continue  # another local tool holds this id
+            try:
+                self._ib.connect(self.host, self.port, clientId=cid, timeout=self.timeout)
+            except ConnectionRefusedError as e:
+                claim.release()
+                self._claim = None
+                raise ConnectionError(
+                    f"TWS/IB Gateway not reachable at {self.host}:{self.port} "
+                    "(is it running with the API enabled?)"
+                ) from e
+            except Exception as e:  # id rejected by TWS (326), handshake timeout, ...
+                logger.warning(f"IB clientId {cid}: {e!r}, trying next id")
+                if self._ib.isConnected():
+                    self._ib.disconnect()
+                claim.release()
+                if claim is self._claim:
+                    self._claim = None
+                continue
+
+            self._claim = claim
+            self.connects += 1
+            self._ib.reqMarketDataType(self.market_data_type)
+            logger.info(f"IB {'re' if reconnect else ''}connected to "
+                        f"{self.host}:{self.port} as clientId {cid}")
+            return
+
+        raise ConnectionError(
+            f"No free IB clientId in {self.client_ids} for {self.host}:{self.port}"
+        )
+
+    def _on_disconnect(self) -> None:
+        # the claim is kept so the next call reconnects with the same clientId
+        logger.warning(f"IB connection to {self.host}:{self.port} lost; "
+                       "will reconnect on next use")
+
+
+class LazyIB:
+    """Stand-in for an ``IB`` object; every attribute goes to ``session.get()``."""
+
+    __slots__ = ("_session",)
+
+    def __init__(self, session: IBSession) -> None:
+        object.__setattr__(self, "_session", session)
+
+    def __getattr__(self, name: str):
+        return getattr(self._session.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._session.get(), name, value)
+
+    def __repr__(self) -> str:
+        s = self._session
+        state = f"clientId={s.client_id}" if s.is_connected() else "not connected"
+        return f"<LazyIB {s.host}:{s.port} {state}>"
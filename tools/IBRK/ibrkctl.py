@@ -1,30 +1,125 @@
 """
 IB helper wrappers around ib_insync.
 Exposes ~16 utility functions plus a JSON schema (TOOLS) for the Cursor agent.
+Importing does not touch TWS; see ib_session.py for the connection manager.
 """
 
 from __future__ import annotations
-import pathlib, datetime, textwrap, csv
+import pathlib, datetime, textwrap, csv, time
+from collections import deque
 from typing import Dict, Any, List, Literal
 from ib_insync import *
 
-# --- Connect to TWS ---
-ib = IB()
-ib.connect("127.0.0.1", 7496, clientId=1)   # change clientId if needed
-ib.reqMarketDataType(4)  # 4 = delayed-frozen quotes (15-minute delay)
+from tools.IBRK.contract_cache import ContractCache
+from tools.IBRK.ib_session import IBSession
+from tools.IBRK.pacing import Pacer, hist_category
+
+# --- Connection to TWS (lazy: opened on first use, reopened after drops) ---
+# host/port/clientId pool come from IB_HOST, IB_PORT, IB_CLIENT_IDS
+session = IBSession()
+ib = session.proxy()
+
+# --- Request pacing (every TWS request goes through here, see pacing.py) ---
+pacer = Pacer()
+
+
+def paced(category: str, factory, key=None, priority=None, contract=None):
+    """Run factory() (an ib call or *Async coroutine) under the pacing rules of its category."""
+    session.get()  # connect outside the event loop run by the pacer
+    return pacer.run(category, factory, key=key, priority=priority, contract=contract)
+
+
+# --- Contract resolution (on-disk cache in data/ib/contracts.json) ---
+contract_cache = ContractCache()
+
+
+def _qualify_tws(*contracts):
+    return paced("contract_details", lambda: ib.qualifyContractsAsync(*contracts))
+
+
+def qualify(*contracts):
+    """ib.qualifyContracts through the contract cache (TWS is asked only for misses)."""
+    return contract_cache.qualify(_qualify_tws, *contracts)
+
+
+def _stock(symbol: str) -> Contract:
+    c = Stock(symbol, "SMART", "USD"); qualify(c)
+    return c
+
 
 # --- Basic helper functions ---
 def get_option_chain(symbol: str):
-    p = ib.reqSecDefOptParams(symbol, "", "STK", 0)[0]
+    p = paced("contract_details", lambda: ib.reqSecDefOptParamsAsync(symbol, "", "STK", 0),
+              key=("secdef", symbol))[0]
     return {"expirations": sorted(p.expirations), "strikes": sorted(p.strikes)}
 
 
 def get_greeks(symbol: str, expiry: str, strike: float, right: Literal["C", "P"]):
     """Return real-time option greeks as a dictionary. Requires an active OPRA subscription."""
-    opt = Option(symbol, expiry, strike, right, "SMART"); ib.qualifyContracts(opt)
-    ticker = ib.reqMktData(opt, "", False, False); ib.sleep(2)
-    greeks = ticker.modelGreeks
-    result = {
+    return get_greeks_bulk([(symbol, expiry, strike, right)])[0]
+
+
+def get_option_price(symbol: str, expiry: str, strike: float, right: Literal["C", "P"]):
+    """Return current option prices."""
+    return get_option_prices_bulk([(symbol, expiry, strike, right)])[0]
+
+
+# --- Bulk market-data snapshots ---
+MAX_MKT_LINES = 40      # keep well under the account's market-data line limit (100 by default)
+SNAPSHOT_TIMEOUT = 5.0  # seconds for the whole batch, not per contract
+
+
+def _ok(x) -> bool:
+    """IB sends NaN or -1 for missing ticks."""
+    return x is not None and x == x and x != -1
+
+
+def _as_option(spec) -> Contract:
+    """Option contract from an Option, a (symbol, expiry, strike, right) tuple or a dict."""
+    if isinstance(spec, Contract):
+        return spec
+    if isinstance(spec, dict):
+        spec = (spec["symbol"], spec["expiry"], spec["strike"], spec["right"])
+    symbol, expiry, strike, right = spec
+    return Option(symbol, expiry, float(strike), right, "SMART")
+
+
+def _snapshot(contracts: List[Contract], ready, timeout: float, max_lines: int) -> List[Any]:
+    """Subscribe to many contracts at once and return their tickers (None if unqualified).
+
+    At most ``max_lines`` subscriptions are open at a time; each is cancelled as
+    soon as ``ready(ticker)`` holds, freeing the line for the next contract.
+    Returns when every ticker is ready or the shared deadline passes.
+    """
+    qualify(*contracts)
+    pending = deque(i for i, c in enumerate(contracts) if c.conId)
+    live: Dict[int, Any] = {}
+    out: List[Any] = [None] * len(contracts)
+    deadline = time.monotonic() + timeout
+
+    def _close(i: int) -> None:
+        out[i] = live.pop(i)
+        ib.cancelMktData(contracts[i])
+
+    while pending or live:
+        # free the lines of ready tickers first, then refill them before waiting again
+        for i in [i for i, t in live.items() if ready(t)]:
+            _close(i)
+        while pending and len(live) < max_lines:
+            i = pending.popleft()
+            live[i] = paced("market_data", lambda c=contracts[i]: ib.reqMktData(c, "", False, False))
+        left = deadline - time.monotonic()
+        if (not pending and not live) or left <= 0:
+            break
+        ib.waitOnUpdate(timeout=left)
+    for i in list(live):
+        _close(i)  # deadline hit: return whatever has arrived
+    return out
+
+
+def _greeks(ticker) -> Dict[str, Any]:
+    greeks = ticker.modelGreeks if ticker else None
+    return {
         "impliedVol": greeks.impliedVol if greeks else None,
         "delta": greeks.delta if greeks else None,
         "gamma": greeks.gamma if greeks else None,
@@ -32,23 +127,36 @@ def get_greeks(symbol: str, expiry: str, strike: float, right: Literal["C", "P"]
         "vega": greeks.vega if greeks else None,
         "rho": getattr(greeks, 'rho', None) if greeks else None,
     }
-    ib.cancelMktData(opt)
-    return result
 
 
-def get_option_price(symbol: str, expiry: str, strike: float, right: Literal["C", "P"]):
-    """Return current option prices."""
-    opt = Option(symbol, expiry, strike, right, "SMART"); ib.qualifyContracts(opt)
-    ticker = ib.reqMktData(opt, "", False, False); ib.sleep(2)
-    result = {
+def _prices(ticker) -> Dict[str, Any]:
+    if ticker is None:
+        return {"bid": None, "ask": None, "last": None, "close": None, "mark": None}
+    return {
         "bid": ticker.bid,
         "ask": ticker.ask,
         "last": ticker.last,
         "close": ticker.close,
-        "mark": (ticker.bid + ticker.ask) / 2 if ticker.bid and ticker.ask else ticker.last,
+        "mark": (ticker.bid + ticker.ask) / 2 if _ok(ticker.bid) and _ok(ticker.ask) else ticker.last,
     }
-    ib.cancelMktData(opt)
-    return result
+
+
+def get_greeks_bulk(contracts: List[Any], timeout: float = SNAPSHOT_TIMEOUT,
+                    max_lines: int = MAX_MKT_LINES) -> List[Dict[str, Any]]:
+    """Greeks for many options in one pass; results follow the input order.
+    Each item is an Option, a (symbol, expiry, strike, right) tuple or a dict with those keys."""
+    opts = [_as_option(c) for c in contracts]
+    tickers = _snapshot(opts, lambda t: t.modelGreeks is not None, timeout, max_lines)
+    return [_greeks(t) for t in tickers]
+
+
+def get_option_prices_bulk(contracts: List[Any], timeout: float = SNAPSHOT_TIMEOUT,
+                           max_lines: int = MAX_MKT_LINES) -> List[Dict[str, Any]]:
+    """Bid/ask/last/close/mark for many options in one pass (same input forms as get_greeks_bulk)."""
+    opts = [_as_option(c) for c in contracts]
+    ready = lambda t: (_ok(t.bid) and _ok(t.ask)) or _ok(t.last)
+    tickers = _snapshot(opts, ready, timeout, max_lines)
+    return [_prices(t) for t in tickers]
 
 
 def get_positions():
@@ -77,7 +185,7 @@ def get_positions():
 
 
 def get_account_summary():
-    return {r.tag: r.value for r in ib.accountSummary()}
+    return {r.tag: r.value for r in paced("account", lambda: ib.accountSummaryAsync())}
 
 
 def place_order(
@@ -87,9 +195,9 @@ def place_order(
     orderType: Literal["MKT", "LMT"] = "MKT",
     limitPrice: float | None = None,
 ):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
+    c = _stock(symbol)
     o = MarketOrder(side, qty) if orderType == "MKT" else LimitOrder(side, qty, limitPrice)
-    tr = ib.placeOrder(c, o); ib.sleep(1)
+    tr = paced("order", lambda: ib.placeOrder(c, o)); ib.sleep(1)
     s = tr.orderStatus
     return {
         "id": tr.order.orderId,
@@ -114,7 +222,7 @@ def close_option_spread(
     short_leg = Option(symbol, expiry, short_strike, "C", "SMART")
     
     # Qualify contracts
-    ib.qualifyContracts(long_leg, short_leg)
+    qualify(long_leg, short_leg)
     
     # Create spread contract
     spread = Contract()
@@ -136,7 +244,7 @@ def close_option_spread(
         order = LimitOrder("SELL", qty, limitPrice)
     
     # Place order
-    tr = ib.placeOrder(spread, order)
+    tr = paced("order", lambda: ib.placeOrder(spread, order))
     ib.sleep(2)
     
     s = tr.orderStatus
@@ -152,7 +260,7 @@ def close_option_spread(
 def cancel_order(orderId: int):
     ts = [t for t in ib.trades() if t.order.orderId == orderId]
     if ts:
-        ib.cancelOrder(ts[0].order)
+        paced("order", lambda: ib.cancelOrder(ts[0].order))
     return "cancel_requested"
 
 
@@ -170,25 +278,29 @@ def save_csv(filename: str, rows: List[Dict[str, Any]]):
 
 # --- Advanced helper functions ---
 def get_hist_data(symbol: str, endDate: str, duration: str, barSize: str):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
-    bars = ib.reqHistoricalData(c, endDate, duration, barSize, "TRADES", 1, 1, False)
+    c = _stock(symbol)
+    bars = paced(hist_category(barSize),
+                 lambda: ib.reqHistoricalDataAsync(c, endDate, duration, barSize, "TRADES", 1, 1, False),
+                 key=(c.conId, endDate, duration, barSize, "TRADES"),
+                 contract=(c.conId, c.exchange, "TRADES"))
     return [b.__dict__ for b in bars]
 
 
 def get_real_time_bars(symbol: str):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
+    c = _stock(symbol)
     bars = []
 
     def onBar(bar, _):
         bars.append(bar.__dict__)
 
-    ib.reqRealTimeBars(c, 5, "TRADES", True, onBar); ib.sleep(10); ib.cancelRealTimeBars(c)
+    paced("market_data", lambda: ib.reqRealTimeBars(c, 5, "TRADES", True, onBar))
+    ib.sleep(10); ib.cancelRealTimeBars(c)
     return bars
 
 
 def get_mkt_depth(symbol: str, numRows: int = 5):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
-    t = ib.reqMktDepth(c, numRows, False, []); ib.sleep(2)
+    c = _stock(symbol)
+    t = paced("depth", lambda: ib.reqMktDepth(c, numRows, False, [])); ib.sleep(2)
     return {
         "bids": [l.__dict__ for l in t.domBids],
         "asks": [l.__dict__ for l in t.domAsks],
@@ -197,21 +309,23 @@ def get_mkt_depth(symbol: str, numRows: int = 5):
 
 def get_scanner(industry: str = "STK", scanCode: str = "TOP_PERC_GAIN"):
     scan = ScannerSubscription(instrument=industry, scanCode=scanCode)
-    return [r.__dict__ for r in ib.reqScannerResults(scan)]
+    return [r.__dict__ for r in paced("scanner", lambda: ib.reqScannerDataAsync(scan))]
 
 
 def get_fundamentals(symbol: str, reportType: str = "ReportsFinSummary"):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
-    return {"xml": ib.reqFundamentalData(c, reportType)}
+    c = _stock(symbol)
+    return {"xml": paced("fundamentals", lambda: ib.reqFundamentalDataAsync(c, reportType),
+                         key=(c.conId, reportType))}
 
 
 def get_news_headlines(symbol: str, providerCode: str = "BRFG", last: int = 10):
-    news = ib.reqHistoricalNews(0, symbol, providerCode, "", 0, "")
+    news = paced("news", lambda: ib.reqHistoricalNewsAsync(0, symbol, providerCode, "", 0, ""))
     return [h.__dict__ for h in news[:last]]
 
 
 def get_news_article(articleId: int):
-    return {"articleId": articleId, "text": ib.reqNewsArticle(0, "", articleId, "")}
+    text = paced("news", lambda: ib.reqNewsArticleAsync(0, "", articleId, ""), key=("article", articleId))
+    return {"articleId": articleId, "text": text}
 
 
 def get_open_orders():
@@ -224,15 +338,16 @@ def get_order_status(orderId: int):
 
 
 def get_contract_details(symbol: str):
-    c = Stock(symbol, "SMART", "USD"); ib.qualifyContracts(c)
-    return [d.__dict__ for d in ib.reqContractDetails(c)]
+    c = _stock(symbol)
+    details = paced("contract_details", lambda: ib.reqContractDetailsAsync(c), key=("details", c.conId))
+    return [d.__dict__ for d in details]
 
 # ───── executions
 def get_executions(symbol: str = "", date: str = ""):
     """Return a list of executions for the given day.
     symbol — optional ticker filter, date — 'YYYY-MM-DD'.
     Empty arguments mean no filtering."""
-    ex_details = ib.reqExecutions()
+    ex_details = paced("account", lambda: ib.reqExecutionsAsync())
     if not date:
         date = datetime.datetime.now().strftime("%Y-%m-%d")
     rows: List[Dict[str, Any]] = []
@@ -268,6 +383,10 @@ TOOLS = [
     {"name": "get_greeks", "description": "Option greeks", "parameters": _schema({
         "symbol": {"type": "string"}, "expiry": {"type": "string"},
         "strike": {"type": "number"}, "right": {"type": "string", "enum": ["C", "P"]}})},
+    {"name": "get_greeks_bulk", "description": "Option greeks for many contracts at once", "parameters": _schema({
+        "contracts": {"type": "array", "items": {"type": "object", "properties": {
+            "symbol": {"type": "string"}, "expiry": {"type": "string"},
+            "strike": {"type": "number"}, "right": {"type": "string", "enum": ["C", "P"]}}}}})},
     {"name": "get_positions", "description": "Open positions", "parameters": {"type": "object", "properties": {}}},
     {"name": "get_account_summary", "description": "Account summary", "parameters": {"type": "object", "properties": {}}},
     {"name": "place_order", "description": "Place order", "parameters": _schema({
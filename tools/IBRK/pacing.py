@@ -0,0 +1,263 @@
+"""Pacing scheduler for IB API requests shared by the IBRK helpers.
+
+IB silently drops or rejects requests that break its pacing rules
+(historical data, scanner subscriptions, market depth, ...). Every helper
+in ``ibrkctl.py`` / ``export_portfolio.py`` sends its TWS request through
+one ``Pacer``, which gives each request category
+
+    * a token bucket (sustained rate + burst) and an optional cap on
+      requests in flight;
+    * a priority queue: when a token frees up, orders go before account
+      queries, market data before research (history, fundamentals, news);
+    * deduplication: identical requests (same ``key``) that are still in
+      flight share one TWS request; for small-bar history the result is
+      also reused for 15 s, because IB treats an identical request inside
+      that window as a pacing violation;
+    * a per-contract window: IB also rejects six or more small-bar requests
+      for the same contract / exchange / tick type within 2 s, so callers
+      pass ``contract=(conId, exchange, whatToShow)`` and at most 5 of
+      them are sent per 2 s.
+
+The global 50 messages/s limit is already enforced by ib_insync's client
+throttle, so it is not modelled here.
+
+Async callers await ``submit``; sync helpers use ``run``, which drives the
+ib_insync event loop until the request is done:
+
+    bars = pacer.run("historical", lambda: ib.reqHistoricalDataAsync(c, "", "1 D", "1 min",
+                                                                     "TRADES", 1), key=...)
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+# priorities: lower runs first
+ORDER, ACCOUNT, MARKET, RESEARCH = 0, 10, 20, 30
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float                # tokens per second; 0 = no rate limit
+    burst: float = 1.0         # bucket size
+    concurrent: int = 0        # max requests in flight; 0 = unlimited
+    priority: int = RESEARCH   # default priority of the category
+    reuse: float = 0.0         # seconds a keyed result is served again without asking TWS
+    per_contract: int = 0      # max sends for one ``contract`` per ``contract_window``; 0 = off
+    contract_window: float = 0.0
+
+
+LIMITS: Dict[str, Limit] = {
+    "order":            Limit(rate=0, priority=ORDER),
+    "account":          Limit(rate=2, burst=5, priority=ACCOUNT),
+    "market_data":      Limit(rate=40, burst=40, priority=MARKET),
+    "depth":            Limit(rate=1, burst=3, priority=MARKET),
+    "contract_details": Limit(rate=10, burst=20, concurrent=20, priority=MARKET),
+    # bars > 30 s: IB only soft-throttles, keep a modest steady pace
+    "historical":       Limit(rate=1, burst=10, concurrent=10),
+    # bars <= 30 s: hard limit of 60 requests per 10 minutes; burst + refill stays under it;
+    # 6+ requests for one contract/exchange/tick type within 2 s are a violation too
+    "historical_small": Limit(rate=30 / 600, burst=30, concurrent=10, reuse=15,
+                              per_contract=5, contract_window=2.0),
+    "fundamentals":     Limit(rate=0.5, burst=5, concurrent=5),
+    "news":             Limit(rate=1, burst=5, concurrent=5),
+    "scanner":          Limit(rate=1, burst=5, concurrent=10),  # max 10 active scanner subscriptions
+}
+
+SMALL_BARS = {"1 secs", "5 secs", "10 secs", "15 secs", "30 secs"}
+
+
+def hist_category(barSize: str) -> str:
+    """Bars of 30 s and less fall under IB's hard historical pacing limit."""
+    return "historical_small" if barSize in SMALL_BARS else "historical"
+
+
+class _Bucket:
+    def __init__(self, limit: Limit) -> None:
+        self.limit = limit
+        self.tokens = limit.burst
+        self.stamp = time.monotonic()
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.limit.rate:
+            self.tokens = min(self.limit.burst, self.tokens + (now - self.stamp) * self.limit.rate)
+        self.stamp = now
+
+    def _slot_free(self) -> bool:
+        return not self.limit.concurrent or self.active < self.limit.concurrent
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        rate = self.limit.rate
+        while self._waiters and self._slot_free() and (not rate or self.tokens >= 1):
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                continue  # waiter was cancelled
+            if rate:
+                self.tokens -= 1
+            self.active += 1
+            fut.set_result(None)
+        if self._waiters and rate and self.tokens < 1 and self._slot_free() and self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later((1 - self.tokens) / rate, self._dispatch)
+
+    async def acquire(self, priority: int) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # slot was granted just before the cancel
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+
+class _Window:
+    """Sliding window: at most ``n`` sends per ``span`` seconds for one contract.
+
+    A slot is reserved before the category bucket is awaited and stamped
+    when the request is actually sent, so a request queued in the bucket
+    still counts against the window.
+    """
+
+    def __init__(self, n: int, span: float) -> None:
+        self.n, self.span = n, span
+        self.sent: Deque[float] = deque()
+        self.reserved = 0
+
+    async def reserve(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self.sent and now - self.sent[0] >= self.span:
+                self.sent.popleft()
+            if len(self.sent) + self.reserved < self.n:
+                self.reserved += 1
+                return
+            # wait for the oldest send to leave the window (or a reservation to be sent)
+            await asyncio.sleep(self.span - (now - self.sent[0]) if self.sent else self.span / 10)
+
+    def mark_sent(self) -> None:
+        self.reserved -= 1
+        self.sent.append(time.monotonic())
+
+    def cancel(self) -> None:
+        self.reserved -= 1
+
+
+class Pacer:
+    def __init__(self, limits: Optional[Dict[str, Limit]] = None) -> None:
+        self.limits = {**LIMITS, **(limits or {})}
+        self._buckets = {name: _Bucket(lim) for name, lim in self.limits.items()}
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._recent: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._windows: Dict[Tuple[str, Hashable], _Window] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, category: str, **inc: float) -> None:
+        st = self._stats.setdefault(category, {
+            "requests": 0, "deduped": 0, "reused": 0, "waited_s": 0.0,
+        })
+        for k, v in inc.items():
+            st[k] += v
+
+    def _window(self, category: str, contract: Optional[Hashable]) -> Optional[_Window]:
+        lim = self.limits[category]
+        if contract is None or not lim.per_contract:
+            return None
+        k = (category, contract)
+        if k not in self._windows:
+            self._windows[k] = _Window(lim.per_contract, lim.contract_window)
+        return self._windows[k]
+
+    async def _execute(self, category: str, factory: Callable[[], Any], priority: int,
+                       contract: Optional[Hashable] = None) -> Any:
+        bucket = self._buckets[category]
+        window = self._window(category, contract)
+        t0 = time.monotonic()
+        if window is not None:
+            await window.reserve()
+        try:
+            await bucket.acquire(priority)
+        except BaseException:
+            if window is not None:
+                window.cancel()
+            raise
+        if window is not None:
+            window.mark_sent()
+        self._count(category, requests=1, waited_s=time.monotonic() - t0)
+        try:
+            result = factory()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            bucket.release()
+
+    async def submit(
+        self,
+        category: str,
+        factory: Callable[[], Any | Awaitable[Any]],
+        key: Optional[Hashable] = None,
+        priority: Optional[int] = None,
+        contract: Optional[Hashable] = None,
+    ) -> Any:
+        """Run ``factory()`` (sync call or coroutine) once the category allows it.
+
+        ``contract`` identifies the instrument for the per-contract window
+        (small-bar history: ``(conId, exchange, whatToShow)``).
+        """
+        lim = self.limits[category]
+        prio = lim.priority if priority is None else priority
+        if key is None:
+            return await self._execute(category, factory, prio, contract)
+
+        k = (category, key)
+        hit = self._recent.get(k)
+        if hit and time.monotonic() - hit[0] < lim.reuse:
+            self._count(category, reused=1)
+            return hit[1]
+        task = self._inflight.get(k)
+        if task is not None:
+            self._count(category, deduped=1)
+        else:
+            task = asyncio.ensure_future(self._execute(category, factory, prio, contract))
+            self._inflight[k] = task
+
+            def _done(t: asyncio.Future) -> None:
+                self._inflight.pop(k, None)
+                if lim.reuse and not t.cancelled() and t.exception() is None:
+                    now = time.monotonic()
+                    self._recent = {r: v for r, v in self._recent.items() if now - v[0] < lim.reuse}
+                    self._recent[k] = (now, t.result())
+
+            task.add_done_callback(_done)
+        # shield: one caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def run(self, category: str, factory: Callable[[], Any], key: Optional[Hashable] = None,
+            priority: Optional[int] = None, contract: Optional[Hashable] = None) -> Any:
+        """Blocking ``submit`` for sync helpers (keeps the ib_insync loop running while waiting)."""
+        from ib_insync import util
+
+        return util.run(self.submit(category, factory, key=key, priority=priority,
+                                    contract=contract))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {c: dict(s) for c, s in self._stats.items()}
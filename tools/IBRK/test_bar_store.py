@@ -0,0 +1,169 @@
+"""Tests for the chunked bar store (TWS replaced by a fake ``reqHistoricalDataAsync``)."""
+import asyncio
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ib_insync")
+
+from tools.IBRK import bar_store  # noqa: E402
+from tools.IBRK.bar_store import (  # noqa: E402
+    BAR_DTYPE, _chunks, _covered, _expects_bars, _merge, _missing_ranges, bar_seconds,
+)
+from tools.IBRK.pacing import Limit, Pacer  # noqa: E402
+
+
+def _bars(times, close):
+    out = np.zeros(len(times), dtype=BAR_DTYPE)
+    out["time"] = np.array(times, dtype="datetime64[s]")
+    out["close"] = close
+    return out
+
+
+def test_bar_seconds_and_chunks():
+    assert bar_seconds("5 secs") == 5 and bar_seconds("2 mins") == 120 and bar_seconds("1 day") == 86400
+    start, end = datetime(2025, 1, 1), datetime(2025, 1, 3, 12)
+    chunks = _chunks(start, end, "1 min")  # one day per request, newest first
+    assert chunks[0] == (datetime(2025, 1, 2, 12), end)
+    assert chunks[-1][0] == start and len(chunks) == 3
+    assert all(b == a for (_, a), (b, _) in zip(chunks[1:], chunks))  # contiguous
+
+
+def test_missing_ranges_and_merge():
+    cov = {"start": "2025-01-02T00:00:00", "end": "2025-01-03T00:00:00"}
+    assert _missing_ranges(cov, datetime(2025, 1, 2, 5), datetime(2025, 1, 2, 6)) == []
+    assert _missing_ranges(cov, datetime(2025, 1, 1), datetime(2025, 1, 4)) == [
+        (datetime(2025, 1, 1), datetime(2025, 1, 2)), (datetime(2025, 1, 3), datetime(2025, 1, 4))]
+    old = _bars(["2025-01-02T14:30", "2025-01-02T14:31"], [1.0, 2.0])
+    new = _bars(["2025-01-02T14:31", "2025-01-02T14:32"], [20.0, 3.0])
+    assert list(_merge(old, new)["close"]) == [1.0, 20.0, 3.0]
+
+
+def test_expects_bars():
+    sat, mon = datetime(2025, 1, 4), datetime(2025, 1, 6)
+    assert not _expects_bars(sat, sat + timedelta(days=2), "1 min", True)       # weekend
+    assert not _expects_bars(mon, mon + timedelta(hours=8), "1 min", True)      # before the open
+    assert _expects_bars(mon + timedelta(hours=15), mon + timedelta(hours=16), "1 min", True)
+    assert _expects_bars(mon + timedelta(hours=10), mon + timedelta(hours=11), "1 min", False)
+    assert _expects_bars(sat, sat + timedelta(days=3), "1 day", True)           # Monday's bar
+    assert not _expects_bars(mon + timedelta(hours=1), mon + timedelta(hours=20), "1 day", True)
+
+
+def test_covered_stops_at_failed_chunk():
+    d = lambda n: datetime(2025, 1, n)  # noqa: E731
+    cov = {"start": d(10).isoformat(), "end": d(20).isoformat()}
+    tail = [(d(20), d(21), True), (d(21), d(22), False), (d(22), d(23), True)]
+    assert _covered((d(20), d(23)), tail, cov) == (d(20), d(21))
+    head = [(d(7), d(8), True), (d(8), d(9), False), (d(9), d(10), True)]
+    assert _covered((d(7), d(10)), head, cov) == (d(9), d(10))
+    assert _covered((d(20), d(23)), [(d(20), d(23), False)], cov) is None
+    assert _covered((d(1), d(3)), [(d(1), d(2), False), (d(2), d(3), True)], None) == (d(2), d(3))
+
+
+class _Event:
+    def __init__(self):
+        self.handlers = []
+
+    def connect(self, h):
+        self.handlers.append(h)
+
+    def disconnect(self, h):
+        self.handlers.remove(h)
+
+    def emit(self, *args):
+        for h in list(self.handlers):
+            h(*args)
+
+
+class _Bars(list):
+    reqId = 0
+
+
+class FakeTWS:
+    """reqHistoricalDataAsync over synthetic 1-min / daily bars; ``closed`` days have none.
+
+    ``failing`` maps a chunk's date to how it fails: an error code + text sent
+    through errorEvent, or "timeout" (ib_insync then returns an empty list).
+    """
+
+    def __init__(self, closed=(), failing=None):
+        self.closed, self.failing = set(closed), dict(failing or {})
+        self.errorEvent = _Event()
+        self.calls = []
+        self.run = asyncio.run
+
+    async def reqHistoricalDataAsync(self, contract, end, duration, barSize, what, rth, fmt,
+                                     keep_up, timeout=60):
+        hi = end.replace(tzinfo=None)
+        span = bar_store.CHUNKS[barSize][0]
+        self.calls.append(hi)
+        out = _Bars()
+        out.reqId = len(self.calls)
+        fail = self.failing.get((hi - span).date())
+        if fail == "timeout":
+            await asyncio.sleep(timeout)
+            return out
+        if fail:
+            self.errorEvent.emit(out.reqId, *fail, contract)
+            return out
+        step = timedelta(seconds=bar_seconds(barSize))
+        t = hi - span
+        while t < hi:
+            day_open = t.weekday() < 5 and t.date() not in self.closed
+            if day_open and (step >= timedelta(days=1) or time(14, 30) <= t.time() < time(21)):
+                out.append(SimpleNamespace(date=t, open=1, high=1, low=1, close=1, volume=1,
+                                           average=1, barCount=1))
+            t += step
+        return out
+
+
+@pytest.fixture
+def tws(monkeypatch):
+    def install(**kw):
+        fake = FakeTWS(**kw)
+        monkeypatch.setattr(bar_store, "ib", fake)
+        monkeypatch.setattr(bar_store, "session", SimpleNamespace(get=lambda: None))
+        monkeypatch.setattr(bar_store, "qualify", lambda c: setattr(c, "conId", 7))
+        monkeypatch.setattr(bar_store, "pacer", Pacer({"historical": Limit(rate=0)}))
+        monkeypatch.setattr(bar_store, "HIST_TIMEOUT", 0.05)
+        return fake
+    return install
+
+
+def _cov(tmp_path, bar="1 min"):
+    return bar_store._read_index(tmp_path)[bar_store._key("AMD", bar, "TRADES", True)]
+
+
+@pytest.mark.parametrize("no_data_error", [False, True])
+def test_holiday_is_covered_and_not_fetched_again(tmp_path, tws, no_data_error):
+    juneteenth = date(2025, 6, 19)
+    failing = {juneteenth: (162, "Historical Market Data Service error message:"
+                                 "HMDS query returned no data: AMD@SMART Trades")}
+    fake = tws(closed={juneteenth}, failing=failing if no_data_error else None)
+    df = bar_store.load_bars("AMD", "2025-06-09", "2025-06-24", "1 min", cache_dir=tmp_path)
+    assert _cov(tmp_path) == {"start": "2025-06-09T00:00:00", "end": "2025-06-24T00:00:00"}
+    assert len(fake.calls) == 15 and len(df) == 10 * 390  # 11 weekdays, one holiday
+    bar_store.load_bars("AMD", "2025-06-09", "2025-06-24", "1 min", cache_dir=tmp_path)
+    assert len(fake.calls) == 15  # fully cached
+
+
+@pytest.mark.parametrize("failure", ["timeout", (162, "Historical data request pacing violation")])
+def test_failed_weekday_chunk_leaves_gap_open(tmp_path, tws, failure):
+    fake = tws(failing={date(2025, 6, 12): failure})
+    bar_store.load_bars("AMD", "2025-06-09", "2025-06-24", "1 min", cache_dir=tmp_path)
+    assert _cov(tmp_path)["start"] == "2025-06-13T00:00:00"  # stops at the failed chunk
+
+    fake.failing.clear()
+    fake.calls.clear()
+    bar_store.load_bars("AMD", "2025-06-09", "2025-06-24", "1 min", cache_dir=tmp_path)
+    assert len(fake.calls) == 4 and _cov(tmp_path)["start"] == "2025-06-09T00:00:00"
+
+
+def test_daily_bars_over_years(tmp_path, tws):
+    fake = tws(failing={date(2023, 6, 2): (162, "pacing violation")})
+    start, end = date(2023, 6, 1), date(2025, 6, 1)
+    df = bar_store.load_bars("AMD", start, end, "1 day", cache_dir=tmp_path)
+    assert len(fake.calls) == 3 and len(df)
+    assert _cov(tmp_path, "1 day") == {"start": "2024-06-01T00:00:00", "end": "2025-06-01T00:00:00"}
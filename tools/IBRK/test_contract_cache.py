@@ -0,0 +1,75 @@
+"""Tests for the on-disk contract cache (no TWS: a fake resolver assigns conIds)."""
+import datetime as dt
+import json
+import time
+
+from tools.IBRK.contract_cache import ContractCache, spec_key
+
+
+class Contract:
+    def __init__(self, secType="STK", symbol="", lastTradeDateOrContractMonth="", strike=0.0,
+                 right="", exchange="SMART", currency="USD", conId=0):
+        self.secType, self.symbol = secType, symbol
+        self.lastTradeDateOrContractMonth, self.strike, self.right = lastTradeDateOrContractMonth, strike, right
+        self.multiplier = self.primaryExchange = self.localSymbol = self.tradingClass = ""
+        self.exchange, self.currency, self.conId = exchange, currency, conId
+
+
+class Resolver:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *contracts):
+        self.calls.append([c.symbol for c in contracts])
+        for c in contracts:
+            if c.symbol != "NOPE":
+                c.conId = 1000 + len(c.symbol)
+                c.primaryExchange = "NASDAQ"
+        return list(contracts)
+
+
+def test_hits_skip_tws_and_survive_restart(tmp_path):
+    path = tmp_path / "contracts.json"
+    resolve = Resolver()
+    cache = ContractCache(path)
+    out = cache.qualify(resolve, Contract(symbol="AMD"), Contract(symbol="NOPE"))
+    assert [c.symbol for c in out] == ["AMD"]
+    assert resolve.calls == [["AMD", "NOPE"]] and cache.misses == 2
+
+    fresh = ContractCache(path)  # new process: reads the file
+    c = Contract(symbol="AMD")
+    fresh.qualify(resolve, c)
+    assert c.conId == 1003 and c.primaryExchange == "NASDAQ"
+    assert len(resolve.calls) == 1 and fresh.hits == 1
+    fresh.qualify(resolve, Contract(symbol="NOPE"))  # unresolved specs are never cached
+    assert resolve.calls[-1] == ["NOPE"]
+
+
+def test_already_qualified_contracts_are_left_alone(tmp_path):
+    resolve = Resolver()
+    c = Contract(symbol="AMD", conId=42)
+    assert ContractCache(tmp_path / "c.json").qualify(resolve, c) == [c]
+    assert resolve.calls == [] and c.conId == 42
+
+
+def test_expired_options_and_stale_stocks_are_purged(tmp_path):
+    path = tmp_path / "contracts.json"
+    yesterday = (dt.date.today() - dt.timedelta(days=1)).strftime("%Y%m%d")
+    next_year = str(dt.date.today().year + 1)
+    old_opt = Contract("OPT", "AMD", yesterday, 100.0, "C")
+    live_opt = Contract("OPT", "AMD", next_year + "0116", 100.0, "C")
+    month_fut = Contract("FUT", "ES", next_year + "03")
+    stock = Contract(symbol="MSFT")
+    ContractCache(path).qualify(Resolver(), old_opt, live_opt, month_fut, stock)
+
+    entries = json.loads(path.read_text())
+    entries[spec_key(Contract(symbol="MSFT"))]["cached"] = time.time() - 40 * 86400
+    path.write_text(json.dumps(entries))
+
+    cache = ContractCache(path, max_age_days=30)
+    cache._load()
+    left = json.loads(path.read_text())  # purge is written back on load
+    assert spec_key(Contract("OPT", "AMD", yesterday, 100.0, "C")) not in left
+    assert spec_key(Contract(symbol="MSFT")) not in left
+    assert spec_key(Contract("OPT", "AMD", next_year + "0116", 100.0, "C")) in left
+    assert spec_key(Contract("FUT", "ES", next_year + "03")) in left
@@ -0,0 +1,85 @@
+"""Batched option snapshots of ibrkctl against a fake IB (no TWS)."""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("ib_insync")
+
+from tools.IBRK import ibrkctl  # noqa: E402
+from tools.IBRK.contract_cache import ContractCache  # noqa: E402
+
+
+class FakeIB:
+    """Market-data subset of ib_insync.IB: ticks arrive on the first waitOnUpdate."""
+
+    def __init__(self, silent=()):
+        self.silent = set(silent)  # symbols whose ticks never arrive
+        self.live, self.max_live = {}, 0
+        self.requested, self.cancelled = [], []
+
+    def reqMktData(self, contract, *args):  # noqa: N802
+        t = SimpleNamespace(contract=contract, modelGreeks=None, bid=float("nan"),
+                            ask=float("nan"), last=float("nan"), close=float("nan"))
+        self.live[id(contract)] = t
+        self.max_live = max(self.max_live, len(self.live))
+        self.requested.append(contract)
+        return t
+
+    def cancelMktData(self, contract):  # noqa: N802
+        self.live.pop(id(contract))
+        self.cancelled.append(contract)
+
+    def waitOnUpdate(self, timeout=0):  # noqa: N802
+        arrived = [t for t in self.live.values() if t.contract.symbol not in self.silent]
+        for t in arrived:
+            k = t.contract.strike
+            t.modelGreeks = SimpleNamespace(impliedVol=0.3, delta=k / 1000, gamma=0.01,
+                                            theta=-0.1, vega=0.2)
+            t.bid, t.ask, t.last = k, k + 1, k + 0.5
+        if not arrived:
+            time.sleep(timeout)
+        return bool(arrived)
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    calls = []
+
+    def qualify_tws(*contracts):
+        calls.append(len(contracts))
+        for i, c in enumerate(contracts, 1):
+            if c.symbol != "NOPE":
+                c.conId = i
+        return list(contracts)
+
+    ib = FakeIB(silent={"SLOW"})
+    monkeypatch.setattr(ibrkctl, "ib", ib)
+    monkeypatch.setattr(ibrkctl, "paced", lambda category, factory, **kw: factory())
+    monkeypatch.setattr(ibrkctl, "_qualify_tws", qualify_tws)
+    monkeypatch.setattr(ibrkctl, "contract_cache", ContractCache(tmp_path / "contracts.json"))
+    return ib, calls
+
+
+def test_bulk_greeks_are_batched_and_ordered(fake):
+    ib, calls = fake
+    specs = [("AMD", "20300118", 100 + i, "C") for i in range(100)]
+    out = ibrkctl.get_greeks_bulk(specs, max_lines=40)
+    assert calls == [100]  # one qualify call for the whole batch
+    assert ib.max_live == 40 and len(ib.requested) == 100
+    assert ib.cancelled == ib.requested and not ib.live  # every line is released
+    assert [g["delta"] for g in out] == [(100 + i) / 1000 for i in range(100)]
+    assert out[0]["rho"] is None  # no rho in the model greeks
+
+
+def test_unqualified_and_timed_out_contracts(fake):
+    ib, calls = fake
+    specs = [("AMD", "20300118", 100, "C"), ("NOPE", "20300118", 1, "P"),
+             {"symbol": "SLOW", "expiry": "20300118", "strike": 5, "right": "C"}]
+    t0 = time.monotonic()
+    out = ibrkctl.get_option_prices_bulk(specs, timeout=0.2)
+    assert time.monotonic() - t0 < 1.0
+    assert out[0] == {"bid": 100, "ask": 101, "last": 100.5, "close": out[0]["close"], "mark": 100.5}
+    assert out[1]["bid"] is None  # never subscribed
+    assert out[2]["mark"] != out[2]["mark"]  # deadline hit: NaN ticks are returned as they are
+    assert len(ib.requested) == 2 and ib.cancelled == ib.requested and not ib.live
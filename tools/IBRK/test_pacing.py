@@ -0,0 +1,106 @@
+"""Tests for the request pacer (plain asyncio, no TWS)."""
+import asyncio
+import time
+
+import pytest
+
+from tools.IBRK.pacing import LIMITS, Limit, Pacer, hist_category
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_hist_category():
+    assert hist_category("5 secs") == "historical_small"
+    assert hist_category("1 min") == "historical"
+
+
+def test_priority_order_when_tokens_free_up():
+    async def main():
+        pacer = Pacer({"t": Limit(rate=20, burst=1, priority=30)})
+        order = []
+        await pacer.submit("t", lambda: None)  # drain the bucket
+        jobs = [pacer.submit("t", lambda p=p: order.append(p), priority=p) for p in (30, 0, 10)]
+        await asyncio.gather(*jobs)
+        return order
+
+    assert _run(main()) == [0, 10, 30]
+
+
+def test_rate_and_concurrency():
+    async def main():
+        pacer = Pacer({"t": Limit(rate=20, burst=2, concurrent=1)})
+        active = peak = 0
+
+        async def job():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        t0 = time.monotonic()
+        await asyncio.gather(*[pacer.submit("t", job) for _ in range(6)])
+        return time.monotonic() - t0, peak, pacer.stats()["t"]["requests"]
+
+    elapsed, peak, requests = _run(main())
+    assert peak == 1 and requests == 6
+    assert elapsed >= 4 / 20 - 0.02  # burst of 2, then 20/s
+
+
+def test_dedupe_in_flight_and_reuse():
+    async def main():
+        pacer = Pacer({"t": Limit(rate=0, reuse=60)})
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "bars"
+
+        first = await asyncio.gather(*[pacer.submit("t", fetch, key="k") for _ in range(3)])
+        again = await pacer.submit("t", fetch, key="k")
+        return first, again, len(calls), pacer.stats()["t"]
+
+    first, again, n, st = _run(main())
+    assert first == ["bars"] * 3 and again == "bars" and n == 1
+    assert st["deduped"] == 2 and st["reused"] == 1
+
+
+def test_small_bars_per_contract_window():
+    assert LIMITS["historical_small"].per_contract == 5
+
+    async def main():
+        pacer = Pacer({"t": Limit(rate=0, per_contract=5, contract_window=0.3)})
+        sent = []
+        a = [pacer.submit("t", lambda: sent.append(("A", time.monotonic())), contract=(1, "SMART", "TRADES"))
+             for _ in range(7)]
+        b = [pacer.submit("t", lambda: sent.append(("B", time.monotonic())), contract=(2, "SMART", "TRADES"))
+             for _ in range(5)]
+        t0 = time.monotonic()
+        await asyncio.gather(*a, *b)
+        return t0, sent
+
+    t0, sent = _run(main())
+    a_times = sorted(t - t0 for c, t in sent if c == "A")
+    b_times = [t - t0 for c, t in sent if c == "B"]
+    assert max(b_times) < 0.1          # another contract is not held back
+    assert max(a_times[:5]) < 0.1
+    assert min(a_times[5:]) >= 0.29    # 6th request waits for the window
+    for i in range(len(a_times) - 5):  # never 6 inside one window
+        assert a_times[i + 5] - a_times[i] >= 0.29
+
+
+def test_cancelled_waiter_frees_its_contract_slot():
+    async def main():
+        pacer = Pacer({"t": Limit(rate=1, burst=1, per_contract=1, contract_window=60)})
+        await pacer.submit("t", lambda: None)  # bucket empty for 1 s
+        waiting = asyncio.ensure_future(pacer.submit("t", lambda: None, contract="X"))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return pacer._windows[("t", "X")].reserved
+
+    assert _run(main()) == 0
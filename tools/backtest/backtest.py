@@ -5,6 +5,26 @@
 
 Пример:
     python tools/backtest/backtest.py portfolio.csv 2018-01-01 2025-07-15 monthly
+    python tools/backtest/backtest.py portfolio.csv 2018-01-01 2025-07-15 yearly --offline
+
+Цены читаются через локальный кеш `data/prices/` (см. price_cache.py):
+докачиваются только недостающие диапазоны, `--offline` работает без сети.
+
+Кроме CSV пишется типизированный `.npz` того же имени — читать через
+`results.load_backtest(path)` без разбора текста.
+
+График (PNG) необязателен: `--no-plot` — только метрики, `--plot-async` —
+рисуется фоновым процессом уже после записи CSV; matplotlib импортируется
+лениво и всегда с бэкендом Agg (см. plotting.py).
+
+Повторный запуск с теми же весами, датами, freq и версией цен отдаёт уже
+готовые CSV/PNG из кеша результатов (result_cache.py); `--no-cache` — пересчитать.
+Версия цен берётся из index.json кеша цен и size/mtime файлов (или панели),
+поэтому попадание в кеш не читает цены и не считает ребаланс.
+
+Для больших вселенных (тысячи тикеров) — `--panel NAME`: цены берутся из
+memory-mapped float32 панели (см. panel_store.py) и считаются по `--chunk`
+столбцов за раз, так что пиковая память не зависит от размера вселенной.
 
 `portfolio.csv` ожидает столбцы:
 Symbol,Quantity
@@ -14,110 +34,172 @@ MSFT,30
 """
 from __future__ import annotations
 
+import argparse
 import sys
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from engine import FREQ_MAP, load_weights, rebalance_equity, rebalance_index  # noqa: E402
+from metrics import RiskAccumulator  # noqa: E402
+from panel_store import PANEL_DIR, active_rows, open_panel  # noqa: E402
+from plotting import render_equity, render_in_background, render_run  # noqa: E402
+from price_cache import cache_version, load_prices  # noqa: E402
+from results import BacktestResult, save_backtest  # noqa: E402
+from result_cache import cache_key, file_version, lookup, store  # noqa: E402
 
 # ---------------------------------------------------------------------------
 # Utils
 # ---------------------------------------------------------------------------
 
 
-def _usage() -> None:  # noqa: D401
-    print("usage: backtest.py <portfolio.csv> <start> <end> <freq>")
-    sys.exit(1)
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser("backtest.py", add_help=True)
+    p.add_argument("portfolio", help="Symbol,Quantity CSV")
+    p.add_argument("start", type=pd.to_datetime, help="first date, e.g. 2018-01-01")
+    p.add_argument("end", type=pd.to_datetime, help="end date (exclusive)")
+    p.add_argument("freq", help="monthly, quarterly or yearly")
+    p.add_argument("--offline", action="store_true",
+                   help="use only the local price cache, no network")
+    p.add_argument("--refresh-prices", action="store_true",
+                   help="re-download the whole range into the price cache")
+    p.add_argument("--no-plot", action="store_true", help="metrics only, no PNG")
+    p.add_argument("--plot-async", action="store_true",
+                   help="render the PNG in a background worker after the CSV is written")
+    p.add_argument("--no-cache", action="store_true",
+                   help="always recompute, ignore cached results")
+    p.add_argument("--panel", help="large-universe mode: name of a memory-mapped panel")
+    p.add_argument("--chunk", type=int, default=256,
+                   help="columns per chunk in --panel mode")
+    return p.parse_args()
+
+
+def _run_in_memory(weights: pd.Series, start_dt, end_dt, freq: str, args) -> tuple:
+    prices = load_prices(
+        weights.index, start_dt, end_dt, offline=args.offline, refresh=args.refresh_prices
+    )
+    version = cache_version(weights.index)
+    if prices.empty:
+        sys.exit("no price data (offline cache empty?)")
 
+    prices = prices.dropna(how="all")
 
-# ---------------------------------------------------------------------------
-# Main
-# ---------------------------------------------------------------------------
+    # align weights columns
+    missing = [t for t in weights.index if t not in prices.columns]
+    if missing:
+        print(f"Warning: no price data for {missing}, they will be skipped")
+        weights = weights.drop(missing)
+    prices = prices[weights.index]
 
+    rebal_idx = rebalance_index(prices.index, start_dt, end_dt, freq)
+    equity = rebalance_equity(prices.to_numpy(dtype=float), weights.to_numpy(), rebal_idx)
+    portfolio = pd.Series(equity, index=prices.index)
 
-def main() -> None:  # noqa: D401
-    if len(sys.argv) != 5:
-        _usage()
+    first_prices = prices.loc[prices.index[0]].to_dict()
+    last_prices = prices.loc[prices.index[-1]].to_dict()
+    return portfolio, first_prices, last_prices, version
 
-    f_name, start, end, freq = sys.argv[1:]
-    try:
-        start_dt = pd.to_datetime(start)
-        end_dt = pd.to_datetime(end)
-    except ValueError:
-        _usage()
 
-    freq_map = {"monthly": "M", "quarterly": "Q", "yearly": "A"}
-    if freq.lower() not in freq_map:
-        sys.exit("freq must be one of: monthly, quarterly, yearly")
+def _run_from_panel(weights: pd.Series, start_dt, end_dt, freq: str, args) -> tuple:
+    panel, dates, symbols = open_panel(args.panel)
+    version = file_version(panel.filename)
+    col_of = {s: i for i, s in enumerate(symbols)}
 
-    # --- load portfolio ---
-    df_port = pd.read_csv(f_name)[["Symbol", "Quantity"]]
-    df_port["Quantity"] = pd.to_numeric(df_port["Quantity"], errors="coerce")
-    df_port = df_port.dropna()
-    if df_port.empty:
-        sys.exit("portfolio.csv is empty or invalid")
+    missing = [t for t in weights.index if t not in col_of]
+    if missing:
+        print(f"Warning: no price data for {missing}, they will be skipped")
+        weights = weights.drop(missing)
+    cols = np.array([col_of[t] for t in weights.index], dtype=np.intp)
+
+    # same rows as the in-memory path: the period, minus dates without any price
+    a, b = dates.searchsorted([start_dt, end_dt])
+    block = panel[a:b]
+    rows = np.flatnonzero(active_rows(block, cols, args.chunk))
+    if not len(rows):
+        sys.exit("no price data in the panel for this period")
+    dates = dates[a:b][rows]
+
+    w_full = np.zeros(len(symbols))
+    w_full[cols] = weights.to_numpy()
+    rebal_idx = rebalance_index(dates, start_dt, end_dt, freq)
+    equity = rebalance_equity(block, w_full, rows[rebal_idx], chunk=args.chunk)[rows]
+    portfolio = pd.Series(equity, index=dates)
+
+    first_prices = dict(zip(weights.index, block[rows[0], cols].astype(float)))
+    last_prices = dict(zip(weights.index, block[rows[-1], cols].astype(float)))
+    return portfolio, first_prices, last_prices, version
+
+
+def _price_version(weights: pd.Series, start_dt, end_dt, args) -> str | None:
+    """Price-data version known before loading anything, or ``None`` if a run would change it."""
+    if args.panel:
+        return file_version(PANEL_DIR / f"{args.panel}.npy")
+    if args.refresh_prices:
+        return None
+    if args.offline:
+        return cache_version(weights.index)
+    return cache_version(weights.index, start_dt, end_dt)  # None while a gap is still to download
+
+
+def _serve_cached(key: str, args) -> bool:
+    hit = lookup(key)
+    if not hit:
+        return False
+    png = next((f for f in hit if f.suffix == ".png"), None)
+    if png is None and not args.no_plot:
+        # cached by a --no-plot run: draw the missing chart from the .npz
+        npz = next(f for f in hit if f.suffix == ".npz")
+        png = render_run(npz)
+        store(key, [*hit, png])
+    print("✔ cached →", png or hit[0])
+    return True
 
-    weights = df_port.set_index("Symbol")["Quantity"]
-    weights = weights / weights.sum()
 
-    # --- download prices (auto-adjusted) ---
-    tickers = " ".join(weights.index)
-    raw = yf.download(tickers, start=start_dt, end=end_dt, auto_adjust=True, progress=False)
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
 
-    # yfinance для нескольких тикеров возвращает MultiIndex, где уровень 1 — 'Close', 'Open' и т.д.
-    if isinstance(raw.columns, pd.MultiIndex):
-        prices = raw.xs("Close", level=0, axis=1)
-    else:
-        prices = raw  # одиночный тикер
 
-    prices = prices.dropna(how="all")
+def main() -> None:  # noqa: D401
+    args = _parse_args()
+    f_name, start_dt, end_dt, freq = args.portfolio, args.start, args.end, args.freq
 
-    # align weights columns
-    missing = [t for t in weights.index if t not in prices.columns]
-    if missing:
-        print(f"Warning: no price data for {missing}, they will be skipped")
-        weights = weights.drop(missing)
-    prices = prices[weights.index]
+    if freq.lower() not in FREQ_MAP:
+        sys.exit("freq must be one of: monthly, quarterly, yearly")
 
-    # --- rebalance ---
-    rebal_dates = pd.date_range(start_dt, end_dt, freq=freq_map[freq.lower()]).union([start_dt])
-    rebal_dates = rebal_dates[rebal_dates.isin(prices.index)]
+    # --- load portfolio ---
+    try:
+        weights = load_weights(f_name)
+    except ValueError:
+        sys.exit("portfolio.csv is empty or invalid")
 
-    portfolio = pd.Series(index=prices.index, dtype=float)
-    last_rebal = rebal_dates[0]
-    portfolio[last_rebal] = 1.0  # начальная стоимость 1
+    # --- cached result? decided from the cache index + file stats, no prices read ---
+    if not args.no_cache:
+        version = _price_version(weights, start_dt, end_dt, args)
+        if version and _serve_cached(cache_key(weights, start_dt, end_dt, freq, version), args):
+            return
 
-    for i in range(1, len(rebal_dates)):
-        d_prev, d_cur = rebal_dates[i - 1], rebal_dates[i]
-        # доходность между ребалансами
-        ret = (prices.loc[d_prev:d_cur] / prices.loc[d_prev]).dot(weights)
-        portfolio.loc[d_prev:d_cur] = portfolio.loc[d_prev] * ret
-        last_rebal = d_cur
+    # --- prices + rebalance ---
+    run = _run_from_panel if args.panel else _run_in_memory
+    portfolio, first_prices, last_prices, version = run(weights, start_dt, end_dt, freq, args)
+    equity = portfolio.to_numpy()
 
-    # хвост до конца периода
-    if last_rebal < prices.index.max():
-        tail_ret = (prices.loc[last_rebal:] / prices.loc[last_rebal]).dot(weights)
-        portfolio.loc[last_rebal:] = portfolio.loc[last_rebal] * tail_ret
+    # the download may have found nothing new: the version is unchanged and the run cached
+    key = cache_key(weights, start_dt, end_dt, freq, version)
+    if not args.no_cache and _serve_cached(key, args):
+        return
 
     # --- save results ---
     out_dir = Path("data/backtests")
     out_dir.mkdir(parents=True, exist_ok=True)
     tag = Path(f_name).stem + "_" + datetime.now().strftime("%Y-%m-%d_%H-%M")
-
-    plt.figure(figsize=(8, 4))
-    portfolio.plot(title="Backtest cumulative return")
-    plt.xlabel("Date")
-    plt.ylabel("Growth of 1$")
-    png_path = out_dir / f"{tag}.png"
-    plt.savefig(png_path, bbox_inches="tight")
-    plt.close()
+    if (out_dir / f"{tag}.csv").exists():
+        tag += "_" + key[:8]  # same minute, different run: never overwrite cached artefacts
 
     # prepare header metadata
-    first_prices = prices.loc[prices.index[0]].to_dict()
-    last_prices = prices.loc[prices.index[-1]].to_dict()
-
     header_lines: list[str] = []
     header_lines.append(f"# REBALANCE_FREQ,{freq.lower()}")
     header_lines.append(
@@ -128,18 +210,8 @@ def main() -> None:  # noqa: D401
     )
 
     # --- risk metrics ---
-    daily_ret = portfolio.dropna().pct_change().dropna()
-    if not daily_ret.empty:
-        mean_ret = daily_ret.mean()
-        vol = daily_ret.std()
-        sharpe = (mean_ret / vol) * (252 ** 0.5) if vol else 0.0
-
-        downside = daily_ret[daily_ret < 0]
-        dd_std = downside.std()
-        sortino = (mean_ret / dd_std) * (252 ** 0.5) if dd_std else 0.0
-
-        header_lines.append(f"# SHARPE,{sharpe:.4f}")
-        header_lines.append(f"# SORTINO,{sortino:.4f}")
+    acc = RiskAccumulator().extend(equity)
+    header_lines.extend(acc.header_lines())
 
     csv_path = out_dir / f"{tag}.csv"
     with open(csv_path, "w", newline="") as fh:
@@ -147,6 +219,30 @@ def main() -> None:  # noqa: D401
             fh.write(ln + "\n")
         portfolio.to_csv(fh, header=["Portfolio"], index_label="Date")
 
+    # typed binary copy for fast readers (results.load_backtest)
+    npz_path = save_backtest(out_dir / f"{tag}.npz", BacktestResult(
+        dates=portfolio.index.values,
+        equity=equity,
+        freq=freq.lower(),
+        metrics=acc.snapshot(),
+        initial_prices=first_prices,
+        final_prices=last_prices,
+    ))
+
+    # --- chart (optional, lazily imported matplotlib on Agg) ---
+    if args.no_plot:
+        store(key, [csv_path, npz_path])
+        print("✔ saved →", csv_path)
+        return
+
+    png_path = out_dir / f"{tag}.png"
+    if args.plot_async:
+        # the PNG does not exist yet: the worker attaches it to the entry once rendered
+        store(key, [csv_path, npz_path])
+        render_in_background(npz_path, png_path, cache_key=key)
+    else:
+        render_equity(portfolio, png_path)
+        store(key, [csv_path, npz_path, png_path])
     print("✔ saved →", png_path)
 
 
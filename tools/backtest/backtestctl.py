@@ -4,6 +4,12 @@
 Thin wrapper so the chat agent can run backtests.
 Example:
     ./tools/backtest/backtestctl.py portfolio.csv 2018-01-01 2025-07-15 monthly
+    ./tools/backtest/backtestctl.py "AAPL:50,MSFT:30" 2018-01-01 2025-07-15 yearly --offline
+
+Extra flags after <freq> are passed through to backtest.py.
+
+Parameter sweeps (portfolios × freq × windows) go to sweep.py:
+    ./tools/backtest/backtestctl.py sweep --portfolios a.csv b.csv --roll 2010-01-01:2025-07-15:5
 
 After execution prints the path to the generated .png so Cursor turns it into a clickable link.
 """
@@ -12,22 +18,30 @@ import subprocess, sys, pathlib, tempfile, textwrap
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 SCRIPT = pathlib.Path(__file__).with_name("backtest.py")
+SWEEP = pathlib.Path(__file__).with_name("sweep.py")
 OUT_DIR = ROOT / "data" / "backtests"
 
 
 def main() -> None:  # noqa: D401
-    if len(sys.argv) != 5:
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep":
+        subprocess.run([sys.executable, str(SWEEP), *sys.argv[2:]], check=True)
+        return
+
+    if len(sys.argv) < 5:
         sys.exit(textwrap.dedent(
             """
             usage:
-              backtestctl.py <portfolio.csv> <start> <end> <freq>
-              backtestctl.py <tickers_inline> <start> <end> <freq>
+              backtestctl.py <portfolio.csv> <start> <end> <freq> [flags]
+              backtestctl.py <tickers_inline> <start> <end> <freq> [flags]
+              backtestctl.py sweep --portfolios <csv>... [--freq ...] [--windows S:E ...] [--roll S:E:YEARS]
 
             <tickers_inline> format: "AAPL:50,MSFT:30" (Quantity optional, defaults to 1)
+            flags: --offline, --refresh-prices, --no-cache, --no-plot, --plot-async, --panel NAME
             """
         ).strip())
 
-    csv_or_inline, start, end, freq = sys.argv[1:]
+    csv_or_inline, start, end, freq = sys.argv[1:5]
+    extra = sys.argv[5:]
 
     # If the file doesn't exist, treat the argument as an inline ticker list
     csv_path = pathlib.Path(csv_or_inline)
@@ -55,8 +69,16 @@ def main() -> None:  # noqa: D401
         tmp.flush()
         tmp.close()
 
-    cmd = [sys.executable, str(SCRIPT), str(csv_path), start, end, freq]
-    subprocess.run(cmd, check=True)
+    cmd = [sys.executable, str(SCRIPT), str(csv_path), start, end, freq, *extra]
+    res = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True)
+    sys.stdout.write(res.stdout)
+
+    # backtest.py reports "✔ saved → <png>" or "✔ cached → <png>" (result cache hit)
+    reported = [ln.split("→", 1)[1].strip() for ln in res.stdout.splitlines() if "→" in ln]
+    if reported:
+        latest = pathlib.Path(reported[-1]).resolve()
+        print(latest.relative_to(pathlib.Path.cwd()) if latest.is_relative_to(pathlib.Path.cwd()) else latest)
+        return
 
     # find the newest .png output
     try:
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""tools/backtest/bootstrap.py
+
+Bootstrap confidence intervals for a finished backtest.
+
+Daily portfolio returns are resampled into thousands of synthetic paths with
+a moving-block or stationary (Politis–Romano) bootstrap, which keeps the
+short-range autocorrelation/volatility clustering of the original series.
+Index arrays are generated in batches with NumPy (no per-path Python loop);
+batches can be spread over a process pool. Every batch gets its own child of
+one ``SeedSequence`` so the result is reproducible for a given ``--seed``
+regardless of the number of workers.
+
+Example:
+    python tools/backtest/bootstrap.py data/backtests/portfolio_reit_2025-07-15_23-56.csv
+    python tools/backtest/bootstrap.py <backtest.csv> --paths 10000 --years 20 --method block --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from results import load_backtest  # noqa: E402
+
+PERIODS_PER_YEAR = 252
+PERCENTILES = (5, 25, 50, 75, 95)
+METHODS = ("stationary", "block")
+
+# ---------------------------------------------------------------------------
+# Index generation
+# ---------------------------------------------------------------------------
+
+
+def block_indices(rng: np.random.Generator, n: int, paths: int, horizon: int, block: int) -> np.ndarray:
+    """Moving-block bootstrap: fixed-length blocks, wrapping around the sample."""
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, n, size=(paths, n_blocks))
+    idx = starts[:, :, None] + np.arange(block)
+    return idx.reshape(paths, -1)[:, :horizon] % n
+
+
+def stationary_indices(rng: np.random.Generator, n: int, paths: int, horizon: int, block: int) -> np.ndarray:
+    """Stationary bootstrap: geometric block lengths with mean ``block``."""
+    new_block = rng.random((paths, horizon)) < 1.0 / block
+    new_block[:, 0] = True
+    flat = new_block.ravel()  # every path starts a block, so rows never leak
+    pos = np.arange(flat.size)
+    # offset inside the current block = distance to the last block start
+    offset = pos - np.maximum.accumulate(np.where(flat, pos, 0))
+    starts = rng.integers(0, n, size=int(flat.sum()))
+    block_start = starts[np.cumsum(flat) - 1]
+    return ((block_start + offset) % n).reshape(paths, horizon)
+
+
+# ---------------------------------------------------------------------------
+# Path statistics
+# ---------------------------------------------------------------------------
+
+
+def _path_stats(sample: np.ndarray) -> Dict[str, np.ndarray]:
+    """Terminal wealth, Sharpe and max drawdown of every row of ``sample``."""
+    wealth = np.cumprod(1.0 + sample, axis=1)
+    peak = np.maximum.accumulate(wealth, axis=1)
+    mdd = (wealth / peak - 1.0).min(axis=1)
+    mdd = np.minimum(mdd, wealth[:, 0] - 1.0)  # drawdown from the initial $1
+
+    std = sample.std(axis=1, ddof=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, sample.mean(axis=1) / std * np.sqrt(PERIODS_PER_YEAR), 0.0)
+    return {"terminal_wealth": wealth[:, -1], "sharpe": sharpe, "max_drawdown": mdd}
+
+
+def _run_batch(
+    returns: np.ndarray, seed: np.random.SeedSequence, paths: int, horizon: int, block: int, method: str
+) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    gen = stationary_indices if method == "stationary" else block_indices
+    idx = gen(rng, len(returns), paths, horizon, block)
+    return _path_stats(returns[idx])
+
+
+def bootstrap(
+    returns: np.ndarray,
+    paths: int = 10_000,
+    horizon: Optional[int] = None,
+    block: int = 20,
+    method: str = "stationary",
+    seed: int = 0,
+    workers: int = 1,
+    batch: int = 500,
+) -> Dict[str, np.ndarray]:
+    """Per-path terminal wealth / Sharpe / max drawdown of bootstrapped returns."""
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    horizon = horizon or len(returns)
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if paths < 1 or batch < 1:
+        raise ValueError("paths and batch must be >= 1")
+    if block < 1 or horizon < 1:
+        raise ValueError("block and horizon must be >= 1")
+    if not len(returns):
+        raise ValueError("no returns to resample")
+
+    sizes = [min(batch, paths - i) for i in range(0, paths, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(returns, s, k, horizon, block, method) for s, k in zip(seeds, sizes)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_batch, *zip(*args)))
+    else:
+        parts = [_run_batch(*a) for a in args]
+
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def percentile_bands(stats: Dict[str, np.ndarray], q=PERCENTILES) -> pd.DataFrame:
+    """Rows = metric, columns = ``p5 … p95`` plus the mean."""
+    rows = {}
+    for k, v in stats.items():
+        row = dict(zip((f"p{p}" for p in q), np.percentile(v, q)))
+        row["mean"] = float(v.mean())
+        rows[k] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser("bootstrap.py")
+    p.add_argument("backtest", help="CSV or NPZ written by backtest.py")
+    p.add_argument("--paths", type=int, default=10_000)
+    p.add_argument("--years", type=float, help="path length (default: length of the backtest)")
+    p.add_argument("--block", type=int, default=20, help="(mean) block length in days")
+    p.add_argument("--method", choices=METHODS, default="stationary")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, default=1)
+    args = p.parse_args(argv)
+
+    for name in ("paths", "block", "workers"):
+        if getattr(args, name) < 1:
+            p.error(f"--{name} must be >= 1")
+    if args.years is not None and args.years * PERIODS_PER_YEAR < 1:
+        p.error("--years must cover at least one trading day")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:  # noqa: D401
+    args = _parse_args(argv)
+    src = Path(args.backtest)
+    try:
+        equity = load_backtest(src).series.dropna()
+    except (OSError, KeyError, ValueError) as e:
+        # missing file, no Portfolio column, unparsable dates/values
+        sys.exit(f"cannot read backtest {src}: {e!r}")
+    returns = equity.pct_change().dropna().to_numpy()
+    if len(returns) < args.block * 2:
+        sys.exit("backtest is too short for the chosen block length")
+
+    horizon = int(round(args.years * PERIODS_PER_YEAR)) if args.years else None
+    stats = bootstrap(
+        returns, args.paths, horizon, args.block, args.method, args.seed, args.workers
+    )
+    bands = percentile_bands(stats)
+
+    out = src.with_name(f"{src.stem}_bootstrap.csv")
+    with open(out, "w", newline="") as fh:
+        fh.write(f"# METHOD,{args.method}\n")
+        fh.write(f"# PATHS,{args.paths}\n")
+        fh.write(f"# HORIZON_DAYS,{horizon or len(returns)}\n")
+        fh.write(f"# BLOCK,{args.block}\n")
+        fh.write(f"# SEED,{args.seed}\n")
+        bands.to_csv(fh, index_label="metric", float_format="%.4f")
+
+    print(bands.round(4).to_string())
+    print("✔ saved →", out)
+
+
+if __name__ == "__main__":
+    main()
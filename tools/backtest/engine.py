@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""tools/backtest/engine.py
+
+Vectorised rebalancing engine shared by the back-testing tools.
+
+The equity curve of a periodically rebalanced portfolio is computed on a plain
+float array panel (rows = dates, columns = symbols):
+
+* at every rebalance date ``r_k`` the weights are turned into holdings
+  ``w / prices[r_k]`` (units per $1 of portfolio value);
+* the growth inside a period is ``prices[t] @ holdings_k``;
+* period-end values chain together via a cumulative product.
+
+Cost is a single pass over the panel (one BLAS mat-vec per period), so
+5 000 tickers × 30 years of daily bars take a fraction of a second.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+FREQ_MAP = {"monthly": "M", "quarterly": "Q", "yearly": "A"}
+
+
+def load_weights(path) -> pd.Series:
+    """Normalised weights from a ``Symbol,Quantity`` portfolio CSV."""
+    df_port = pd.read_csv(path)[["Symbol", "Quantity"]]
+    df_port["Quantity"] = pd.to_numeric(df_port["Quantity"], errors="coerce")
+    df_port = df_port.dropna()
+    if df_port.empty:
+        raise ValueError(f"{path} is empty or invalid")
+
+    weights = df_port.set_index("Symbol")["Quantity"]
+    return weights / weights.sum()
+
+
+def rebalance_index(dates: pd.DatetimeIndex, start, end, freq: str) -> np.ndarray:
+    """Row positions in ``dates`` at which the portfolio is rebalanced.
+
+    Period ends of ``freq`` between ``start`` and ``end`` plus ``start`` itself,
+    keeping only those that are trading days in ``dates``.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    rebal = pd.date_range(start, end, freq=FREQ_MAP[freq.lower()]).union([start])
+    rebal = rebal[rebal.isin(dates)]
+    return dates.get_indexer(rebal).astype(np.intp)
+
+
+def rebalance_equity(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    rebal_idx: np.ndarray,
+    chunk: int | None = None,
+) -> np.ndarray:
+    """Equity curve (growth of $1) of a portfolio rebalanced at ``rebal_idx``.
+
+    prices    – (T, N) float panel, NaN where a symbol has no bar; may be a
+                read-only ``np.memmap``
+    weights   – (N,) target weights, summing to 1
+    rebal_idx – sorted row positions of rebalance dates; the first one is the
+                start of the backtest (value 1.0), rows before it are NaN
+    chunk     – process the panel ``chunk`` columns at a time (out-of-core
+                mode: only T × chunk values are materialised at once)
+    """
+    if chunk:
+        return _rebalance_equity_chunked(prices, weights, rebal_idx, chunk)
+
+    prices = np.asarray(prices)
+    weights = np.asarray(weights, dtype=float)
+    rebal_idx = np.asarray(rebal_idx, dtype=np.intp)
+
+    n_rows = prices.shape[0]
+    equity = np.full(n_rows, np.nan)
+    if not len(rebal_idx):
+        return equity
+
+    # holdings per $1 at each rebalance: (S, N)
+    holdings = weights[None, :] / prices[rebal_idx]
+    # growth of every closed period, chained into period-start values
+    period_growth = np.einsum("ij,ij->i", prices[rebal_idx[1:]], holdings[:-1])
+    start_value = np.concatenate(([1.0], np.cumprod(period_growth)))
+
+    bounds = np.append(rebal_idx, n_rows)
+    for k in range(len(rebal_idx)):
+        a, b = bounds[k], bounds[k + 1]
+        equity[a:b] = (prices[a:b] @ holdings[k]) * start_value[k]
+    return equity
+
+
+def _rebalance_equity_chunked(
+    prices: np.ndarray, weights: np.ndarray, rebal_idx: np.ndarray, chunk: int
+) -> np.ndarray:
+    """Column-chunked ``rebalance_equity``.
+
+    Both the in-period growth ``prices[t] @ holdings`` and the period-end
+    growth are sums over symbols, so they are accumulated chunk by chunk and
+    chained with the cumulative product only at the end.
+    """
+    weights = np.asarray(weights, dtype=float)
+    rebal_idx = np.asarray(rebal_idx, dtype=np.intp)
+
+    n_rows = prices.shape[0]
+    equity = np.full(n_rows, np.nan)
+    if not len(rebal_idx):
+        return equity
+
+    first = rebal_idx[0]
+    bounds = np.append(rebal_idx, n_rows)
+    growth = np.zeros(n_rows - first)
+    period_growth = np.zeros(len(rebal_idx) - 1)
+
+    # symbols outside the portfolio (zero weight) are never read
+    held = np.flatnonzero(weights)
+    for c0 in range(0, len(held), chunk):
+        cols = held[c0:c0 + chunk]
+        w = weights[cols]
+        block = np.asarray(prices[first:, cols], dtype=float)
+        holdings = w[None, :] / block[rebal_idx - first]
+        period_growth += np.einsum("ij,ij->i", block[rebal_idx[1:] - first], holdings[:-1])
+        for k in range(len(rebal_idx)):
+            a, b = bounds[k] - first, bounds[k + 1] - first
+            growth[a:b] += block[a:b] @ holdings[k]
+
+    start_value = np.concatenate(([1.0], np.cumprod(period_growth)))
+    seg_len = np.diff(bounds)
+    equity[first:] = growth * np.repeat(start_value, seg_len)
+    return equity
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""tools/backtest/metrics.py
+
+Streaming risk metrics for equity curves.
+
+``RiskAccumulator`` consumes equity values one at a time (a finished backtest
+or a live curve that is still growing) and keeps Welford-style running moments,
+so every metric comes out of a single O(n) pass without intermediate Series:
+volatility, Sharpe, Sortino, CAGR, max drawdown and its duration, Calmar,
+historical VaR/CVaR. ``RollingRisk`` is the fixed-window counterpart.
+
+Example:
+    acc = RiskAccumulator()
+    acc.extend(equity)            # numpy array / list of portfolio values
+    acc.update(new_value)         # live monitoring: O(1) per tick
+    acc.snapshot()["sharpe"]
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Welford moments
+# ---------------------------------------------------------------------------
+
+
+class _Moments:
+    """Running mean / variance with O(1) add and remove."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.n -= 1
+        self.mean -= delta / self.n
+        self.m2 -= delta * (x - self.mean)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), like ``pandas.Series.std``."""
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1)) if self.n > 1 else 0.0
+
+
+def _ratio(mean: float, std: float, periods_per_year: int) -> float:
+    return (mean / std) * math.sqrt(periods_per_year) if std else 0.0
+
+
+def _period_return(value: float, last: float) -> float:
+    # after a wipe-out (equity 0) there is no return to speak of: NaN, not a crash
+    return value / last - 1.0 if last else math.nan
+
+
+# ---------------------------------------------------------------------------
+# Full-history accumulator
+# ---------------------------------------------------------------------------
+
+
+class RiskAccumulator:
+    """One-pass risk metrics of an equity curve.
+
+    All moments and drawdown state are O(1); the return buffer kept for
+    historical VaR/CVaR is the only O(n) state (a quantile cannot be exact
+    otherwise) and is only touched when ``snapshot()`` is called.
+    """
+
+    def __init__(self, periods_per_year: int = 252, var_level: float = 0.95) -> None:
+        self.periods_per_year = periods_per_year
+        self.var_level = var_level
+
+        self._ret = _Moments()
+        self._down = _Moments()
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+        self._peak = -math.inf
+        self._max_dd = 0.0
+        self._underwater = 0
+        self._max_dd_duration = 0
+
+        self._buf = np.empty(256)
+
+    # --- feeding --------------------------------------------------------
+
+    def update(self, value: float) -> None:
+        """Append the next equity value (NaN is ignored)."""
+        if value is None or math.isnan(value):
+            return
+
+        if self._last is None:
+            self._first = value
+        elif not math.isnan(r := _period_return(value, self._last)):
+            if self._ret.n == len(self._buf):
+                self._buf = np.resize(self._buf, 2 * len(self._buf))
+            self._buf[self._ret.n] = r
+            self._ret.add(r)
+            if r < 0:
+                self._down.add(r)
+        self._last = value
+
+        if value >= self._peak:
+            self._peak = value
+            self._underwater = 0
+        else:
+            self._underwater += 1
+            self._max_dd = min(self._max_dd, value / self._peak - 1.0 if self._peak else -1.0)
+            self._max_dd_duration = max(self._max_dd_duration, self._underwater)
+
+    def extend(self, values: Iterable[float]) -> "RiskAccumulator":
+        for v in np.asarray(values, dtype=float).tolist():
+            self.update(v)
+        return self
+
+    # --- results --------------------------------------------------------
+
+    @property
+    def count(self) -> int:
+        """Number of returns seen so far."""
+        return self._ret.n
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current metrics; empty until at least two returns are seen."""
+        n = self._ret.n
+        if n < 2:
+            return {}
+
+        ppy = self.periods_per_year
+        vol = self._ret.std
+        cagr = (self._last / self._first) ** (ppy / n) - 1.0 if self._first else 0.0
+
+        rets = self._buf[:n]
+        k = max(int(math.floor((1.0 - self.var_level) * n)), 1)
+        tail = np.partition(rets, k - 1)[:k]
+        var = float(tail.max())
+        cvar = float(tail.mean())
+
+        return {
+            "volatility": vol * math.sqrt(ppy),
+            "sharpe": _ratio(self._ret.mean, vol, ppy),
+            "sortino": _ratio(self._ret.mean, self._down.std, ppy),
+            "cagr": cagr,
+            "max_drawdown": self._max_dd,
+            "max_dd_duration": self._max_dd_duration,
+            "calmar": cagr / abs(self._max_dd) if self._max_dd else 0.0,
+            "var": var,
+            "cvar": cvar,
+        }
+
+    def header_lines(self) -> List[str]:
+        """``# KEY,value`` lines for the backtest CSV header block."""
+        snap = self.snapshot()
+        if not snap:
+            return []
+        pct = int(round(self.var_level * 100))
+        keys = {
+            "sharpe": "SHARPE",
+            "sortino": "SORTINO",
+            "volatility": "VOLATILITY",
+            "cagr": "CAGR",
+            "max_drawdown": "MAX_DRAWDOWN",
+            "max_dd_duration": "MAX_DD_DURATION",
+            "calmar": "CALMAR",
+            "var": f"VAR_{pct}",
+            "cvar": f"CVAR_{pct}",
+        }
+        lines = []
+        for k, name in keys.items():
+            v = snap[k]
+            lines.append(f"# {name},{v}" if isinstance(v, int) else f"# {name},{v:.4f}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Rolling window
+# ---------------------------------------------------------------------------
+
+
+class RollingRisk:
+    """Volatility / Sharpe / Sortino over the last ``window`` returns, O(1) per update."""
+
+    def __init__(self, window: int, periods_per_year: int = 252) -> None:
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self._ret = _Moments()
+        self._down = _Moments()
+        self._q: deque[float] = deque()
+        self._last: Optional[float] = None
+
+    def update(self, value: float) -> Optional[Dict[str, float]]:
+        """Feed the next equity value; returns metrics once the window is full."""
+        if value is None or math.isnan(value):
+            return None
+        if self._last is None:
+            self._last = value
+            return None
+
+        r = _period_return(value, self._last)
+        self._last = value
+        if math.isnan(r):
+            return None
+        self._q.append(r)
+        self._ret.add(r)
+        if r < 0:
+            self._down.add(r)
+
+        if len(self._q) > self.window:
+            old = self._q.popleft()
+            self._ret.remove(old)
+            if old < 0:
+                self._down.remove(old)
+
+        if len(self._q) < self.window:
+            return None
+        ppy = self.periods_per_year
+        vol = self._ret.std
+        return {
+            "volatility": vol * math.sqrt(ppy),
+            "sharpe": _ratio(self._ret.mean, vol, ppy),
+            "sortino": _ratio(self._ret.mean, self._down.std, ppy),
+        }
+
+
+def rolling_risk(equity: Iterable[float], window: int, periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """Rolling volatility/Sharpe/Sortino aligned with ``equity`` (NaN until the window fills)."""
+    eq = np.asarray(equity, dtype=float)
+    out = {k: np.full(len(eq), np.nan) for k in ("volatility", "sharpe", "sortino")}
+    roll = RollingRisk(window, periods_per_year)
+    for i, v in enumerate(eq.tolist()):
+        m = roll.update(v)
+        if m:
+            for k, x in m.items():
+                out[k][i] = x
+    return out
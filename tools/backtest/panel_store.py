@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""tools/backtest/panel_store.py
+
+Memory-mapped price panels for large-universe backtests.
+
+A panel is a float32 (dates × symbols) matrix stored column-major in
+``data/panels/<name>.npy`` plus ``data/panels/<name>.json`` with the date and
+symbol index. Column-major order keeps every symbol contiguous on disk, so the
+engine's column chunks (``rebalance_equity(..., chunk=...)``) read only the
+pages they need and peak RSS stays bounded by dates × chunk.
+
+The panel is assembled from the per-symbol price cache one column at a time,
+so building it never holds the whole universe in memory either.
+
+Example:
+    python tools/backtest/panel_store.py build universe.csv 2000-01-01 2025-07-15 --name us_all
+    python tools/backtest/backtest.py universe.csv 2000-01-01 2025-07-15 monthly --panel us_all
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from engine import load_weights  # noqa: E402
+from price_cache import load_prices, read_symbol  # noqa: E402
+
+PANEL_DIR = Path("data/panels")
+FETCH_CHUNK = 200  # symbols per cache warm-up request
+
+# ---------------------------------------------------------------------------
+# Build / open
+# ---------------------------------------------------------------------------
+
+
+def build_panel(
+    name: str,
+    symbols: Iterable[str],
+    start,
+    end,
+    *,
+    offline: bool = False,
+    panel_dir: Path = PANEL_DIR,
+) -> Path:
+    """Write the float32 panel ``name`` for ``symbols`` on ``[start, end)``."""
+    symbols = list(dict.fromkeys(symbols))
+    panel_dir.mkdir(parents=True, exist_ok=True)
+
+    # 1. make sure the price cache covers the range (frames are discarded)
+    if not offline:
+        for i in range(0, len(symbols), FETCH_CHUNK):
+            load_prices(symbols[i:i + FETCH_CHUNK], start, end)
+
+    # 2. union of trading dates
+    dates = np.empty(0, dtype="datetime64[D]")
+    kept: List[str] = []
+    for sym in symbols:
+        d, _ = read_symbol(sym, start, end)
+        if len(d):
+            dates = np.union1d(dates, d)
+            kept.append(sym)
+    if not kept:
+        raise ValueError("no cached prices for the requested universe")
+
+    # 3. one column at a time into the memory-mapped matrix
+    path = panel_dir / f"{name}.npy"
+    tmp = panel_dir / f"{name}.tmp.npy"
+    panel = np.lib.format.open_memmap(
+        tmp, mode="w+", dtype=np.float32, shape=(len(dates), len(kept)), fortran_order=True
+    )
+    for j, sym in enumerate(kept):
+        d, close = read_symbol(sym, start, end)
+        col = np.full(len(dates), np.nan, dtype=np.float32)
+        col[np.searchsorted(dates, d)] = close
+        panel[:, j] = col
+    panel.flush()
+    del panel
+    os.replace(tmp, path)
+
+    meta = {
+        "dates": [str(d) for d in dates],
+        "symbols": kept,
+        "start": str(pd.Timestamp(start).date()),
+        "end": str(pd.Timestamp(end).date()),
+    }
+    with open(panel_dir / f"{name}.json", "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    return path
+
+
+def open_panel(
+    name: str, panel_dir: Path = PANEL_DIR
+) -> Tuple[np.memmap, pd.DatetimeIndex, List[str]]:
+    """Read-only memory map of a panel plus its date and symbol index."""
+    with open(panel_dir / f"{name}.json", encoding="utf-8") as fh:
+        meta = json.load(fh)
+    panel = np.load(panel_dir / f"{name}.npy", mmap_mode="r")
+    return panel, pd.DatetimeIndex(meta["dates"]), meta["symbols"]
+
+
+def active_rows(panel: np.ndarray, cols: np.ndarray, chunk: int) -> np.ndarray:
+    """Rows where at least one of ``cols`` has a price, scanned chunk by chunk."""
+    mask = np.zeros(panel.shape[0], dtype=bool)
+    for c0 in range(0, len(cols), chunk):
+        mask |= ~np.isnan(panel[:, cols[c0:c0 + chunk]]).all(axis=1)
+    return mask
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main(argv: Optional[List[str]] = None) -> None:  # noqa: D401
+    p = argparse.ArgumentParser("panel_store.py")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="build a memory-mapped panel from the price cache")
+    b.add_argument("universe", help="Symbol[,Quantity] CSV")
+    b.add_argument("start")
+    b.add_argument("end")
+    b.add_argument("--name", required=True)
+    b.add_argument("--offline", action="store_true", help="use only the local price cache")
+    args = p.parse_args(argv)
+
+    try:
+        symbols = load_weights(args.universe).index
+    except (ValueError, KeyError):
+        symbols = pd.read_csv(args.universe)["Symbol"].dropna()
+    try:
+        path = build_panel(args.name, symbols, args.start, args.end, offline=args.offline)
+    except ValueError as e:
+        sys.exit(str(e))
+    print("✔ saved →", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""tools/backtest/plotting.py
+
+Headless, deferred chart rendering for the back-testing tools.
+
+matplotlib is imported only when a chart is actually drawn and always on the
+Agg backend, so metric-only runs never pay its import cost and nothing ever
+needs a display. A chart can also be rendered by a detached worker process
+from the run's ``.npz`` (see results.py) after the CSV is already written.
+
+Example:
+    # one chart from a stored run
+    python tools/backtest/plotting.py render data/backtests/reit_2025-07-15_23-56.npz
+    # many equity curves in one multi-panel figure
+    python tools/backtest/plotting.py batch data/backtests/*.npz --out data/backtests/overview.png
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from results import load_backtest  # noqa: E402
+
+
+def pyplot():
+    """``matplotlib.pyplot`` on the Agg backend, imported on first use."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+# ---------------------------------------------------------------------------
+# Single / batch charts
+# ---------------------------------------------------------------------------
+
+
+def render_equity(series, png_path, title: str = "Backtest cumulative return") -> Path:
+    """Classic single-run chart: growth of $1 over time."""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(8, 4))
+    series.plot(ax=ax, title=title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Growth of 1$")
+    fig.savefig(png_path, bbox_inches="tight")
+    plt.close(fig)
+    return Path(png_path)
+
+
+def render_run(run_path, png_path=None) -> Path:
+    """Chart of a stored run (``.npz`` or ``.csv``); PNG goes next to it by default."""
+    run_path = Path(run_path)
+    png_path = Path(png_path) if png_path else run_path.with_suffix(".png")
+    return render_equity(load_backtest(run_path).series, png_path)
+
+
+def render_in_background(run_path, png_path, cache_key: Optional[str] = None) -> subprocess.Popen:
+    """Render ``run_path`` → ``png_path`` in a detached worker; returns immediately.
+
+    With ``cache_key`` the worker adds the finished PNG to that result-cache entry.
+    """
+    cmd = [sys.executable, str(Path(__file__).resolve()), "render", str(run_path), "--out", str(png_path)]
+    if cache_key:
+        cmd += ["--cache-key", cache_key]
+    return subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+
+def render_batch(run_paths: Sequence, png_path, ncols: int = 3) -> Path:
+    """Equity curves of many runs as one multi-panel figure (one axis per run)."""
+    plt = pyplot()
+    n = len(run_paths)
+    nrows = math.ceil(n / ncols)
+    fig, axes = plt.subplots(
+        nrows, min(n, ncols), figsize=(4 * min(n, ncols), 2.6 * nrows), squeeze=False
+    )
+    flat = axes.ravel()
+    for ax, p in zip(flat, run_paths):
+        res = load_backtest(p)
+        ax.plot(res.dates, res.equity, lw=0.9)
+        sharpe = res.metrics.get("sharpe")
+        label = Path(p).stem + (f"  (Sharpe {sharpe:.2f})" if sharpe is not None else "")
+        ax.set_title(label, fontsize=8)
+        ax.tick_params(labelsize=7)
+    for ax in flat[n:]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    fig.savefig(png_path, bbox_inches="tight", dpi=110)
+    plt.close(fig)
+    return Path(png_path)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main(argv: Optional[List[str]] = None) -> None:  # noqa: D401
+    p = argparse.ArgumentParser("plotting.py")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("render", help="chart of one stored run")
+    r.add_argument("run")
+    r.add_argument("--out")
+    r.add_argument("--cache-key", help="attach the PNG to this result_cache entry when done")
+    b = sub.add_parser("batch", help="many runs in one multi-panel figure")
+    b.add_argument("runs", nargs="+")
+    b.add_argument("--out", required=True)
+    b.add_argument("--cols", type=int, default=3)
+    args = p.parse_args(argv)
+
+    if args.cmd == "render":
+        out = render_run(args.run, args.out)
+        if args.cache_key:
+            from result_cache import attach
+
+            attach(args.cache_key, [out])
+    else:
+        out = render_batch(args.runs, args.out, args.cols)
+    print("✔ saved →", out)
+
+
+if __name__ == "__main__":
+    main()
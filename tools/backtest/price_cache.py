@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""tools/backtest/price_cache.py
+
+Local on-disk price store for the back-tester.
+
+Every symbol is kept in ``data/prices/<SYMBOL>.npy`` as a structured array
+(``date`` – datetime64[D], ``close`` – float64 auto-adjusted close) that can be
+memory-mapped. ``data/prices/index.json`` remembers which date range has
+already been requested per symbol, so holidays or pre-IPO gaps are never
+re-downloaded: Yahoo answering "no price data" for a range marks it covered.
+Only the missing head/tail of a range goes to Yahoo; a download that raises
+or fails for a symbol (network, rate limit) leaves its range uncovered.
+
+Example:
+    prices = load_prices(["PLD", "EQIX"], "2018-01-01", "2025-07-15")
+    prices = load_prices(["PLD", "EQIX"], "2018-01-01", "2025-07-15", offline=True)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data/prices")
+INDEX_FILE = "index.json"
+BAR_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", "f8")])
+
+# ---------------------------------------------------------------------------
+# Index / file helpers
+# ---------------------------------------------------------------------------
+
+
+def _read_index(cache_dir: Path) -> Dict[str, Dict[str, str]]:
+    path = cache_dir / INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_index(cache_dir: Path, index: Dict[str, Dict[str, str]]) -> None:
+    tmp = cache_dir / (INDEX_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1, sort_keys=True)
+    os.replace(tmp, cache_dir / INDEX_FILE)
+
+
+def _symbol_path(cache_dir: Path, symbol: str) -> Path:
+    # '^GSPC' / 'BRK/B' style tickers must stay valid file names
+    safe = symbol.replace("/", "_")
+    return cache_dir / f"{safe}.npy"
+
+
+def _load_symbol(cache_dir: Path, symbol: str) -> np.ndarray:
+    path = _symbol_path(cache_dir, symbol)
+    if not path.exists():
+        return np.empty(0, dtype=BAR_DTYPE)
+    return np.load(path, mmap_mode="r")
+
+
+def _store_symbol(cache_dir: Path, symbol: str, bars: np.ndarray) -> None:
+    path = _symbol_path(cache_dir, symbol)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, bars)
+    os.replace(tmp, path)
+
+
+def _merge(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Union of two bar arrays; on duplicate dates the fresh bar wins."""
+    both = np.concatenate([np.asarray(new), np.asarray(old)])
+    _, first = np.unique(both["date"], return_index=True)  # sorted by date
+    return both[first]
+
+
+def _missing_ranges(
+    cov: Optional[Dict[str, str]], start: date, end: date
+) -> List[Tuple[date, date]]:
+    """Sub-ranges of ``[start, end)`` not yet covered by ``cov``."""
+    if not cov:
+        return [(start, end)]
+    lo, hi = date.fromisoformat(cov["start"]), date.fromisoformat(cov["end"])
+    gaps: List[Tuple[date, date]] = []
+    if start < lo:
+        gaps.append((start, lo))
+    if end > hi:
+        gaps.append((hi, end))
+    return gaps
+
+
+# ---------------------------------------------------------------------------
+# Download
+# ---------------------------------------------------------------------------
+
+
+NO_DATA = ("no price data", "no data found")  # yfinance errors meaning "nothing in range"
+
+
+def _download(symbols: List[str], start: date, end: date) -> Dict[str, np.ndarray]:
+    """One ``yf.download`` call for every symbol sharing the same gap.
+
+    A symbol with no rows in the range (holidays, pre-IPO) maps to an empty
+    array; a symbol whose download failed is left out of the result.
+    """
+    import yfinance as yf  # lazy: offline runs never pay the import
+
+    raw = yf.download(
+        " ".join(symbols), start=start, end=end, auto_adjust=True, progress=False
+    )
+    # yfinance does not raise per ticker, it logs into shared._ERRORS instead
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    empty = np.empty(0, dtype=BAR_DTYPE)
+    no_data = {
+        s: empty for s in symbols
+        if s not in errors or any(m in str(errors[s]).lower() for m in NO_DATA)
+    }
+    if raw is None or raw.empty:
+        return no_data
+
+    # yfinance для нескольких тикеров возвращает MultiIndex, где уровень 0 — 'Close', 'Open' и т.д.
+    if isinstance(raw.columns, pd.MultiIndex):
+        close = raw.xs("Close", level=0, axis=1)
+    else:
+        close = raw[["Close"]].rename(columns={"Close": symbols[0]})
+
+    out: Dict[str, np.ndarray] = {}
+    for sym in symbols:
+        if sym not in close.columns:
+            if sym in no_data:
+                out[sym] = empty
+            continue
+        s = close[sym].dropna()
+        if s.empty and sym not in no_data:
+            continue
+        bars = np.empty(len(s), dtype=BAR_DTYPE)
+        bars["date"] = s.index.values.astype("datetime64[D]")
+        bars["close"] = s.to_numpy(dtype=float)
+        out[sym] = bars
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def read_symbol(
+    symbol: str, start, end, cache_dir: Path = CACHE_DIR
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cached ``(dates, close)`` arrays of one symbol on ``[start, end)``, no network."""
+    bars = _load_symbol(cache_dir, symbol)
+    lo = np.datetime64(pd.Timestamp(start).date(), "D")
+    hi = np.datetime64(pd.Timestamp(end).date(), "D")
+    a, b = np.searchsorted(bars["date"], [lo, hi])
+    return np.array(bars["date"][a:b]), np.array(bars["close"][a:b])
+
+
+def cache_version(
+    symbols: Iterable[str], start=None, end=None, cache_dir: Path = CACHE_DIR
+) -> Optional[str]:
+    """Cheap version of the cached prices of ``symbols``: coverage + file size/mtime.
+
+    Reads only ``index.json`` and file stats, never the bars. With ``start`` /
+    ``end`` returns ``None`` unless every symbol already covers ``[start, end)``
+    (a non-offline ``load_prices`` would download first and change the version).
+    """
+    index = _read_index(cache_dir)
+    h = hashlib.sha1()
+    for sym in sorted(set(symbols)):
+        cov = index.get(sym)
+        if start is not None and _missing_ranges(
+            cov, pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        ):
+            return None
+        path = _symbol_path(cache_dir, sym)
+        st = path.stat() if path.exists() else None
+        h.update(f"{sym}|{json.dumps(cov, sort_keys=True)}|"
+                 f"{st.st_size if st else 0}:{st.st_mtime_ns if st else 0}\n".encode())
+    return h.hexdigest()
+
+
+def load_prices(
+    symbols: Iterable[str],
+    start,
+    end,
+    *,
+    offline: bool = False,
+    refresh: bool = False,
+    cache_dir: Path = CACHE_DIR,
+) -> pd.DataFrame:
+    """Close prices for ``symbols`` on ``[start, end)`` read through the cache.
+
+    offline  – never touch the network, serve whatever is on disk.
+    refresh  – forget cached coverage and re-download the whole range
+               (useful after dividends re-scale the adjusted history).
+
+    Symbols without any data are left out of the returned frame.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    start_d = pd.Timestamp(start).date()
+    end_d = pd.Timestamp(end).date()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    index = _read_index(cache_dir)
+
+    if not offline:
+        # bars for today (and the future) may not exist yet → never mark them covered
+        today = date.today()
+        gaps: Dict[Tuple[date, date], List[str]] = {}
+        for sym in symbols:
+            cov = None if refresh else index.get(sym)
+            for gap in _missing_ranges(cov, start_d, end_d):
+                gaps.setdefault(gap, []).append(sym)
+
+        for (g_start, g_end), group in gaps.items():
+            logger.info("prices: fetching %s %s → %s", group, g_start, g_end)
+            try:
+                fetched = _download(group, g_start, g_end)
+            except Exception as exc:
+                logger.warning("prices: download of %s failed (%s); coverage unchanged", group, exc)
+                continue
+            for sym in group:
+                bars = fetched.get(sym)
+                if bars is None:
+                    # failed for this symbol: keep the gap open so the next run retries it
+                    logger.warning("prices: download of %s %s → %s failed; coverage unchanged",
+                                   sym, g_start, g_end)
+                    continue
+                if len(bars):
+                    _store_symbol(cache_dir, sym, _merge(_load_symbol(cache_dir, sym), bars))
+                # an empty answer is a holiday / weekend / pre-IPO range: remember it as covered
+                cov = None if refresh else index.get(sym)
+                lo = min(g_start, date.fromisoformat(cov["start"])) if cov else g_start
+                hi = max(min(g_end, today), date.fromisoformat(cov["end"])) if cov else min(g_end, today)
+                index[sym] = {"start": lo.isoformat(), "end": max(lo, hi).isoformat()}
+        if gaps:
+            _write_index(cache_dir, index)
+
+    cols: Dict[str, pd.Series] = {}
+    for sym in symbols:
+        dates, close = read_symbol(sym, start_d, end_d, cache_dir)
+        if len(dates):
+            cols[sym] = pd.Series(close, index=pd.DatetimeIndex(dates.astype("datetime64[ns]")))
+
+    if not cols:
+        return pd.DataFrame()
+    prices = pd.DataFrame(cols)
+    prices.index.name = "Date"
+    return prices.sort_index()
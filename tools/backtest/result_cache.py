@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""tools/backtest/result_cache.py
+
+Content-addressed cache of backtest artefacts.
+
+A run is identified by a SHA-1 of its inputs: portfolio weights, date range,
+rebalance frequency and the version of the price data it was computed on.
+``data/backtests/.cache_index.json`` maps that key to the CSV/NPZ/PNG files the
+run produced, so an identical request can hand back the existing artefacts
+instead of recomputing and writing new timestamped copies.
+
+The index is size-bounded: when the artefacts it references exceed
+``BACKTEST_CACHE_MAX_MB`` (default 512) the least recently used entries are
+evicted and their files deleted. Files not created through the cache (e.g. the
+sample outputs shipped with the repo) are never touched.
+
+Every read-modify-write of the index holds an exclusive lock on
+``.cache_index.lock``, so the background PNG worker (``attach``) and the
+main process (``store``) never drop each other's updates.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, last writer wins
+    fcntl = None  # type: ignore[assignment]
+
+CACHE_VERSION = 2  # bump when the output format changes
+INDEX_PATH = Path("data/backtests/.cache_index.json")
+MAX_BYTES = int(float(os.getenv("BACKTEST_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+
+def file_version(path: Path) -> str:
+    """Version of an on-disk panel: size + mtime (content hash would read it all)."""
+    st = Path(path).stat()
+    return f"{Path(path).name}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def cache_key(weights: pd.Series, start, end, freq: str, price_version: str) -> str:
+    payload = {
+        "v": CACHE_VERSION,
+        "weights": {str(k): round(float(v), 12) for k, v in sorted(weights.items())},
+        "start": str(pd.Timestamp(start).date()),
+        "end": str(pd.Timestamp(end).date()),
+        "freq": freq.lower(),
+        "prices": price_version,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+def _read(index_path: Path) -> Dict[str, Dict]:
+    if not index_path.exists():
+        return {}
+    try:
+        with open(index_path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}  # corrupt index = empty cache
+
+
+def _write(index_path: Path, index: Dict[str, Dict]) -> None:
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1)
+    os.replace(tmp, index_path)
+
+
+@contextmanager
+def _locked(index_path: Path) -> Iterator[None]:
+    """Exclusive lock around one read-modify-write of the index."""
+    if fcntl is None:
+        yield
+        return
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path.with_suffix(".lock"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)  # released when the file is closed
+        yield
+
+
+def lookup(key: str, index_path: Path = INDEX_PATH) -> Optional[List[Path]]:
+    """Artefact paths of a cached run, or ``None`` (also if a file went missing)."""
+    if key not in _read(index_path):
+        return None  # common miss: no lock, no write
+    with _locked(index_path):
+        index = _read(index_path)
+        entry = index.get(key)
+        if not entry:
+            return None
+        files = [Path(f) for f in entry["files"]]
+        if not all(f.exists() for f in files):
+            index.pop(key)
+            _write(index_path, index)
+            return None
+        entry["last_used"] = time.time()
+        _write(index_path, index)
+    return files
+
+
+def store(
+    key: str,
+    files: Iterable[Path],
+    index_path: Path = INDEX_PATH,
+    max_bytes: int = MAX_BYTES,
+) -> None:
+    """Register the artefacts of a fresh run and evict LRU entries over budget."""
+    files = [Path(f) for f in files]
+    with _locked(index_path):
+        index = _read(index_path)
+        index[key] = {
+            "files": [str(f) for f in files],
+            "bytes": sum(f.stat().st_size for f in files if f.exists()),
+            "last_used": time.time(),
+        }
+
+        total = sum(e["bytes"] for e in index.values())
+        for old_key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= max_bytes:
+                break
+            if old_key == key:
+                continue
+            entry = index.pop(old_key)
+            total -= entry["bytes"]
+            for f in entry["files"]:
+                Path(f).unlink(missing_ok=True)
+        _write(index_path, index)
+
+
+def attach(key: str, files: Iterable[Path], index_path: Path = INDEX_PATH) -> bool:
+    """Add late artefacts (e.g. a PNG rendered in the background) to a cached run.
+
+    Returns ``False`` if the entry was evicted in the meantime.
+    """
+    with _locked(index_path):
+        index = _read(index_path)
+        entry = index.get(key)
+        if not entry:
+            return False
+        for f in map(Path, files):
+            if f.exists() and str(f) not in entry["files"]:
+                entry["files"].append(str(f))
+                entry["bytes"] += f.stat().st_size
+        _write(index_path, index)
+    return True
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""tools/backtest/results.py
+
+Binary backtest result format and reader API.
+
+Next to the human-readable CSV every run writes ``<tag>.npz`` – a plain NumPy
+archive (no pickles) with typed members:
+
+    dates           datetime64[D]  equity curve dates
+    equity          float64        growth of $1
+    freq            str            rebalance frequency
+    metric_names    str[]          keys of the metrics (sharpe, sortino, …)
+    metric_values   float64[]
+    symbols         str[]          portfolio symbols
+    initial_prices  float64[]      first / last price per symbol
+    final_prices    float64[]
+
+``load_backtest(path)`` reads either format (CSV is parsed only as a
+fallback); ``scan_backtests(dir)`` builds a metrics table of every stored run
+touching only the small metadata members, not the equity curves.
+
+Example:
+    res = load_backtest("data/backtests/portfolio_reit_2025-07-15_23-56.csv")
+    res.series.plot(); res.metrics["sharpe"]
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# CSV header keys → metric names used by metrics.RiskAccumulator
+_CSV_KEYS = {
+    "SHARPE": "sharpe",
+    "SORTINO": "sortino",
+    "VOLATILITY": "volatility",
+    "CAGR": "cagr",
+    "MAX_DRAWDOWN": "max_drawdown",
+    "MAX_DD_DURATION": "max_dd_duration",
+    "CALMAR": "calmar",
+    "VAR_95": "var",
+    "CVAR_95": "cvar",
+}
+
+
+@dataclass
+class BacktestResult:
+    dates: np.ndarray
+    equity: np.ndarray
+    freq: str = ""
+    metrics: Dict[str, float] = field(default_factory=dict)
+    initial_prices: Dict[str, float] = field(default_factory=dict)
+    final_prices: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def series(self) -> pd.Series:
+        """Equity curve as a pandas Series (built on demand)."""
+        return pd.Series(self.equity, index=pd.DatetimeIndex(self.dates), name="Portfolio")
+
+
+# ---------------------------------------------------------------------------
+# Write
+# ---------------------------------------------------------------------------
+
+
+def save_backtest(path, result: BacktestResult) -> Path:
+    """Write ``result`` as an uncompressed ``.npz`` (fast to open, no pickles)."""
+    path = Path(path).with_suffix(".npz")
+    symbols = list(result.initial_prices)
+    np.savez(
+        path,
+        dates=np.asarray(result.dates, dtype="datetime64[D]"),
+        equity=np.asarray(result.equity, dtype=np.float64),
+        freq=np.array(result.freq),
+        metric_names=np.array(list(result.metrics), dtype=str),
+        metric_values=np.array(list(result.metrics.values()), dtype=np.float64),
+        symbols=np.array(symbols, dtype=str),
+        initial_prices=np.array([result.initial_prices[s] for s in symbols], dtype=np.float64),
+        final_prices=np.array([result.final_prices.get(s, np.nan) for s in symbols], dtype=np.float64),
+    )
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Read
+# ---------------------------------------------------------------------------
+
+
+def _load_npz(path: Path, with_curve: bool = True) -> BacktestResult:
+    with np.load(path, allow_pickle=False) as z:
+        symbols = [str(s) for s in z["symbols"]]
+        metrics = dict(zip((str(k) for k in z["metric_names"]), z["metric_values"].tolist()))
+        if "max_dd_duration" in metrics:
+            metrics["max_dd_duration"] = int(metrics["max_dd_duration"])
+        return BacktestResult(
+            dates=z["dates"] if with_curve else np.empty(0, dtype="datetime64[D]"),
+            equity=z["equity"] if with_curve else np.empty(0),
+            freq=str(z["freq"]),
+            metrics=metrics,
+            initial_prices=dict(zip(symbols, z["initial_prices"].tolist())),
+            final_prices=dict(zip(symbols, z["final_prices"].tolist())),
+        )
+
+
+def _parse_prices(value: str) -> Dict[str, float]:
+    out = {}
+    for item in value.split(","):
+        if ":" in item:
+            sym, p = item.rsplit(":", 1)
+            out[sym] = float(p)
+    return out
+
+
+def _load_csv(path: Path) -> BacktestResult:
+    res = BacktestResult(dates=np.empty(0, dtype="datetime64[D]"), equity=np.empty(0))
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.startswith("#"):
+                break
+            key, _, value = line[1:].strip().partition(",")
+            if key == "REBALANCE_FREQ":
+                res.freq = value
+            elif key == "INITIAL_PRICES":
+                res.initial_prices = _parse_prices(value)
+            elif key == "FINAL_PRICES":
+                res.final_prices = _parse_prices(value)
+            elif key == "MAX_DD_DURATION":
+                res.metrics["max_dd_duration"] = int(value)
+            elif key in _CSV_KEYS:
+                res.metrics[_CSV_KEYS[key]] = float(value)
+    curve = pd.read_csv(path, comment="#", index_col=0, parse_dates=True)["Portfolio"]
+    res.dates = curve.index.values.astype("datetime64[D]")
+    res.equity = curve.to_numpy(dtype=float)
+    return res
+
+
+def load_backtest(path) -> BacktestResult:
+    """Equity curve + metrics of a stored run.
+
+    Accepts the ``.npz`` or the ``.csv`` of a run; for a CSV the sibling
+    ``.npz`` is preferred when it exists.
+    """
+    path = Path(path)
+    npz = path.with_suffix(".npz")
+    if npz.exists():
+        return _load_npz(npz)
+    return _load_csv(path)
+
+
+def scan_backtests(directory="data/backtests") -> pd.DataFrame:
+    """One row of metrics per stored ``.npz`` run (equity curves are not read)."""
+    rows = []
+    for p in sorted(Path(directory).glob("*.npz")):
+        res = _load_npz(p, with_curve=False)
+        rows.append({"run": p.stem, "freq": res.freq, **res.metrics})
+    return pd.DataFrame(rows).set_index("run") if rows else pd.DataFrame()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""tools/backtest/sweep.py
+
+Parallel parameter sweep: portfolios × rebalance frequencies × date windows.
+
+The price panel for the union of all tickers is loaded once (through the
+price cache), placed into a ``multiprocessing.shared_memory`` block and
+attached read-only by every worker of a process pool – no per-task copies,
+no re-downloads. One summary CSV with Sharpe/Sortino (plus CAGR, max
+drawdown, Calmar) per combination is written to
+``data/backtests/sweep_<ts>.csv``.
+
+Example:
+    python tools/backtest/sweep.py --portfolios reit.csv tech.csv \
+        --freq monthly quarterly yearly \
+        --windows 2015-01-01:2025-01-01 2018-01-01:2025-07-15 \
+        --roll 2010-01-01:2025-07-15:5 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from engine import FREQ_MAP, load_weights, rebalance_equity, rebalance_index  # noqa: E402
+from metrics import RiskAccumulator  # noqa: E402
+from price_cache import load_prices  # noqa: E402
+
+SUMMARY_METRICS = ("sharpe", "sortino", "cagr", "max_drawdown", "calmar", "final_value")
+
+# ---------------------------------------------------------------------------
+# Shared panel (worker side)
+# ---------------------------------------------------------------------------
+
+_SHM: Optional[shared_memory.SharedMemory] = None
+_PANEL: Optional[np.ndarray] = None
+_DATES: Optional[pd.DatetimeIndex] = None
+
+
+def _attach(shm_name: str, shape: Tuple[int, int], dates: np.ndarray) -> None:
+    """Pool initializer: map the parent's panel without copying it."""
+    global _SHM, _PANEL, _DATES
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    _PANEL = np.ndarray(shape, dtype=np.float64, buffer=_SHM.buf)
+    _DATES = pd.DatetimeIndex(dates)
+
+
+def _run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    assert _PANEL is not None and _DATES is not None
+    start, end = pd.Timestamp(task["start"]), pd.Timestamp(task["end"])
+    a, b = _DATES.searchsorted([start, end])  # end exclusive, like yf.download
+    prices = _PANEL[a:b, task["cols"]]
+
+    row = {k: task[k] for k in ("portfolio", "freq", "start", "end")}
+    row.update({k: None for k in SUMMARY_METRICS})
+
+    # same data as backtest.py for this portfolio alone: drop its tickers without
+    # prices in the window and the rows where none of its own tickers trade
+    has = ~np.isnan(prices)
+    cols, rows = has.any(axis=0), has.any(axis=1)
+    if not rows.any():
+        return row
+    dates = _DATES[a:b][rows]
+    prices = prices[rows][:, cols]
+
+    rebal_idx = rebalance_index(dates, start, end, task["freq"])
+    equity = rebalance_equity(prices, task["weights"][cols], rebal_idx)
+    snap = RiskAccumulator().extend(equity).snapshot()
+    if snap:
+        valid = equity[~np.isnan(equity)]
+        snap["final_value"] = float(valid[-1])
+        row.update({k: round(snap[k], 4) for k in SUMMARY_METRICS})
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Grid
+# ---------------------------------------------------------------------------
+
+
+def _parse_windows(windows: List[str], roll: Optional[str]) -> List[Tuple[str, str]]:
+    out = []
+    for w in windows:
+        start, end = w.split(":")
+        out.append((start, end))
+    if roll:
+        # START:END:YEARS → YEARS-long windows starting every year
+        r_start, r_end, years = roll.split(":")
+        s, last = pd.Timestamp(r_start), pd.Timestamp(r_end)
+        length = pd.DateOffset(years=int(years))
+        while s + length <= last:
+            out.append((s.date().isoformat(), (s + length).date().isoformat()))
+            s += pd.DateOffset(years=1)
+    return out
+
+
+def run_sweep(
+    portfolios: List[str],
+    freqs: List[str],
+    windows: List[Tuple[str, str]],
+    workers: Optional[int] = None,
+    offline: bool = False,
+) -> List[Dict[str, Any]]:
+    """Run every combination and return one summary row per task."""
+    port_weights = {Path(p).stem: load_weights(p) for p in portfolios}
+    symbols = list(dict.fromkeys(s for w in port_weights.values() for s in w.index))
+    lo = min(pd.Timestamp(s) for s, _ in windows)
+    hi = max(pd.Timestamp(e) for _, e in windows)
+
+    prices = load_prices(symbols, lo, hi, offline=offline).dropna(how="all")
+    if prices.empty:
+        raise ValueError("no price data for the sweep universe")
+    col_of = {s: i for i, s in enumerate(prices.columns)}
+
+    tasks: List[Dict[str, Any]] = []
+    for name, w in port_weights.items():
+        missing = [t for t in w.index if t not in col_of]
+        if missing:
+            print(f"Warning: {name}: no price data for {missing}, they will be skipped")
+        w = w.drop(missing)
+        cols = np.array([col_of[t] for t in w.index], dtype=np.intp)
+        for freq in freqs:
+            for start, end in windows:
+                tasks.append({
+                    "portfolio": name, "freq": freq, "start": start, "end": end,
+                    "cols": cols, "weights": w.to_numpy(),
+                })
+
+    panel = prices.to_numpy(dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(panel.nbytes, 1))
+    try:
+        shared = np.ndarray(panel.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = panel
+        del panel
+
+        workers = workers or os.cpu_count() or 1
+        chunk = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(shm.name, shared.shape, prices.index.values),
+        ) as pool:
+            rows = list(pool.map(_run_task, tasks, chunksize=chunk))
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # noqa: D401
+    p = argparse.ArgumentParser("sweep.py")
+    p.add_argument("--portfolios", nargs="+", required=True, help="Symbol,Quantity CSV files")
+    p.add_argument("--freq", nargs="+", default=list(FREQ_MAP), choices=list(FREQ_MAP))
+    p.add_argument("--windows", nargs="*", default=[], help="START:END date pairs")
+    p.add_argument("--roll", help="START:END:YEARS – rolling windows starting every year")
+    p.add_argument("--workers", type=int, help="process pool size (default: all cores)")
+    p.add_argument("--offline", action="store_true", help="use only the local price cache")
+    args = p.parse_args()
+
+    windows = _parse_windows(args.windows, args.roll)
+    if not windows:
+        sys.exit("at least one --windows pair or --roll spec is required")
+
+    try:
+        rows = run_sweep(args.portfolios, args.freq, windows, args.workers, args.offline)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    out_dir = Path("data/backtests")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"sweep_{datetime.now():%Y-%m-%d_%H-%M}.csv"
+    with open(out, "w", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+    print("✔ saved →", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Bootstrap index generators, path statistics and seed reproducibility."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from bootstrap import (  # noqa: E402
+    _path_stats, block_indices, bootstrap, main, percentile_bands, stationary_indices,
+)
+
+
+def test_block_indices_are_wrapped_runs():
+    idx = block_indices(np.random.default_rng(0), n=50, paths=40, horizon=33, block=10)
+    assert idx.shape == (40, 33) and idx.min() >= 0 and idx.max() < 50
+    steps = np.diff(idx, axis=1) % 50
+    # inside a block every step is +1 (mod n); only block boundaries may jump
+    inside = np.ones(32, dtype=bool)
+    inside[9::10] = False
+    assert (steps[:, inside] == 1).all()
+
+
+def test_stationary_indices_mean_block_length():
+    idx = stationary_indices(np.random.default_rng(1), n=1000, paths=200, horizon=500, block=20)
+    assert idx.shape == (200, 500) and idx.min() >= 0 and idx.max() < 1000
+    jumps = (np.diff(idx, axis=1) % 1000) != 1
+    mean_len = idx.size / (jumps.sum() + len(idx))
+    assert 15 < mean_len < 25
+
+
+def test_path_stats_known_values():
+    sample = np.array([[0.1, -0.5, 0.2], [0.0, 0.0, 0.0]])
+    s = _path_stats(sample)
+    np.testing.assert_allclose(s["terminal_wealth"], [1.1 * 0.5 * 1.2, 1.0])
+    np.testing.assert_allclose(s["max_drawdown"], [-0.5, 0.0])
+    assert s["sharpe"][1] == 0.0
+
+
+def test_reproducible_and_independent_of_workers():
+    r = np.random.default_rng(3).normal(0.0005, 0.01, 400)
+    a = bootstrap(r, paths=1200, block=10, seed=7, batch=300)
+    b = bootstrap(r, paths=1200, block=10, seed=7, batch=300, workers=2)
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+    assert len(a["sharpe"]) == 1200
+    bands = percentile_bands(a)
+    assert list(bands.columns) == ["p5", "p25", "p50", "p75", "p95", "mean"]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        bootstrap(np.zeros(10), paths=10, method="iid")
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        bootstrap(np.zeros(10), paths=0)
+    with pytest.raises(ValueError):
+        bootstrap(np.zeros(10), paths=10, block=0)
+
+
+def test_cli_reports_bad_input_without_traceback(tmp_path, capsys):
+    bad = tmp_path / "bad.csv"
+    bad.write_text("Date,Other\n2024-01-02,x\n")
+    with pytest.raises(SystemExit) as e:
+        main([str(bad)])
+    assert "cannot read backtest" in str(e.value.code)
+    with pytest.raises(SystemExit) as e:
+        main([str(bad), "--paths", "0"])
+    assert e.value.code == 2 and "--paths must be >= 1" in capsys.readouterr().err
@@ -0,0 +1,67 @@
+"""Tests for the vectorised rebalancing engine against a naive per-day loop."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from engine import load_weights, rebalance_equity, rebalance_index  # noqa: E402
+
+
+def _naive(prices, weights, rebal_idx):
+    equity = np.full(len(prices), np.nan)
+    value, holdings = 1.0, None
+    for t in range(rebal_idx[0], len(prices)):
+        if t in set(rebal_idx):
+            if holdings is not None:
+                value = prices[t] @ holdings
+            holdings = value * weights / prices[t]
+        equity[t] = prices[t] @ holdings
+    return equity
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (250, 7)), axis=0))
+
+
+def test_matches_naive_loop(panel):
+    w = np.array([0.3, 0.2, 0.1, 0.1, 0.1, 0.1, 0.1])
+    idx = np.array([5, 40, 90, 170], dtype=np.intp)
+    got = rebalance_equity(panel, w, idx)
+    assert np.isnan(got[:5]).all() and got[5] == pytest.approx(1.0)
+    np.testing.assert_allclose(got[5:], _naive(panel, w, idx)[5:], rtol=1e-12)
+
+
+def test_chunked_equals_in_memory(panel):
+    w = np.array([0.5, 0.0, 0.25, 0.0, 0.25, 0.0, 0.0])
+    idx = np.array([0, 60, 120], dtype=np.intp)
+    np.testing.assert_allclose(rebalance_equity(panel, w, idx, chunk=2),
+                               rebalance_equity(panel, w, idx), rtol=1e-12)
+
+
+def test_no_rebalance_dates():
+    assert np.isnan(rebalance_equity(np.ones((3, 2)), np.array([0.5, 0.5]), np.array([], dtype=np.intp))).all()
+
+
+def test_rebalance_index_keeps_trading_days_only():
+    dates = pd.bdate_range("2024-01-01", "2024-06-30")
+    idx = rebalance_index(dates, "2024-01-02", "2024-06-30", "monthly")
+    picked = dates[idx]
+    assert picked[0] == pd.Timestamp("2024-01-02")
+    # month ends that fall on weekends (e.g. 2024-03-31) are dropped
+    assert pd.Timestamp("2024-01-31") in picked and pd.Timestamp("2024-03-31") not in picked
+    assert (np.diff(idx) > 0).all()
+
+
+def test_load_weights_normalises(tmp_path):
+    csv = tmp_path / "p.csv"
+    csv.write_text("Symbol,Quantity\nAAA,3\nBBB,1\nCCC,x\n")
+    w = load_weights(csv)
+    assert w.to_dict() == {"AAA": 0.75, "BBB": 0.25}
+    (tmp_path / "e.csv").write_text("Symbol,Quantity\n")
+    with pytest.raises(ValueError):
+        load_weights(tmp_path / "e.csv")
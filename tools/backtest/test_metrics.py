@@ -0,0 +1,62 @@
+"""Streaming risk metrics vs. straightforward pandas/numpy reference values."""
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from metrics import RiskAccumulator, rolling_risk  # noqa: E402
+
+
+@pytest.fixture
+def equity():
+    rng = np.random.default_rng(1)
+    return 100 * np.cumprod(1 + rng.normal(0.0004, 0.012, 800))
+
+
+def test_snapshot_matches_reference(equity):
+    snap = RiskAccumulator().extend(equity).snapshot()
+    r = pd.Series(equity).pct_change().dropna()
+    assert snap["volatility"] == pytest.approx(r.std() * math.sqrt(252), rel=1e-9)
+    assert snap["sharpe"] == pytest.approx(r.mean() / r.std() * math.sqrt(252), rel=1e-9)
+    assert snap["sortino"] == pytest.approx(r.mean() / r[r < 0].std() * math.sqrt(252), rel=1e-9)
+    dd = equity / np.maximum.accumulate(equity) - 1
+    assert snap["max_drawdown"] == pytest.approx(dd.min(), rel=1e-12)
+    assert snap["cagr"] == pytest.approx((equity[-1] / equity[0]) ** (252 / len(r)) - 1, rel=1e-9)
+    k = int(math.floor(0.05 * len(r)))
+    assert snap["cvar"] == pytest.approx(np.sort(r.to_numpy())[:k].mean(), rel=1e-12)
+
+
+def test_nan_is_ignored_and_short_curves_are_empty(equity):
+    with_nan = np.insert(equity, [0, 10], np.nan)
+    assert RiskAccumulator().extend(with_nan).snapshot() == RiskAccumulator().extend(equity).snapshot()
+    assert RiskAccumulator().extend([1.0, 1.1]).snapshot() == {}
+
+
+def test_drawdown_duration():
+    snap = RiskAccumulator().extend([1, 2, 1.5, 1.2, 1.8, 2.5, 2.0, 3.0]).snapshot()
+    assert snap["max_dd_duration"] == 3 and snap["max_drawdown"] == pytest.approx(-0.4)
+
+
+def test_wiped_out_portfolio():
+    snap = RiskAccumulator().extend([1.0, 0.5, 0.0, 0.0, 0.0]).snapshot()
+    assert snap["max_drawdown"] == -1.0 and snap["cagr"] == -1.0
+    assert snap["var"] == -1.0  # the drop to 0 is the last return counted
+    out = rolling_risk([1.0, 0.5, 0.0, 0.0, 0.0], window=2)
+    assert not np.isnan(out["sharpe"][2]) and np.isnan(out["sharpe"][3:]).all()
+
+
+def test_header_lines_format(equity):
+    lines = RiskAccumulator().extend(equity).header_lines()
+    assert lines[0].startswith("# SHARPE,") and "# VAR_95," in "\n".join(lines)
+
+
+def test_rolling_matches_pandas(equity):
+    out = rolling_risk(equity, window=60)
+    r = pd.Series(equity).pct_change()
+    ref = r.rolling(60).std() * math.sqrt(252)
+    np.testing.assert_allclose(out["volatility"][61:], ref.to_numpy()[61:], rtol=1e-7)
+    assert np.isnan(out["volatility"][:60]).all()
@@ -0,0 +1,74 @@
+"""Panel build/open/active_rows and the column-chunked --panel path of backtest.py."""
+import sys
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+import backtest  # noqa: E402
+import panel_store  # noqa: E402
+from panel_store import active_rows, build_panel, open_panel  # noqa: E402
+
+
+@pytest.fixture
+def universe():
+    # four weekday stocks (one listed later) plus a symbol that also trades on weekends
+    days = pd.date_range("2021-01-01", "2022-12-31", freq="D")
+    rng = np.random.default_rng(7)
+    px = pd.DataFrame(50 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(days), 5)), axis=0)),
+                      index=days, columns=["AAA", "BBB", "CCC", "DDD", "XXX"])
+    px.loc[days.dayofweek >= 5, ["AAA", "BBB", "CCC", "DDD"]] = np.nan
+    px.loc[:"2021-03-31", "DDD"] = np.nan
+    return px
+
+
+@pytest.fixture
+def panel_dir(universe, tmp_path, monkeypatch):
+    def read_symbol(sym, start, end, cache_dir=None):
+        if sym not in universe:
+            return np.empty(0, dtype="datetime64[D]"), np.empty(0)
+        s = universe[sym].loc[pd.Timestamp(start):pd.Timestamp(end) - pd.Timedelta(days=1)].dropna()
+        return s.index.values.astype("datetime64[D]"), s.to_numpy()
+
+    monkeypatch.setattr(panel_store, "read_symbol", read_symbol)
+    build_panel("test", list(universe.columns) + ["NONE"], "2021-01-01", "2023-01-01",
+                offline=True, panel_dir=tmp_path)
+    return tmp_path
+
+
+def test_build_and_open(universe, panel_dir):
+    panel, dates, symbols = open_panel("test", panel_dir)
+    assert symbols == list(universe.columns)  # symbols without prices are left out
+    assert panel.dtype == np.float32 and panel.flags.f_contiguous
+    assert len(dates) == len(universe)  # union of trading days (XXX trades daily)
+    np.testing.assert_allclose(panel[:, 0], universe["AAA"].to_numpy(dtype=np.float32))
+
+
+def test_active_rows_chunked(universe, panel_dir):
+    panel, dates, _ = open_panel("test", panel_dir)
+    cols = np.array([0, 1, 3])
+    expected = universe.iloc[:, cols].notna().any(axis=1).to_numpy()
+    for chunk in (1, 2, 8):
+        np.testing.assert_array_equal(active_rows(panel, cols, chunk), expected)
+
+
+def test_panel_run_matches_in_memory(universe, panel_dir, monkeypatch):
+    monkeypatch.setattr(backtest, "open_panel", partial(open_panel, panel_dir=panel_dir))
+    monkeypatch.setattr(backtest, "cache_version", lambda *a, **k: None)
+    monkeypatch.setattr(backtest, "load_prices", lambda symbols, start, end, **kw: universe.loc[
+        pd.Timestamp(start):pd.Timestamp(end) - pd.Timedelta(days=1), list(symbols)])
+
+    weights = pd.Series({"AAA": 0.4, "CCC": 0.35, "BBB": 0.25})
+    start, end = pd.Timestamp("2021-01-04"), pd.Timestamp("2022-12-01")
+    args = SimpleNamespace(panel="test", chunk=2, offline=True, refresh_prices=False)
+    mem, mem_first, mem_last, _ = backtest._run_in_memory(weights, start, end, "monthly", args)
+    pan, pan_first, pan_last, _ = backtest._run_from_panel(weights, start, end, "monthly", args)
+
+    assert pan.index.equals(mem.index)  # weekend rows of XXX are dropped in both
+    np.testing.assert_allclose(pan.to_numpy(), mem.to_numpy(), rtol=1e-5)  # float32 panel
+    assert pan_first == pytest.approx(mem_first, rel=1e-6)
+    assert pan_last == pytest.approx(mem_last, rel=1e-6)
@@ -0,0 +1,97 @@
+"""Offline tests for price_cache (Yahoo download is monkeypatched)."""
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+import price_cache  # noqa: E402
+from price_cache import BAR_DTYPE, _merge, _missing_ranges, load_prices  # noqa: E402
+
+
+def _bars(days, close):
+    out = np.empty(len(days), dtype=BAR_DTYPE)
+    out["date"] = np.array(days, dtype="datetime64[D]")
+    out["close"] = close
+    return out
+
+
+def test_missing_ranges_head_and_tail():
+    cov = {"start": "2024-02-01", "end": "2024-03-01"}
+    assert _missing_ranges(None, date(2024, 1, 1), date(2024, 4, 1)) == [(date(2024, 1, 1), date(2024, 4, 1))]
+    assert _missing_ranges(cov, date(2024, 1, 1), date(2024, 4, 1)) == [
+        (date(2024, 1, 1), date(2024, 2, 1)), (date(2024, 3, 1), date(2024, 4, 1))]
+    assert _missing_ranges(cov, date(2024, 2, 5), date(2024, 2, 20)) == []
+
+
+def test_merge_prefers_fresh_bars():
+    old = _bars(["2024-01-02", "2024-01-03"], [1.0, 2.0])
+    new = _bars(["2024-01-03", "2024-01-04"], [20.0, 3.0])
+    m = _merge(old, new)
+    assert list(m["close"]) == [1.0, 20.0, 3.0]
+
+
+def test_load_prices_caches_and_fetches_only_gaps(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_download(symbols, start, end):
+        calls.append((tuple(symbols), start, end))
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        return {s: _bars(days, np.arange(len(days), dtype=float)) for s in symbols}
+
+    monkeypatch.setattr(price_cache, "_download", fake_download)
+    df = load_prices(["AAA"], "2024-01-01", "2024-01-11", cache_dir=tmp_path)
+    assert len(df) == 10 and len(calls) == 1
+    load_prices(["AAA"], "2024-01-03", "2024-01-08", cache_dir=tmp_path)
+    assert len(calls) == 1  # fully covered
+    load_prices(["AAA"], "2024-01-01", "2024-01-15", cache_dir=tmp_path)
+    assert calls[-1][1:] == (date(2024, 1, 11), date(2024, 1, 15))
+
+
+def test_failed_download_keeps_gap_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_cache, "_download", lambda *a: {})  # symbol failed
+    assert load_prices(["AAA"], "2024-01-01", "2024-01-11", cache_dir=tmp_path).empty
+    assert "AAA" not in price_cache._read_index(tmp_path)
+
+    def boom(*a):
+        raise ConnectionError("yahoo down")
+
+    monkeypatch.setattr(price_cache, "_download", boom)
+    assert load_prices(["AAA"], "2024-01-01", "2024-01-11", cache_dir=tmp_path).empty
+    assert "AAA" not in price_cache._read_index(tmp_path)
+
+
+def test_empty_answer_is_covered(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_download(symbols, start, end):
+        calls.append((start, end))
+        if start < date(2024, 1, 8):  # pre-IPO head, then a weekend-only tail
+            return {s: np.empty(0, dtype=BAR_DTYPE) for s in symbols}
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        return {s: _bars(days, np.ones(len(days))) for s in symbols}
+
+    monkeypatch.setattr(price_cache, "_download", fake_download)
+    load_prices(["AAA"], "2024-01-08", "2024-01-13", cache_dir=tmp_path)
+    load_prices(["AAA"], "2024-01-01", "2024-01-13", cache_dir=tmp_path)
+    assert price_cache._read_index(tmp_path)["AAA"] == {"start": "2024-01-01", "end": "2024-01-13"}
+    n = len(calls)
+    load_prices(["AAA"], "2024-01-01", "2024-01-13", cache_dir=tmp_path)
+    assert len(calls) == n  # the empty head is not asked for again
+    assert price_cache.cache_version(["AAA"], "2024-01-01", "2024-01-13", tmp_path)
+
+
+def test_cache_version_needs_coverage_and_tracks_files(tmp_path, monkeypatch):
+    def fake_download(symbols, start, end):
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        return {s: _bars(days, np.ones(len(days))) for s in symbols}
+
+    monkeypatch.setattr(price_cache, "_download", fake_download)
+    assert price_cache.cache_version(["AAA"], "2024-01-01", "2024-01-11", tmp_path) is None
+    load_prices(["AAA"], "2024-01-01", "2024-01-11", cache_dir=tmp_path)
+    v = price_cache.cache_version(["AAA"], "2024-01-01", "2024-01-11", tmp_path)
+    assert v == price_cache.cache_version(["AAA"], cache_dir=tmp_path)
+    assert price_cache.cache_version(["AAA"], "2024-01-01", "2024-01-20", tmp_path) is None
+    load_prices(["AAA"], "2024-01-01", "2024-01-20", cache_dir=tmp_path)
+    assert price_cache.cache_version(["AAA"], "2024-01-01", "2024-01-11", tmp_path) != v
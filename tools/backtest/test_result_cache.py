@@ -0,0 +1,72 @@
+"""Tests for the backtest result cache index (lookup / store / attach / eviction)."""
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from result_cache import attach, cache_key, lookup, store  # noqa: E402
+
+
+def _files(tmp_path, tag, size=10):
+    out = []
+    for ext in (".csv", ".npz"):
+        f = tmp_path / f"{tag}{ext}"
+        f.write_bytes(b"x" * size)
+        out.append(f)
+    return out
+
+
+def test_key_depends_on_inputs():
+    w = pd.Series({"AAA": 0.5, "BBB": 0.5})
+    k = cache_key(w, "2024-01-01", "2024-06-01", "Monthly", "v1")
+    assert k == cache_key(w[::-1], "2024-01-01", "2024-06-01", "monthly", "v1")
+    assert k != cache_key(w, "2024-01-01", "2024-06-01", "monthly", "v2")
+
+
+def test_attach_adds_late_png(tmp_path):
+    index = tmp_path / "index.json"
+    files = _files(tmp_path, "run")
+    store("k", files, index_path=index)
+    png = tmp_path / "run.png"
+    assert attach("k", [png], index_path=index)  # not rendered yet: ignored
+    assert lookup("k", index_path=index) == files
+    png.write_bytes(b"png")
+    assert attach("k", [png], index_path=index)
+    assert lookup("k", index_path=index) == [*files, png]
+    assert not attach("gone", [png], index_path=index)
+
+
+def test_missing_file_drops_entry_and_lru_eviction(tmp_path):
+    index = tmp_path / "index.json"
+    old = _files(tmp_path, "old")
+    store("old", old, index_path=index, max_bytes=50)
+    old[0].unlink()
+    assert lookup("old", index_path=index) is None
+
+    a = _files(tmp_path, "a")
+    store("a", a, index_path=index, max_bytes=30)
+    store("b", _files(tmp_path, "b"), index_path=index, max_bytes=30)
+    assert lookup("a", index_path=index) is None and not a[0].exists()
+    assert lookup("b", index_path=index) is not None
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path):
+    index = tmp_path / "index.json"
+    files = {k: _files(tmp_path, k, size=1) for k in "abcdefgh"}
+    store("a", files["a"], index_path=index)
+
+    def work(k):
+        for _ in range(25):
+            if k == "a":
+                attach("a", files["a"], index_path=index)  # the background PNG worker
+            else:
+                store(k, files[k], index_path=index)
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in files]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(lookup(k, index_path=index) == files[k] for k in files)
@@ -0,0 +1,64 @@
+"""Round-trip tests for the .npz result format and the CSV fallback reader."""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from results import BacktestResult, load_backtest, save_backtest, scan_backtests  # noqa: E402
+
+
+def _result():
+    return BacktestResult(
+        dates=np.array(["2024-01-02", "2024-01-03", "2024-01-04"], dtype="datetime64[D]"),
+        equity=np.array([1.0, 1.05, 0.98]),
+        freq="monthly",
+        metrics={"sharpe": 1.25, "max_drawdown": -0.0667, "max_dd_duration": 1},
+        initial_prices={"AAA": 10.0, "BBB": 20.0},
+        final_prices={"AAA": 11.0, "BBB": 19.5},
+    )
+
+
+def test_npz_round_trip(tmp_path):
+    path = save_backtest(tmp_path / "run.csv", _result())
+    assert path.suffix == ".npz"
+    res = load_backtest(path)
+    ref = _result()
+    np.testing.assert_array_equal(res.dates, ref.dates)
+    np.testing.assert_allclose(res.equity, ref.equity)
+    assert res.freq == "monthly"
+    assert res.metrics == ref.metrics and isinstance(res.metrics["max_dd_duration"], int)
+    assert res.initial_prices == ref.initial_prices and res.final_prices == ref.final_prices
+    assert res.series.name == "Portfolio" and len(res.series) == 3
+
+
+def test_csv_fallback_and_npz_preferred(tmp_path):
+    csv = tmp_path / "run.csv"
+    csv.write_text(
+        "# REBALANCE_FREQ,yearly\n"
+        "# INITIAL_PRICES,AAA:10.0000,BRK/B:300.5000\n"
+        "# FINAL_PRICES,AAA:12.0000,BRK/B:310.0000\n"
+        "# SHARPE,0.8\n"
+        "# MAX_DD_DURATION,4\n"
+        "Date,Portfolio\n2024-01-02,1.0\n2024-01-03,1.1\n",
+        encoding="utf-8",
+    )
+    res = load_backtest(csv)
+    assert res.freq == "yearly"
+    assert res.initial_prices == {"AAA": 10.0, "BRK/B": 300.5}
+    assert res.metrics == {"sharpe": 0.8, "max_dd_duration": 4}
+    np.testing.assert_allclose(res.equity, [1.0, 1.1])
+
+    save_backtest(tmp_path / "run.npz", _result())
+    assert load_backtest(csv).freq == "monthly"  # sibling .npz wins
+
+
+def test_scan_backtests_reads_metadata_only(tmp_path):
+    save_backtest(tmp_path / "a.npz", _result())
+    save_backtest(tmp_path / "b.npz", BacktestResult(
+        dates=np.empty(0, dtype="datetime64[D]"), equity=np.empty(0), freq="yearly",
+        metrics={"sharpe": 0.5}, initial_prices={"AAA": 1.0}))
+    table = scan_backtests(tmp_path)
+    assert list(table.index) == ["a", "b"]
+    assert table.loc["b", "freq"] == "yearly" and table.loc["a", "sharpe"] == 1.25
+    assert scan_backtests(tmp_path / "missing").empty
@@ -0,0 +1,63 @@
+"""Sweep rows must equal a standalone backtest.py run of the same portfolio."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+import backtest  # noqa: E402
+import sweep  # noqa: E402
+from engine import load_weights  # noqa: E402
+from metrics import RiskAccumulator  # noqa: E402
+
+
+@pytest.fixture
+def universe():
+    # AAA and BBB trade on weekdays, BBB lists later; CCC (crypto-like) trades every day
+    days = pd.date_range("2019-01-01", "2021-12-31", freq="D")
+    rng = np.random.default_rng(1)
+    px = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(days), 3)), axis=0)),
+                      index=days, columns=["AAA", "BBB", "CCC"])
+    px.loc[days.dayofweek >= 5, ["AAA", "BBB"]] = np.nan
+    px.loc[:"2019-06-30", "BBB"] = np.nan
+    return px
+
+
+def _fake_load_prices(universe):
+    def load(symbols, start, end, **kw):  # what price_cache would serve
+        df = universe.loc[pd.Timestamp(start):pd.Timestamp(end) - pd.Timedelta(days=1), list(symbols)]
+        return df.dropna(axis=1, how="all")
+    return load
+
+
+def test_sweep_matches_standalone_backtest(universe, tmp_path, monkeypatch):
+    pd.DataFrame({"Symbol": ["AAA", "BBB"], "Quantity": [1, 1]}).to_csv(tmp_path / "stocks.csv", index=False)
+    pd.DataFrame({"Symbol": ["BBB", "CCC"], "Quantity": [1, 3]}).to_csv(tmp_path / "mixed.csv", index=False)
+    monkeypatch.setattr(sweep, "load_prices", _fake_load_prices(universe))
+    monkeypatch.setattr(backtest, "load_prices", _fake_load_prices(universe))
+    monkeypatch.setattr(backtest, "cache_version", lambda *a, **k: None)
+
+    files = [str(tmp_path / "stocks.csv"), str(tmp_path / "mixed.csv")]
+    windows = [("2019-01-01", "2021-12-31"), ("2019-08-01", "2021-06-01"), ("2020-03-02", "2021-12-31")]
+    rows = sweep.run_sweep(files, ["monthly", "quarterly"], windows, workers=1)
+    assert len(rows) == 12
+
+    args = SimpleNamespace(offline=True, refresh_prices=False)
+    compared = 0
+    for row in rows:
+        w = load_weights(tmp_path / f"{row['portfolio']}.csv")
+        start, end = pd.Timestamp(row["start"]), pd.Timestamp(row["end"])
+        portfolio, *_ = backtest._run_in_memory(w, start, end, row["freq"], args)
+        equity = portfolio.to_numpy()
+        snap = RiskAccumulator().extend(equity).snapshot()
+        if not snap:  # a holding without a price on the start date: no curve in either tool
+            assert row["sharpe"] is None, row
+            continue
+        compared += 1
+        for k in ("sharpe", "sortino", "cagr", "max_drawdown", "calmar"):
+            assert row[k] == pytest.approx(snap[k], abs=1e-4), (row, k)
+        assert row["final_value"] == pytest.approx(equity[~np.isnan(equity)][-1], abs=1e-4)
+    assert compared == 8
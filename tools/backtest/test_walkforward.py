@@ -0,0 +1,45 @@
+"""Incremental window statistics vs. recomputing every window from scratch."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from metrics import RiskAccumulator  # noqa: E402
+from walkforward import _DrawdownQueue, rolling_windows  # noqa: E402
+
+
+@pytest.fixture
+def equity():
+    rng = np.random.default_rng(2)
+    return 100 * np.cumprod(1 + rng.normal(0.0003, 0.015, 600))
+
+
+@pytest.mark.parametrize("step", [1, 7])
+def test_windows_match_full_recompute(equity, step):
+    window = 120
+    stats = rolling_windows(equity, window, step)
+    assert len(stats["start"]) == len(range(0, len(equity) - 1 - window + 1, step))
+    for i in range(0, len(stats["start"]), 13):
+        s, e = stats["start"][i], stats["end"][i]
+        ref = RiskAccumulator().extend(equity[s:e + 1]).snapshot()
+        for key in ("volatility", "sharpe", "sortino", "max_drawdown", "cagr"):
+            assert stats[key][i] == pytest.approx(ref[key], rel=1e-7, abs=1e-12), key
+
+
+def test_drawdown_queue_fifo():
+    values = [5, 7, 3, 6, 2, 8, 4]
+    q = _DrawdownQueue()
+    for v in values[:4]:
+        q.push(v)
+    assert q.max_drawdown() == pytest.approx(3 / 7 - 1)
+    q.pop(); q.pop()                      # window now [3, 6]
+    assert q.max_drawdown() == 0.0
+    for v in values[4:]:
+        q.push(v)                         # [3, 6, 2, 8, 4]
+    assert q.max_drawdown() == pytest.approx(2 / 6 - 1)
+
+
+def test_too_short_curve():
+    assert rolling_windows(np.ones(10), window=20) == {}
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""tools/backtest/walkforward.py
+
+Walk-forward / rolling-window view of a rebalanced portfolio.
+
+The equity curve is built once for the whole period (engine.py), then an
+N-year window slides over it. Window statistics are updated incrementally
+instead of being recomputed from scratch:
+
+* return, volatility, Sharpe and Sortino come from prefix sums of daily
+  returns, squared returns and their downside parts – O(1) per window;
+* max drawdown uses a two-stack aggregating queue whose elements carry
+  (max, min, drawdown) summaries – amortised O(1) per slide.
+
+Example:
+    python tools/backtest/walkforward.py portfolio.csv 2005-01-01 2025-07-15 monthly --years 5
+    python tools/backtest/walkforward.py portfolio.csv 2005-01-01 2025-07-15 yearly --years 3 --step 21
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from engine import FREQ_MAP, load_weights, rebalance_equity, rebalance_index  # noqa: E402
+from plotting import pyplot  # noqa: E402
+from price_cache import load_prices  # noqa: E402
+
+PERIODS_PER_YEAR = 252
+
+# ---------------------------------------------------------------------------
+# Sliding max drawdown
+# ---------------------------------------------------------------------------
+
+# summary of a contiguous run of equity values: (max, min, max drawdown ≤ 0)
+_Agg = Tuple[float, float, float]
+_EMPTY: _Agg = (-np.inf, np.inf, 0.0)
+
+
+def _combine(a: _Agg, b: _Agg) -> _Agg:
+    """Summary of run ``a`` followed by run ``b``."""
+    if a is _EMPTY:
+        return b
+    if b is _EMPTY:
+        return a
+    cross = b[1] / a[0] - 1.0  # peak in a, trough in b
+    return max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2], cross)
+
+
+class _DrawdownQueue:
+    """FIFO of equity values answering "max drawdown of the window" in O(1)."""
+
+    def __init__(self) -> None:
+        self._front: List[_Agg] = []  # suffix summaries, top = oldest element
+        self._back: List[float] = []
+        self._back_agg: _Agg = _EMPTY
+
+    def push(self, v: float) -> None:
+        self._back.append(v)
+        self._back_agg = _combine(self._back_agg, (v, v, 0.0))
+
+    def pop(self) -> None:
+        if not self._front:
+            while self._back:
+                v = self._back.pop()
+                below = self._front[-1] if self._front else _EMPTY
+                self._front.append(_combine((v, v, 0.0), below))
+            self._back_agg = _EMPTY
+        self._front.pop()
+
+    def max_drawdown(self) -> float:
+        front = self._front[-1] if self._front else _EMPTY
+        return _combine(front, self._back_agg)[2]
+
+
+# ---------------------------------------------------------------------------
+# Window statistics
+# ---------------------------------------------------------------------------
+
+
+def rolling_windows(
+    equity: np.ndarray, window: int, step: int = 1
+) -> dict[str, np.ndarray]:
+    """Statistics of every ``window``-return slice of ``equity``.
+
+    Returns arrays keyed by ``start``/``end`` (row positions into ``equity``)
+    and ``cagr``, ``volatility``, ``sharpe``, ``sortino``, ``max_drawdown``.
+    """
+    eq = np.asarray(equity, dtype=float)
+    n_ret = len(eq) - 1
+    if n_ret < window:
+        return {}
+
+    ret = eq[1:] / eq[:-1] - 1.0
+    down = np.minimum(ret, 0.0)
+    is_down = (ret < 0).astype(float)
+    # centre before squaring: keeps prefix-sum variance numerically stable
+    c = ret - ret.mean()
+
+    def _prefix(x: np.ndarray) -> np.ndarray:
+        return np.concatenate(([0.0], np.cumsum(x)))
+
+    p_c, p_c2 = _prefix(c), _prefix(c * c)
+    p_d, p_d2, p_dn = _prefix(down), _prefix(down * down), _prefix(is_down)
+
+    starts = np.arange(0, n_ret - window + 1, step)
+    ends = starts + window
+
+    def _win(p: np.ndarray) -> np.ndarray:
+        return p[ends] - p[starts]
+
+    n = float(window)
+    s_c, s_c2 = _win(p_c), _win(p_c2)
+    mean = s_c / n + ret.mean()
+    var = np.maximum(s_c2 - s_c * s_c / n, 0.0) / (n - 1)
+    vol = np.sqrt(var)
+
+    # downside: sample std over the negative returns only (same as metrics.py)
+    k, s_d, s_d2 = _win(p_dn), _win(p_d), _win(p_d2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d_var = np.where(k > 1, np.maximum(s_d2 - s_d * s_d / k, 0.0) / (k - 1), 0.0)
+        d_std = np.sqrt(d_var)
+        ann = np.sqrt(PERIODS_PER_YEAR)
+        sharpe = np.where(vol > 0, mean / vol * ann, 0.0)
+        sortino = np.where(d_std > 0, mean / d_std * ann, 0.0)
+        cagr = (eq[ends] / eq[starts]) ** (PERIODS_PER_YEAR / n) - 1.0
+
+    mdd = np.empty(len(starts))
+    q = _DrawdownQueue()
+    head = tail = 0  # equity rows [head, tail) currently in the queue
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        while tail <= e:
+            q.push(eq[tail])
+            tail += 1
+        while head < s:
+            q.pop()
+            head += 1
+        mdd[i] = q.max_drawdown()
+
+    return {
+        "start": starts,
+        "end": ends,
+        "cagr": cagr,
+        "volatility": vol * ann,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "max_drawdown": mdd,
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser("walkforward.py")
+    p.add_argument("portfolio")
+    p.add_argument("start")
+    p.add_argument("end")
+    p.add_argument("freq", choices=list(FREQ_MAP))
+    p.add_argument("--years", type=float, default=5, help="window length in years")
+    p.add_argument("--step", type=int, default=1, help="slide step in trading days")
+    p.add_argument("--offline", action="store_true", help="use only the local price cache")
+    p.add_argument("--no-plot", action="store_true", help="table only, no stability chart")
+    return p.parse_args(argv)
+
+
+def main() -> None:  # noqa: D401
+    args = _parse_args()
+    start_dt, end_dt = pd.to_datetime(args.start), pd.to_datetime(args.end)
+
+    try:
+        weights = load_weights(args.portfolio)
+    except ValueError:
+        sys.exit("portfolio.csv is empty or invalid")
+
+    prices = load_prices(weights.index, start_dt, end_dt, offline=args.offline).dropna(how="all")
+    if prices.empty:
+        sys.exit("no price data (offline cache empty?)")
+    missing = [t for t in weights.index if t not in prices.columns]
+    if missing:
+        print(f"Warning: no price data for {missing}, they will be skipped")
+        weights = weights.drop(missing)
+    prices = prices[weights.index]
+
+    rebal_idx = rebalance_index(prices.index, start_dt, end_dt, args.freq)
+    equity = rebalance_equity(prices.to_numpy(dtype=float), weights.to_numpy(), rebal_idx)
+    valid = ~np.isnan(equity)
+    equity, dates = equity[valid], prices.index[valid]
+
+    window = int(round(args.years * PERIODS_PER_YEAR))
+    stats = rolling_windows(equity, window, args.step)
+    if not stats:
+        sys.exit(f"period is shorter than one {args.years}-year window")
+
+    table = pd.DataFrame({
+        "start": dates[stats.pop("start")],
+        "end": dates[stats.pop("end")],
+        **stats,
+    })
+
+    out_dir = Path("data/backtests")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tag = f"{Path(args.portfolio).stem}_wf{args.years:g}y_{datetime.now():%Y-%m-%d_%H-%M}"
+
+    csv_path = out_dir / f"{tag}.csv"
+    with open(csv_path, "w", newline="") as fh:
+        fh.write(f"# REBALANCE_FREQ,{args.freq}\n")
+        fh.write(f"# WINDOW_YEARS,{args.years:g}\n")
+        fh.write(f"# WINDOWS,{len(table)}\n")
+        table.to_csv(fh, index=False, float_format="%.6f")
+
+    if args.no_plot:
+        print("✔ saved →", csv_path)
+        return
+
+    plt = pyplot()
+    fig, axes = plt.subplots(3, 1, figsize=(8, 7), sharex=True)
+    for ax, col, label in zip(
+        axes, ("cagr", "sharpe", "max_drawdown"), ("CAGR", "Sharpe", "Max drawdown")
+    ):
+        ax.plot(table["start"], table[col])
+        ax.axhline(table[col].median(), color="grey", lw=0.8, ls="--")
+        ax.set_ylabel(label)
+    axes[0].set_title(f"Rolling {args.years:g}-year windows (by window start)")
+    axes[-1].set_xlabel("Window start")
+    png_path = out_dir / f"{tag}.png"
+    fig.savefig(png_path, bbox_inches="tight")
+    plt.close(fig)
+
+    print("✔ saved →", png_path)
+
+
+if __name__ == "__main__":
+    main()
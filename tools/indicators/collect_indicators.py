@@ -3,16 +3,22 @@
 Инструмент для сбора ключевых макро‑/ликвидити‑индикаторов.
 Источники: TWS, FRED, Treasury FiscalData, CoinGecko.
 
-Версия v0.4 – фикс масштабов, сортировки и sentinel‑значений.
+Версия v0.5 – конкурентный сбор: все HTTP‑выборки параллельно,
+таймауты по источникам, частичные результаты.
 """
 
 import os
 import sys
 import json
+import time
 import argparse
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, List, Tuple
 
 # ------------------------------------------------------------------ #
 # 1.  I M P O R T S   &   E N V
@@ -27,14 +33,21 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 try:
     from ib_insync import IB, Index, Stock
-    import requests
     from fredapi import Fred
-    from pycoingecko import CoinGeckoAPI
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
     print("Установите зависимости: pip install -r requirements.txt")
     sys.exit(1)
 
+from tools.IBRK.ib_session import IBSession  # noqa: E402
+
+sys.path.append(os.path.dirname(__file__))
+from fred_cache import FredCache  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+from crypto_basket import CryptoBasket  # noqa: E402
+from indicator_store import DB_PATH, IndicatorStore  # noqa: E402
+from derived import DerivedGraph, flatten  # noqa: E402
+
 # ------------------------------------------------------------------ #
 # 2.  L O G G I N G
 # ------------------------------------------------------------------ #
@@ -45,6 +58,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _tick_ok(x: Optional[float]) -> bool:
+    """TWS шлёт -1 / NaN вместо отсутствующей цены."""
+    return x is not None and x == x and x != -1
+
+
 # ------------------------------------------------------------------ #
 # 3.  C L A S S
 # ------------------------------------------------------------------ #
@@ -56,8 +74,26 @@ class IndicatorCollector:
       • крипто (BTC price & dominance)
     """
 
+    FRED_SERIES: Dict[str, str] = {
+        "m2_money_stock": "M2SL",
+        "fed_balance_sheet": "WALCL",
+        "federal_debt": "GFDEBTN",
+        "gdp": "GDP",
+        "dxy_fred": "DTWEXBGS",  # FRED DXY (Broad Dollar Index)
+        "ust_10y_fred": "DGS10",
+        "ust_2y_fred": "DGS2",
+        "breakeven_10y": "T10YIE",
+    }
+
+    # дедлайн каждого источника, сек от старта сбора
+    SOURCE_TIMEOUTS: Dict[str, float] = {"fred": 30.0, "treasury": 20.0, "coingecko": 15.0}
+    MAX_WORKERS = 8
+    TWS_TIMEOUT = 3.0  # ожидание тиков по всем контрактам сразу
+    # базовый URL – переопределяется в replay.py на локальный stand‑in сервер
+    TREASURY_API = "https://api.fiscaldata.treasury.gov/services/api/fiscal_service"
+
     # --- init ------------------------------------------------------ #
-    def __init__(self) -> None:
+    def __init__(self, refresh_fred: bool = False) -> None:
         # 3.1  единицы измерения  ---------------------------------- #
         # приводим всё к миллиардам $, проценты – как есть
         self.unit_scale: dict[str, float] = {
@@ -69,17 +105,24 @@ class IndicatorCollector:
         }
 
         # 3.2  внешние клиенты  ------------------------------------ #
+        # clientId берётся из пула IB_CLIENT_IDS под lock‑файлом (ib_session.py),
+        # так что сборщик, демон и ibrkctl не выбивают друг друга из TWS
         self.ib: IB = IB()
+        self.tws = IBSession(ib=self.ib, market_data_type=4)  # delayed‑frozen
 
         fred_key = os.getenv("FRED_API_KEY")
         if fred_key:
             self.fred = Fred(api_key=fred_key)
+            self.fred_cache: Optional[FredCache] = FredCache(self.fred, refresh=refresh_fred)
             logger.info("FRED API подключен")
         else:
             self.fred = None
+            self.fred_cache = None
             logger.warning("FRED_API_KEY не найден")
 
-        self.cg = CoinGeckoAPI()
+        # Treasury и CoinGecko: общий пул соединений, повторы, лимиты, ETag
+        self.http = HttpClient()
+        self.cg = CryptoBasket(self.http)
 
         # 3.3  контейнер данных  ----------------------------------- #
         self.data: Dict[str, Any] = {
@@ -87,21 +130,25 @@ class IndicatorCollector:
             "indicators": {"liquidity": {}, "macro": {}, "crypto": {}, "risk": {}},
         }
 
+        # 3.4  производные: граф; z‑score прогревается историей лениво,
+        #      при первом пересчёте и только если база уже есть (None – без прогрева)
+        self.derived = DerivedGraph()
+        self.history_db: Optional[Path] = DB_PATH
+        self._seeded = False
+
     # ------------------------------------------------------------------ #
     # 4.  H E L P E R S
     # ------------------------------------------------------------------ #
     def fred_last(self, series_id: str) -> tuple[float, str]:
         """
         Возвращает (значение, дата) последней опубликованной точки
-        с учётом масштабирования unit_scale.
+        с учётом масштабирования unit_scale. Наблюдения берутся из
+        локального кэша (fred_cache.py), в сеть – только за новыми.
         """
-        s = self.fred.get_series_latest_release(series_id)
-        val = float(s.iloc[-1]) * self.unit_scale.get(series_id, 1)
-        date = s.index[-1].strftime("%Y-%m-%d")
-        return val, date
+        raw, date = self.fred_cache.latest(series_id)
+        return raw * self.unit_scale.get(series_id, 1), date
 
-    @staticmethod
-    def _latest_row(url: str, filt: str) -> dict:
+    def _latest_row(self, url: str, filt: str) -> dict:
         """Берём последнюю строку (record_date DESC) с заданным фильтром."""
         params = {
             "filter": filt,
@@ -109,9 +156,7 @@ class IndicatorCollector:
             "page[size]": 1,
             "format": "json",
         }
-        r = requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()["data"]
+        data = self.http.get_json(url, params=params, timeout=10)["data"]
         if not data:
             raise ValueError("No data returned from Treasury API")
         return data[0]
@@ -121,9 +166,8 @@ class IndicatorCollector:
     # ------------------------------------------------------------------ #
     def connect_tws(self) -> bool:
         try:
-            self.ib.connect("127.0.0.1", 7496, clientId=1)
-            self.ib.reqMarketDataType(4)  # delayed‑frozen
-            logger.info("Подключен к TWS")
+            self.tws.get()  # IB_HOST / IB_PORT, свободный clientId из пула
+            logger.info(f"Подключен к TWS (clientId {self.tws.client_id})")
             return True
         except Exception as e:
             logger.error(f"TWS connect: {e}")
@@ -131,8 +175,8 @@ class IndicatorCollector:
 
     def disconnect_tws(self) -> None:
         if self.ib.isConnected():
-            self.ib.disconnect()
             logger.info("TWS отключён")
+        self.tws.close()  # заодно освобождает clientId
 
     def get_tws_indicators(self) -> Dict[str, Any]:
         """UST yields, DXY, VIX, GLD, BITO через TWS."""
@@ -150,52 +194,72 @@ class IndicatorCollector:
 
         ind: Dict[str, Any] = {}
 
+        # 5.1  одна квалификация на весь список  ------------------- #
+        try:
+            self.ib.qualifyContracts(*contracts.values())
+        except Exception as e:
+            logger.error(f"TWS qualify: {e}")
+        for name, c in contracts.items():
+            if not c.conId:
+                logger.error(f"TWS {name}: контракт не найден")
+                ind[name] = {"status": "error", "source": "tws"}
+
+        # 5.2  подписка сразу на все, ждём события до дедлайна  ---- #
+        tickers = {}
         for name, c in contracts.items():
+            if name in ind:
+                continue
             try:
-                self.ib.qualifyContracts(c)
-                t = self.ib.reqMktData(c, "", False, False)
-                self.ib.sleep(0.5)
-
-                price = None if (t.last is None or t.last == -1) else t.last
-                if price is not None and name.startswith("ust_"):
-                    price = price / 10  # TYX/TNX scale fix
-
-                ind[name] = {
-                    "value": price,
-                    "status": "ok" if price is not None else "no_data",
-                    "source": "tws",
-                    "bid": None if t.bid == -1 else t.bid,
-                    "ask": None if t.ask == -1 else t.ask,
-                }
-
-                self.ib.cancelMktData(c)
+                tickers[name] = self.ib.reqMktData(c, "", False, False)
             except Exception as e:
                 logger.error(f"TWS {name}: {e}")
                 ind[name] = {"status": "error", "source": "tws"}
 
-        return ind
+        deadline = time.monotonic() + self.TWS_TIMEOUT
+        pending = set(tickers)
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            self.ib.waitOnUpdate(timeout=left)
+            pending = {n for n in pending if not _tick_ok(tickers[n].last)}
+
+        # 5.3  снимок и отписка  ------------------------------------ #
+        for name, t in tickers.items():
+            price = t.last if _tick_ok(t.last) else None
+            if price is not None and name.startswith("ust_"):
+                price = price / 10  # TYX/TNX scale fix
+
+            ind[name] = {
+                "value": price,
+                "status": "ok" if price is not None else "no_data",
+                "source": "tws",
+                "bid": t.bid if _tick_ok(t.bid) else None,
+                "ask": t.ask if _tick_ok(t.ask) else None,
+            }
+            try:
+                self.ib.cancelMktData(contracts[name])
+            except Exception as e:
+                logger.error(f"TWS cancel {name}: {e}")
+
+        return {name: ind[name] for name in contracts}
 
     # ------------------------------------------------------------------ #
     # 6.  F R E D
     # ------------------------------------------------------------------ #
+    def _fred_entry(self, series_id: str) -> Dict[str, Any]:
+        val, d = self.fred_last(series_id)
+        return {"value": val, "date": d, "status": "ok", "source": "fred"}
+
     def get_fred_indicators(self) -> Dict[str, Any]:
         if not self.fred:
             return {}
 
-        series_map = {
-            "m2_money_stock": "M2SL",
-            "fed_balance_sheet": "WALCL",
-            "federal_debt": "GFDEBTN",
-            "gdp": "GDP",
-            "dxy_fred": "DTWEXBGS",  # FRED DXY (Broad Dollar Index)
-        }
-
         ind: Dict[str, Any] = {}
 
-        for name, sid in series_map.items():
+        for name, sid in self.FRED_SERIES.items():
             try:
-                val, d = self.fred_last(sid)
-                ind[name] = {"value": val, "date": d, "status": "ok", "source": "fred"}
+                ind[name] = self._fred_entry(sid)
             except Exception as e:
                 logger.error(f"FRED {sid}: {e}")
                 ind[name] = {"status": "error", "source": "fred"}
@@ -205,16 +269,13 @@ class IndicatorCollector:
     # ------------------------------------------------------------------ #
     # 7.  T R E A S U R Y
     # ------------------------------------------------------------------ #
-    def get_treasury_indicators(self) -> Dict[str, Any]:
-        ind: Dict[str, Any] = {}
-
+    def _tga_entry(self) -> Dict[str, Any]:
         # 7.1  TGA
         try:
-            url = ("https://api.fiscaldata.treasury.gov/services/api/"
-                   "fiscal_service/v1/accounting/dts/operating_cash_balance")
+            url = f"{self.TREASURY_API}/v1/accounting/dts/operating_cash_balance"
             row = self._latest_row(url, "account_type:eq:TGA Closing Balance")
             tga = float(row["open_today_bal"]) * 1e-3  # млн → млрд
-            ind["tga_balance"] = {
+            return {
                 "value": tga,
                 "date": row["record_date"],
                 "status": "ok",
@@ -226,28 +287,27 @@ class IndicatorCollector:
             try:
                 if self.fred:
                     tga, d = self.fred_last("WTREGEN")  # уже в млрд $
-                    ind["tga_balance"] = {
+                    logger.info("TGA fallback to FRED WTREGEN successful")
+                    return {
                         "value": tga,
                         "date": d,
                         "status": "ok",
                         "source": "fred",
                     }
-                    logger.info("TGA fallback to FRED WTREGEN successful")
-                else:
-                    ind["tga_balance"] = {"status": "error", "source": "treasury"}
             except Exception as fe:
                 logger.error(f"TGA FRED fallback failed: {fe}")
-                ind["tga_balance"] = {"status": "error", "source": "treasury"}
+            return {"status": "error", "source": "treasury"}
 
+    def _rrp_entry(self) -> Dict[str, Any]:
         # 7.2  RRP (через FRED)
+        rrp, d = self.fred_last("RRPONTSYD")
+        return {"value": rrp, "date": d, "status": "ok", "source": "fred"}
+
+    def get_treasury_indicators(self) -> Dict[str, Any]:
+        ind: Dict[str, Any] = {"tga_balance": self._tga_entry()}
+
         try:
-            rrp, d = self.fred_last("RRPONTSYD")
-            ind["rrp_volume"] = {
-                "value": rrp,
-                "date": d,
-                "status": "ok",
-                "source": "fred",
-            }
+            ind["rrp_volume"] = self._rrp_entry()
         except Exception as e:
             logger.error(f"RRP fetch: {e}")
             ind["rrp_volume"] = {"status": "error", "source": "fred"}
@@ -257,25 +317,19 @@ class IndicatorCollector:
     # ------------------------------------------------------------------ #
     # 8.  C O I N G E C K O
     # ------------------------------------------------------------------ #
+    @staticmethod
+    def _btc_dominance(btc: Dict[str, Any], total: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "value": btc["market_cap"] / total["value"] * 100,
+            "status": "ok",
+            "source": "coingecko",
+        }
+
     def get_coingecko_indicators(self) -> Dict[str, Any]:
         ind: Dict[str, Any] = {}
         try:
-            btc = self.cg.get_coin_by_id("bitcoin")
-            glob = self.cg.get_global()
-
-            ind["btc_price"] = {
-                "value": btc["market_data"]["current_price"]["usd"],
-                "status": "ok",
-                "source": "coingecko",
-            }
-
-            btc_mcap = btc["market_data"]["market_cap"]["usd"]
-            total_mcap = glob["total_market_cap"]["usd"]
-            ind["btc_dominance"] = {
-                "value": btc_mcap / total_mcap * 100,
-                "status": "ok",
-                "source": "coingecko",
-            }
+            ind.update(self.cg.entries())
+            ind["btc_dominance"] = self._btc_dominance(ind["btc_price"], ind["total_market_cap"])
         except Exception as e:
             logger.error(f"CoinGecko: {e}")
             ind["btc_price"] = {"status": "error", "source": "coingecko"}
@@ -285,30 +339,136 @@ class IndicatorCollector:
     # ------------------------------------------------------------------ #
     # 9.  C U S T O M
     # ------------------------------------------------------------------ #
-    def calculate_custom_indicators(self) -> Dict[str, Any]:
-        liq = self.data["indicators"]["liquidity"]
-        mac = self.data["indicators"]["macro"]
+    def _seed_derived(self) -> None:
+        """Прогрев z‑score из IndicatorStore – один раз, базу не создаёт."""
+        if self._seeded:
+            return
+        self._seeded = True
+        if self.history_db is None or not Path(self.history_db).exists():
+            return
+        try:
+            store = IndicatorStore(self.history_db)
+            try:
+                self.derived.seed(lambda name, every: (
+                    (ts.timestamp(), v)
+                    for ts, v in store.series(name, resample=f"{int(every)}s").items()
+                ))
+            finally:
+                store.close()
+        except Exception as e:
+            logger.warning(f"История для z‑score недоступна: {e}")
 
-        fed = mac.get("fed_balance_sheet", {}).get("value")
-        tga = liq.get("tga_balance", {}).get("value")
-        rrp = liq.get("rrp_volume", {}).get("value")
+    def apply_derived(self, ready_only: bool = False) -> Dict[str, Any]:
+        """
+        Пересчитывает граф производных (derived.py) по текущему снимку и
+        раскладывает узлы по категориям. Пересчитываются только узлы,
+        чьи входы изменились с прошлого вызова; возвращает изменённые.
+        ready_only – раскладывать только посчитанные узлы (входы есть),
+        без заглушек no_data для источников, которые не собирались.
+        """
+        self._seed_derived()
+        changed = self.derived.update(flatten(self.data["indicators"]))
+        for name, entry in changed.items():
+            if ready_only and entry["status"] != "ok":
+                continue
+            cat = self.derived.nodes[name].category
+            self.data["indicators"].setdefault(cat, {})[name] = entry
+        return changed
 
-        if all(x is not None for x in (fed, tga, rrp)):
-            net = fed - tga - rrp
-            return {
-                "net_liquidity": {
-                    "value": net,
-                    "status": "ok",
-                    "source": "custom",
-                    "components": {"fed": fed, "tga": tga, "rrp": rrp},
-                }
-            }
-        return {"net_liquidity": {"status": "no_data", "source": "custom"}}
+    def calculate_custom_indicators(self) -> Dict[str, Any]:
+        """Все производные индикаторы {имя: запись} (без раскладки по категориям)."""
+        self._seed_derived()
+        self.derived.update(flatten(self.data["indicators"]))
+        return dict(self.derived.entries)
 
     # ------------------------------------------------------------------ #
     # 10.  M A I N   W O R K F L O W
     # ------------------------------------------------------------------ #
-    def collect_all(self, sources: Optional[list[str]] = None) -> Dict[str, Any]:
+    def _jobs(self, sources: list[str]) -> List[Tuple[str, str, str, str, Callable[[], Dict[str, Any]]]]:
+        """Все независимые сетевые выборки: (источник, категория, имя, source, fn)."""
+        jobs: List[Tuple[str, str, str, str, Callable[[], Dict[str, Any]]]] = []
+        if "fred" in sources and self.fred:
+            for name, sid in self.FRED_SERIES.items():
+                jobs.append(("fred", "macro", name, "fred", partial(self._fred_entry, sid)))
+        if "treasury" in sources:
+            jobs.append(("treasury", "liquidity", "tga_balance", "treasury", self._tga_entry))
+            jobs.append(("treasury", "liquidity", "rrp_volume", "fred", self._rrp_entry))
+        if "coingecko" in sources:
+            # одна корзина – один запрос /coins/markets на все задачи (кэш TTL)
+            for name in self.cg.names():
+                jobs.append(("coingecko", "crypto", name, "coingecko", partial(self.cg.entry, name)))
+        return jobs
+
+    def _update_derived(self, sources: list[str]) -> None:
+        """
+        Производные пересчитываются сразу, как только меняется вход. Без
+        "custom" в sources раскладываются только узлы, чьи входы собраны
+        (например, btc_dominance при --source coingecko).
+        """
+        self.apply_derived(ready_only="custom" not in sources)
+
+    def _collect_concurrent(self, sources: list[str]) -> None:
+        """
+        Все HTTP‑выборки уходят в пул потоков одновременно; TWS идёт в
+        главном потоке параллельно с ними (ib_insync не потокобезопасен).
+        Каждый источник ждём не дольше SOURCE_TIMEOUTS — опоздавшие
+        индикаторы получают status=timeout, остальные сохраняются.
+        """
+        ind = self.data["indicators"]
+        lock = threading.Lock()
+        closed = False
+
+        def _outcome(name: str, src: str, fut) -> Dict[str, Any]:
+            try:
+                return fut.result()
+            except Exception as e:
+                logger.error(f"{name}: {e}")
+                return {"status": "error", "source": src}
+
+        def _land(cat: str, name: str, src: str, fut) -> None:
+            with lock:
+                if closed:
+                    return  # уже учтено в finally (или прилетело после дедлайна)
+                ind[cat][name] = _outcome(name, src, fut)
+                self._update_derived(sources)
+
+        pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="collect")
+        t0 = time.monotonic()
+        by_source: Dict[str, list] = {}
+        try:
+            for group, cat, name, src, fn in self._jobs(sources):
+                fut = pool.submit(fn)
+                fut.add_done_callback(partial(_land, cat, name, src))
+                by_source.setdefault(group, []).append((cat, name, src, fut))
+
+            if "tws" in sources:
+                tws = self.get_tws_indicators()
+                with lock:
+                    ind["macro"].update(tws)
+                    self._update_derived(sources)
+
+            for group, items in by_source.items():
+                left = self.SOURCE_TIMEOUTS.get(group, 30.0) - (time.monotonic() - t0)
+                wait([it[-1] for it in items], timeout=max(left, 0.0))
+        finally:
+            with lock:
+                closed = True
+                for items in by_source.values():
+                    for cat, name, src, fut in items:
+                        if name in ind[cat]:
+                            continue
+                        # wait() может вернуться раньше, чем отработал callback
+                        if fut.done():
+                            ind[cat][name] = _outcome(name, src, fut)
+                        else:
+                            logger.error(f"{name}: timeout")
+                            ind[cat][name] = {"status": "timeout", "source": src}
+                self._update_derived(sources)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def collect_all(
+        self, sources: Optional[list[str]] = None, concurrent: bool = True
+    ) -> Dict[str, Any]:
         if sources is None:
             sources = ["tws", "fred", "treasury", "coingecko", "custom"]
         logger.info(f"Сбор из: {sources}")
@@ -317,6 +477,10 @@ class IndicatorCollector:
             sources.remove("tws")
 
         try:
+            if concurrent:
+                self._collect_concurrent(sources)
+                return self.data
+
             if "tws" in sources:
                 self.data["indicators"]["macro"].update(self.get_tws_indicators())
 
@@ -333,10 +497,7 @@ class IndicatorCollector:
                     self.get_coingecko_indicators()
                 )
 
-            if "custom" in sources:
-                self.data["indicators"]["liquidity"].update(
-                    self.calculate_custom_indicators()
-                )
+            self._update_derived(sources)
         finally:
             if "tws" in sources:
                 self.disconnect_tws()
@@ -346,11 +507,21 @@ class IndicatorCollector:
     # ------------------------------------------------------------------ #
     # 11.  I/O
     # ------------------------------------------------------------------ #
-    def save_to_file(self, filename: str) -> None:
+    def save_to_file(self, filename: str, store: bool = True) -> None:
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(self.data, f, indent=2, ensure_ascii=False)
         logger.info(f"Saved → {filename}")
 
+        # 11.1  история: тот же снимок в IndicatorStore  ---------- #
+        if store:
+            try:
+                st = IndicatorStore()
+                n = st.append_snapshot(self.data)
+                st.close()
+                logger.info(f"Store → {st.path} (+{n})")
+            except Exception as e:
+                logger.error(f"IndicatorStore: {e}")
+
     def print_summary(self) -> None:
         print("\n===  С В О Д К А  ===")
         for cat, ind in self.data["indicators"].items():
@@ -362,9 +533,19 @@ class IndicatorCollector:
                     print(f"  ✅ {k}: {val}")
                 elif status == "error":
                     print(f"  ❌ {k}: ERROR")
+                elif status == "timeout":
+                    print(f"  ⏱  {k}: TIMEOUT")
                 else:
                     print(f"  ⚠️  {k}: no data")
 
+        stats = self.http.stats()
+        if stats:
+            print("\nHTTP:")
+            for host, st in stats.items():
+                print(f"  {host}: {st['requests']:.0f} req, {st['retries']:.0f} retry, "
+                      f"{st['not_modified']:.0f} × 304, {st['errors']:.0f} err, "
+                      f"{st['latency_s']:.2f}s")
+
 # ------------------------------------------------------------------ #
 # 12.  C L I
 # ------------------------------------------------------------------ #
@@ -374,14 +555,20 @@ def main() -> None:
                    choices=["tws", "fred", "treasury", "coingecko", "custom"],
                    help="ограничить источники")
     p.add_argument("--output", help="файл JSON для сохранения")
+    p.add_argument("--serial", action="store_true",
+                   help="опрашивать источники последовательно (старый режим)")
+    p.add_argument("--refresh-fred", action="store_true",
+                   help="игнорировать график публикаций и дозапросить FRED")
+    p.add_argument("--no-store", action="store_true",
+                   help="не писать снимок в историю (indicator_store.py)")
     args = p.parse_args()
 
-    ic = IndicatorCollector()
-    ic.collect_all(args.source or None)
+    ic = IndicatorCollector(refresh_fred=args.refresh_fred)
+    ic.collect_all(args.source or None, concurrent=not args.serial)
     ic.print_summary()
 
     fname = args.output or f"indicators_{datetime.utcnow():%Y-%m-%d_%H-%M}.json"
-    ic.save_to_file(fname)
+    ic.save_to_file(fname, store=not args.no_store)
 
 if __name__ == "__main__":
     main()
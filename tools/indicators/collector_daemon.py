@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Долгоживущий режим сборщика индикаторов.
+
+Один процесс держит подключение к TWS, HTTP‑сессии (Treasury, CoinGecko) и
+FRED‑кэш открытыми и опрашивает каждый индикатор со своей частотой
+(SCHEDULE) вместо полного прогона из cron. После каждого обновления
+последний снимок атомарно публикуется:
+  • в JSON‑файл (tmp + os.replace – читатель никогда не видит половину);
+  • опционально в unix‑сокет (каждое подключение получает JSON и закрывается);
+  • раз в --store-every секунд – в историю (indicator_store.py).
+
+Пример:
+    python tools/indicators/collector_daemon.py --output data/indicators/latest.json
+    python tools/indicators/collector_daemon.py --socket /tmp/indicators.sock --no-tws
+    socat - UNIX-CONNECT:/tmp/indicators.sock
+"""
+
+import argparse
+import copy
+import heapq
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from collect_indicators import IndicatorCollector  # noqa: E402
+from indicator_store import IndicatorStore  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+MIN, HOUR, DAY = 60, 3600, 86400
+
+# ------------------------------------------------------------------ #
+# 1.  Р А С П И С А Н И Е
+# ------------------------------------------------------------------ #
+# период опроса, сек. Серии FRED опрашиваются часто (FRED_PERIOD): сеть
+# дёргается только когда по графику мог выйти релиз (FredCache._due через
+# next_release_possible и RECHECK_HOURS), иначе ответ берётся из кэша –
+# так еженедельный WALCL или квартальный GDP попадают в снимок в течение
+# часа после выхода, а не через 7/90 дней.
+FRED_PERIOD = 1 * HOUR
+SCHEDULE: Dict[str, float] = {
+    "tws": 1 * MIN,                 # UST, DXY, VIX, GLD, BITO – одним снимком
+    "btc_price": 5 * MIN,           # корзина CoinGecko – один запрос на все
+    "eth_price": 5 * MIN,
+    "sol_price": 5 * MIN,
+    "stablecoin_supply": 5 * MIN,
+    "total_market_cap": 5 * MIN,
+    "tga_balance": 1 * DAY,
+    "rrp_volume": FRED_PERIOD,
+    "fed_balance_sheet": FRED_PERIOD,   # WALCL – еженедельно
+    "dxy_fred": FRED_PERIOD,
+    "m2_money_stock": FRED_PERIOD,
+    "federal_debt": FRED_PERIOD,
+    "gdp": FRED_PERIOD,                 # квартальная
+}
+DEFAULT_PERIOD = 1 * DAY
+
+
+# ------------------------------------------------------------------ #
+# 2.  P U B L I S H
+# ------------------------------------------------------------------ #
+def publish_file(path: Path, snapshot: Dict[str, Any]) -> None:
+    """Атомарная запись снимка: читатель видит либо старый, либо новый файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class _SnapshotHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        self.request.sendall(self.server.payload())  # type: ignore[attr-defined]
+
+
+class SnapshotServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix‑сокет: каждое подключение получает последний снимок JSON."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, payload: Callable[[], bytes]) -> None:
+        if os.path.exists(path):
+            os.unlink(path)
+        self.payload = payload
+        super().__init__(path, _SnapshotHandler)
+
+
+# ------------------------------------------------------------------ #
+# 3.  D A E M O N
+# ------------------------------------------------------------------ #
+class CollectorDaemon:
+    """Планировщик поверх IndicatorCollector: один клиент на всё время жизни."""
+
+    def __init__(
+        self,
+        collector: IndicatorCollector,
+        output: Optional[Path],
+        use_tws: bool = True,
+        store_every: float = 15 * MIN,
+        schedule: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.c = collector
+        self.output = output
+        self.use_tws = use_tws
+        self.store_every = store_every
+        self.schedule = {**SCHEDULE, **(schedule or {})}
+
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=collector.MAX_WORKERS,
+                                       thread_name_prefix="daemon")
+        self._payload = b"{}"
+        self._dirty = False
+        self._last_store = 0.0
+        self._inflight: set = set()
+
+        # (due, name, category, source, fn); fn=None – TWS в главном потоке
+        self.queue: List[Tuple[float, str, str, str, Optional[Callable[[], Dict[str, Any]]]]] = []
+        now = time.monotonic()
+        sources = ["fred", "treasury", "coingecko"]
+        for _, cat, name, src, fn in collector._jobs(sources):
+            heapq.heappush(self.queue, (now, name, cat, src, fn))
+        if use_tws:
+            heapq.heappush(self.queue, (now, "tws", "macro", "tws", None))
+
+    # --- обработка результатов --------------------------------------- #
+    def _land(self, cat: str, name: str, entry: Dict[str, Any]) -> None:
+        entry["updated"] = datetime.utcnow().isoformat(timespec="seconds")
+        with self.lock:
+            self.c.data["indicators"][cat][name] = entry
+            self.c.apply_derived()
+            self._dirty = True
+
+    def _run_http(self, cat: str, name: str, src: str, fn: Callable[[], Dict[str, Any]]) -> None:
+        try:
+            entry = fn()
+        except Exception as e:
+            logger.error(f"{name}: {e}")
+            entry = {"status": "error", "source": src}
+        self._land(cat, name, entry)
+        with self.lock:
+            self._inflight.discard(name)
+
+    def _run_tws(self) -> None:
+        if not self.c.ib.isConnected() and not self.c.connect_tws():
+            return  # повторим по расписанию
+        for name, entry in self.c.get_tws_indicators().items():
+            self._land("macro", name, entry)
+
+    # --- публикация -------------------------------------------------- #
+    def payload(self) -> bytes:
+        return self._payload
+
+    def _publish(self) -> None:
+        with self.lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self.c.data["timestamp"] = datetime.utcnow().isoformat(timespec="seconds")
+            snap = copy.deepcopy(self.c.data)
+        snap["http"] = self.c.http.stats()
+        self._payload = json.dumps(snap, ensure_ascii=False).encode()
+        if self.output:
+            publish_file(self.output, snap)
+        if self.store_every and time.monotonic() - self._last_store >= self.store_every:
+            try:
+                store = IndicatorStore()
+                store.append_snapshot(snap)
+                store.close()
+                self._last_store = time.monotonic()
+            except Exception as e:
+                logger.error(f"IndicatorStore: {e}")
+
+    # --- цикл -------------------------------------------------------- #
+    def _sleep(self, seconds: float) -> None:
+        # ib.sleep крутит event loop ib_insync – соединение остаётся живым
+        if self.use_tws and self.c.ib.isConnected():
+            self.c.ib.sleep(seconds)
+        else:
+            self.stop.wait(seconds)
+
+    def run(self) -> None:
+        logger.info(f"Демон запущен: {len(self.queue)} задач")
+        try:
+            while not self.stop.is_set():
+                now = time.monotonic()
+                while self.queue and self.queue[0][0] <= now:
+                    _, name, cat, src, fn = heapq.heappop(self.queue)
+                    period = self.schedule.get(name, FRED_PERIOD if src == "fred" else DEFAULT_PERIOD)
+                    heapq.heappush(self.queue, (now + period, name, cat, src, fn))
+                    if fn is None:
+                        self._run_tws()
+                        continue
+                    with self.lock:
+                        if name in self._inflight:
+                            continue  # предыдущий запрос ещё не вернулся
+                        self._inflight.add(name)
+                    self.pool.submit(self._run_http, cat, name, src, fn)
+
+                self._publish()
+                wake = self.queue[0][0] if self.queue else now + MIN
+                self._sleep(min(max(wake - time.monotonic(), 0.0), 1.0))
+        finally:
+            self._publish()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.c.disconnect_tws()
+            logger.info("Демон остановлен")
+
+
+# ------------------------------------------------------------------ #
+# 4.  C L I
+# ------------------------------------------------------------------ #
+def main() -> None:
+    p = argparse.ArgumentParser("collector_daemon.py")
+    p.add_argument("--output", default="data/indicators/latest.json",
+                   help="куда публиковать последний снимок ('' – не писать)")
+    p.add_argument("--socket", help="путь unix‑сокета для чтения снимка")
+    p.add_argument("--no-tws", action="store_true", help="без TWS (только HTTP‑источники)")
+    p.add_argument("--store-every", type=float, default=15 * MIN,
+                   help="период записи в историю, сек (0 – не писать)")
+    args = p.parse_args()
+
+    d = CollectorDaemon(
+        IndicatorCollector(),
+        Path(args.output) if args.output else None,
+        use_tws=not args.no_tws,
+        store_every=args.store_every,
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: d.stop.set())
+
+    server = None
+    if args.socket:
+        server = SnapshotServer(args.socket, d.payload)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        d.run()
+    finally:
+        if server:
+            server.shutdown()
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
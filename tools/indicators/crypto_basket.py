@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Компактный пакетный фетчер CoinGecko.
+
+Вместо /coins/bitcoin (сотни КБ описаний, тикеров и ссылок) – один запрос
+/coins/markets на всю корзину (цены и капитализации) и /global для общей
+капитализации. Ответы живут TTL секунд: параллельные задачи сборщика
+(btc_price, eth_price, …) ждут один и тот же запрос и делят результат.
+
+Пример:
+    cg = CryptoBasket(HttpClient())
+    cg.entries()   # {"btc_price": {...}, "eth_price": {...}, "stablecoin_supply": {...}, ...}
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+CG_API = "https://api.coingecko.com/api/v3"
+
+# имя индикатора → id монеты CoinGecko
+COINS: Dict[str, str] = {
+    "btc_price": "bitcoin",
+    "eth_price": "ethereum",
+    "sol_price": "solana",
+}
+STABLECOINS: Tuple[str, ...] = ("tether", "usd-coin", "dai")
+TTL = 60.0
+
+
+class CryptoBasket:
+    def __init__(
+        self,
+        http,
+        api: str = CG_API,
+        coins: Dict[str, str] = COINS,
+        stablecoins: Tuple[str, ...] = STABLECOINS,
+        ttl: float = TTL,
+    ) -> None:
+        self.http = http
+        self.api = api
+        self.coins = dict(coins)
+        self.stablecoins = tuple(stablecoins)
+        self.ttl = ttl
+        self._guard = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+
+    def names(self) -> List[str]:
+        """Индикаторы, которые отдаёт корзина (порядок стабилен)."""
+        return list(self.coins) + ["stablecoin_supply", "total_market_cap"]
+
+    # ------------------------------------------------------------------ #
+    # запросы с коротким кэшем
+    # ------------------------------------------------------------------ #
+    def _lock(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _cached(self, key: str, fetch: Callable[[], Any]) -> Any:
+        # lock на ключ: второй поток ждёт тот же запрос, а не дублирует его,
+        # но медленный /global не задерживает /coins/markets
+        with self._lock(key):
+            hit = self._cache.get(key)
+            if hit and time.monotonic() - hit[0] < self.ttl:
+                return hit[1]
+            value = fetch()
+            self._cache[key] = (time.monotonic(), value)
+            return value
+
+    def markets(self) -> Dict[str, Dict[str, Any]]:
+        """{id монеты: строка /coins/markets} для всей корзины одним запросом."""
+        ids = sorted(set(self.coins.values()) | set(self.stablecoins))
+
+        def _fetch() -> Dict[str, Dict[str, Any]]:
+            rows = self.http.get_json(f"{self.api}/coins/markets", params={
+                "vs_currency": "usd",
+                "ids": ",".join(ids),
+                "per_page": len(ids),
+                "sparkline": "false",
+            })
+            return {r["id"]: r for r in rows}
+
+        return self._cached("markets", _fetch)
+
+    def global_data(self) -> Dict[str, Any]:
+        return self._cached("global", lambda: self.http.get_json(f"{self.api}/global")["data"])
+
+    # ------------------------------------------------------------------ #
+    # записи индикаторов
+    # ------------------------------------------------------------------ #
+    def entry(self, name: str) -> Dict[str, Any]:
+        if name in self.coins:
+            row = self.markets()[self.coins[name]]
+            return {
+                "value": row["current_price"],
+                "market_cap": row["market_cap"],
+                "status": "ok",
+                "source": "coingecko",
+            }
+        if name == "stablecoin_supply":
+            m = self.markets()
+            # у части стейблкоинов CoinGecko отдаёт market_cap: null
+            caps = [m[c]["market_cap"] for c in self.stablecoins
+                    if c in m and m[c].get("market_cap") is not None]
+            return {
+                "value": sum(caps) * 1e-9,  # $ → млрд
+                "status": "ok" if caps else "no_data",
+                "source": "coingecko",
+            }
+        if name == "total_market_cap":
+            return {
+                "value": self.global_data()["total_market_cap"]["usd"],
+                "status": "ok",
+                "source": "coingecko",
+            }
+        raise KeyError(name)
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return {n: self.entry(n) for n in self.names()}
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Производные индикаторы как граф зависимостей.
+
+Каждый узел объявляет входы (имена сырых или других производных
+индикаторов) и формулу. DerivedGraph обходит узлы в топологическом
+порядке и пересчитывает только те, у которых с прошлого тика изменился
+хотя бы один вход; изменение результата, в свою очередь, помечает
+зависимые узлы. Узлы с состоянием (ZScore) получают новое значение
+ровно тогда, когда меняется их вход.
+
+Новый индикатор – одна строка в default_nodes():
+    Node("curve_10y_2y", "macro", ("ust_10y_fred", "ust_2y_fred"), lambda a, b: a - b)
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+@dataclass
+class Node:
+    name: str
+    category: str
+    inputs: Tuple[str, ...]
+    fn: Callable[..., Optional[float]]
+    source: str = "custom"
+
+    def compute(self, *args: float) -> Optional[float]:
+        return self.fn(*args)
+
+    def entry(self, value: Optional[float], args: List[Optional[float]]) -> Dict[str, Any]:
+        if value is None:
+            return {"status": "no_data", "source": self.source}
+        return {
+            "value": value,
+            "status": "ok",
+            "source": self.source,
+            "components": dict(zip(self.inputs, args)),
+        }
+
+
+@dataclass
+class ZScore(Node):
+    """
+    Скользящий z‑score входа по последним ``window`` выборкам.
+
+    Выборка – последнее значение входа за интервал ``every`` сек (то же,
+    что resample(every).last() в IndicatorStore), подряд идущие повторы
+    отбрасываются. Прогрев (seed) и живые обновления (compute) проходят
+    через одно правило, так что история и новые точки в одном масштабе.
+    """
+
+    window: int = 60
+    every: float = 86400.0
+    clock: Callable[[], float] = field(default=time.time, repr=False)
+    _hist: Deque[Tuple[int, float]] = field(default_factory=deque, repr=False)
+
+    def __post_init__(self) -> None:
+        self._hist = deque(maxlen=self.window)
+
+    def _add(self, ts: float, x: float) -> None:
+        bucket = int(ts // self.every)
+        if self._hist and self._hist[-1][0] == bucket:
+            self._hist.pop()  # в интервале остаётся последнее значение
+        if self._hist and self._hist[-1][1] == x:
+            return  # повтор предыдущей выборки
+        self._hist.append((bucket, float(x)))
+
+    def seed(self, samples: Iterable[Tuple[float, float]]) -> None:
+        """Прогрев историей: (unix‑время, значение) по возрастанию времени."""
+        for ts, v in samples:
+            self._add(ts, v)
+
+    def compute(self, x: float) -> Optional[float]:
+        self._add(self.clock(), x)
+        n = len(self._hist)
+        if n < max(3, self.window // 2):
+            return None
+        vals = [v for _, v in self._hist]
+        mean = sum(vals) / n
+        sd = math.sqrt(sum((v - mean) ** 2 for v in vals) / (n - 1))
+        return (x - mean) / sd if sd > 0 else None
+
+
+# ------------------------------------------------------------------ #
+# Р Е Е С Т Р
+# ------------------------------------------------------------------ #
+# все величины – в единицах IndicatorCollector: $ млрд, проценты как есть;
+# деление на ноль и т.п. дают status=no_data
+def default_nodes() -> List[Node]:
+    """Новый набор узлов (у ZScore своё состояние – не делим между графами)."""
+    return [
+        Node("net_liquidity", "liquidity",
+             ("fed_balance_sheet", "tga_balance", "rrp_volume"),
+             lambda fed, tga, rrp: fed - tga - rrp),
+        Node("real_yield_10y", "macro", ("ust_10y_fred", "breakeven_10y"),
+             lambda nominal, be: nominal - be),
+        Node("curve_10y_2y", "macro", ("ust_10y_fred", "ust_2y_fred"),
+             lambda y10, y2: y10 - y2),
+        Node("curve_30y_10y", "macro", ("ust_30y", "ust_10y"),
+             lambda y30, y10: y30 - y10),
+        Node("btc_dominance", "crypto", ("btc_market_cap", "total_market_cap"),
+             lambda btc, total: btc / total * 100, source="coingecko"),
+        Node("btc_mcap_to_liquidity", "crypto", ("btc_market_cap", "net_liquidity"),
+             lambda mcap, net: mcap * 1e-9 / net * 100),  # % от net liquidity
+        # 60 дневных выборок (последнее значение за сутки)
+        ZScore("net_liquidity_z", "liquidity", ("net_liquidity",), None, window=60),
+        ZScore("vix_z", "macro", ("vix",), None, window=60),
+    ]
+
+
+# ------------------------------------------------------------------ #
+# Г Р А Ф
+# ------------------------------------------------------------------ #
+def flatten(indicators: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """{категория: {имя: запись}} → {имя: значение | None}."""
+    out: Dict[str, Optional[float]] = {}
+    for ind in indicators.values():
+        for name, v in ind.items():
+            ok = isinstance(v, dict) and v.get("status", "ok") == "ok"
+            val = v.get("value") if ok else None
+            out[name] = float(val) if isinstance(val, (int, float)) else None
+            if name == "btc_price":
+                mcap = v.get("market_cap") if ok else None
+                out["btc_market_cap"] = float(mcap) if isinstance(mcap, (int, float)) else None
+    return out
+
+
+class DerivedGraph:
+    def __init__(self, nodes: Optional[List[Node]] = None) -> None:
+        nodes = default_nodes() if nodes is None else nodes
+        self.nodes: Dict[str, Node] = {n.name: n for n in nodes}
+        deps = {n.name: [i for i in n.inputs if i in self.nodes] for n in nodes}
+        self.order: List[str] = list(TopologicalSorter(deps).static_order())
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._seen: Dict[str, Optional[float]] = {}
+        self.recomputed = 0  # счётчик пересчётов (для отладки/бенчмарков)
+
+    def update(self, values: Dict[str, Optional[float]]) -> Dict[str, Dict[str, Any]]:
+        """Подаёт новые входы; возвращает записи пересчитанных узлов."""
+        dirty = set()
+        for k, v in values.items():
+            if k in self.nodes:
+                continue  # собственные выходы, вернувшиеся через снимок
+            if self._seen.get(k, _MISSING) != v:
+                self._seen[k] = v
+                dirty.add(k)
+
+        changed: Dict[str, Dict[str, Any]] = {}
+        for name in self.order:
+            node = self.nodes[name]
+            if name in self.entries and dirty.isdisjoint(node.inputs):
+                continue
+            args = [self._seen.get(i) for i in node.inputs]
+            value = None
+            if all(a is not None for a in args):
+                try:
+                    value = node.compute(*args)
+                except (ArithmeticError, ValueError):
+                    value = None
+            self.recomputed += 1
+            if self._seen.get(name, _MISSING) != value:
+                self._seen[name] = value
+                dirty.add(name)
+            self.entries[name] = changed[name] = node.entry(value, args)
+        return changed
+
+    def seed(self, history: Callable[[str, float], Iterable[Tuple[float, float]]]) -> None:
+        """
+        Прогрев узлов с состоянием: history(имя входа, every) → прошлые
+        (unix‑время, значение), уже прореженные до шага узла.
+        """
+        for node in self.nodes.values():
+            if isinstance(node, ZScore):
+                node.seed(history(node.inputs[0], node.every))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Локальный кэш наблюдений FRED с учётом графика публикаций.
+
+На каждую серию – data/fred/<SERIES_ID>.json: частота, время последней
+проверки и все наблюдения {дата: значение}. Повторный запуск:
+  • не ходит в сеть, если по частоте серии (W/M/Q…) новой точки
+    ещё быть не может или проверка была недавно (RECHECK_HOURS);
+  • иначе запрашивает только наблюдения начиная с последней
+    закэшированной даты (последняя точка перезаписывается – ревизии).
+
+Пример:
+    cache = FredCache(Fred(api_key=...))
+    value, date = cache.latest("WALCL")
+    hist = cache.series("M2SL")          # pd.Series за всю историю
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data/fred")
+RECHECK_HOURS = 1.0  # не чаще, пока ожидаемый релиз ещё не вышел (демон опрашивает ежечасно)
+
+# шаг между наблюдениями по frequency_short из FRED
+_STEP = {
+    "D": pd.DateOffset(days=1),
+    "W": pd.DateOffset(weeks=1),
+    "BW": pd.DateOffset(weeks=2),
+    "M": pd.DateOffset(months=1),
+    "Q": pd.DateOffset(months=3),
+    "SA": pd.DateOffset(months=6),
+    "A": pd.DateOffset(years=1),
+}
+# у этих серий дата наблюдения – начало периода, публикация – после его конца
+_PERIODIC = {"M", "Q", "SA", "A"}
+
+
+def next_release_possible(last_obs: pd.Timestamp, freq: str) -> pd.Timestamp:
+    """Самая ранняя дата, когда может появиться следующая точка серии."""
+    step = _STEP.get(freq)
+    if step is None:
+        return last_obs  # неизвестная частота → проверяем всегда
+    nxt = last_obs + step
+    if freq in _PERIODIC:
+        nxt = nxt + step - pd.Timedelta(days=1)
+    return nxt
+
+
+class FredCache:
+    """Инкрементальная обёртка над fredapi.Fred с дисковым кэшем."""
+
+    def __init__(self, fred, cache_dir: Path = CACHE_DIR, refresh: bool = False) -> None:
+        self.fred = fred
+        self.cache_dir = Path(cache_dir)
+        self.refresh = refresh
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # диск
+    # ------------------------------------------------------------------ #
+    def _path(self, series_id: str) -> Path:
+        return self.cache_dir / f"{series_id}.json"
+
+    def _load(self, series_id: str) -> Optional[Dict[str, Any]]:
+        p = self._path(series_id)
+        if not p.exists():
+            return None
+        try:
+            with open(p, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # битый файл = пустой кэш
+
+    def _save(self, series_id: str, entry: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        p = self._path(series_id)
+        tmp = p.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, p)
+
+    # ------------------------------------------------------------------ #
+    # логика обновления
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _due(entry: Dict[str, Any], now: datetime) -> bool:
+        obs = entry.get("observations")
+        if not obs:
+            return True
+        last = pd.Timestamp(max(obs))
+        if now < next_release_possible(last, entry.get("frequency", "")):
+            return False
+        checked = datetime.fromisoformat(entry["checked"])
+        return now - checked >= timedelta(hours=RECHECK_HOURS)
+
+    def _fetch(self, series_id: str, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if entry and entry.get("observations"):
+            start = max(entry["observations"])
+            s = self.fred.get_series(series_id, observation_start=start)
+        else:
+            info = self.fred.get_series_info(series_id)
+            entry = {"series_id": series_id, "frequency": info.get("frequency_short", ""),
+                     "observations": {}}
+            s = self.fred.get_series(series_id)
+
+        s = s.dropna()
+        entry["observations"].update(
+            {d.strftime("%Y-%m-%d"): float(v) for d, v in s.items()}
+        )
+        entry["checked"] = datetime.utcnow().isoformat(timespec="seconds")
+        logger.info(f"FRED {series_id}: +{len(s)} набл.")
+        return entry
+
+    def _lock(self, series_id: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(series_id, threading.Lock())
+
+    def _entry(self, series_id: str) -> Dict[str, Any]:
+        with self._lock(series_id):
+            entry = self._load(series_id)
+            if entry and not self.refresh and not self._due(entry, datetime.utcnow()):
+                return entry
+            try:
+                entry = self._fetch(series_id, entry)
+            except Exception as e:
+                if not entry or not entry.get("observations"):
+                    raise
+                logger.warning(f"FRED {series_id}: {e} – отдаю кэш")
+                return entry
+            self._save(series_id, entry)
+            return entry
+
+    # ------------------------------------------------------------------ #
+    # API
+    # ------------------------------------------------------------------ #
+    def latest(self, series_id: str) -> Tuple[float, str]:
+        """(значение, дата) последней точки серии без масштабирования."""
+        obs = self._entry(series_id)["observations"]
+        if not obs:
+            raise ValueError(f"FRED {series_id}: нет наблюдений")
+        d = max(obs)
+        return obs[d], d
+
+    def series(self, series_id: str) -> pd.Series:
+        """Вся закэшированная история серии."""
+        obs = self._entry(series_id)["observations"]
+        s = pd.Series(obs, dtype=float, name=series_id)
+        s.index = pd.to_datetime(s.index)
+        return s.sort_index()
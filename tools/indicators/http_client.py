@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Общий HTTP‑клиент сборщика индикаторов (Treasury, CoinGecko).
+
+  • один requests.Session с пулом keep‑alive соединений на хост;
+  • повтор при сетевых ошибках, 429 и 5xx: экспоненциальная задержка с
+    полным jitter, Retry‑After учитывается;
+  • ограничение частоты на хост (минимальный интервал между запросами);
+  • условные запросы: ETag / Last‑Modified запоминаются, при 304
+    возвращается прошлый ответ без повторной загрузки тела;
+  • счётчики по хостам: запросы, повторы, ошибки, 304, суммарная задержка.
+
+Пример:
+    http = HttpClient()
+    row = http.get_json("https://api.coingecko.com/api/v3/global")
+    http.stats()   # {"api.coingecko.com": {"requests": 1, "retries": 0, ...}}
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# минимальный интервал между запросами к хосту, сек
+HOST_MIN_INTERVAL: Dict[str, float] = {
+    "api.coingecko.com": 2.5,   # free tier ≈ 30 запросов/мин
+    "api.fiscaldata.treasury.gov": 0.2,
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpError(Exception):
+    """Запрос не удался после всех повторов."""
+
+
+class HttpClient:
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 20.0,
+        pool_size: int = 8,
+        min_interval: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_interval = {**HOST_MIN_INTERVAL, **(min_interval or {})}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+        # ключ запроса → (ETag, Last‑Modified, распарсенный JSON)
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str], Any]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # ------------------------------------------------------------------ #
+    # внутреннее
+    # ------------------------------------------------------------------ #
+    def _count(self, host: str, **inc: float) -> None:
+        with self._lock:
+            st = self._stats.setdefault(host, {
+                "requests": 0, "retries": 0, "errors": 0,
+                "not_modified": 0, "latency_s": 0.0,
+            })
+            for k, v in inc.items():
+                st[k] += v
+
+    def _throttle(self, host: str) -> None:
+        """Резервирует слот для хоста и спит до него (потокобезопасно)."""
+        gap = self.min_interval.get(host, 0.0)
+        if gap <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + gap
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _delay(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        if resp is not None:
+            ra = resp.headers.get("Retry-After")
+            if ra and ra.isdigit():
+                return min(float(ra), self.max_backoff)
+        # full jitter: U(0, base·2^n)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    # ------------------------------------------------------------------ #
+    # API
+    # ------------------------------------------------------------------ #
+    def get_json(
+        self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10
+    ) -> Any:
+        """GET с повторами и условными заголовками; возвращает JSON."""
+        host = urlsplit(url).netloc
+        key = url + ("?" + urlencode(sorted(params.items())) if params else "")
+
+        for attempt in range(self.retries + 1):
+            headers = {}
+            with self._lock:
+                etag, modified, _ = self._validators.get(key, (None, None, None))
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+
+            self._throttle(host)
+            t0 = time.monotonic()
+            resp = None
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=timeout)
+                self._count(host, requests=1, latency_s=time.monotonic() - t0)
+                if resp.status_code == 304:
+                    with self._lock:
+                        cached = self._validators.get(key)
+                    if cached is not None:
+                        self._count(host, not_modified=1)
+                        return cached[2]
+                    # 304 без сохранённого тела (ответил прокси, валидаторы потеряны) –
+                    # сразу перезапрашиваем без условных заголовков
+                    t0 = time.monotonic()
+                    resp = self.session.get(url, params=params, timeout=timeout,
+                                            headers={"Cache-Control": "no-cache"})
+                    self._count(host, requests=1, latency_s=time.monotonic() - t0)
+                if resp.status_code not in RETRY_STATUS and resp.status_code != 304:
+                    resp.raise_for_status()
+                    body = resp.json()
+                    v = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                    if any(v):
+                        with self._lock:
+                            self._validators[key] = (*v, body)
+                    return body
+                err: Exception = HttpError(f"HTTP {resp.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count(host, requests=1, latency_s=time.monotonic() - t0)
+                err = e
+            except requests.HTTPError as e:  # 4xx кроме 429 – не повторяем
+                self._count(host, errors=1)
+                raise HttpError(str(e)) from e
+            except ValueError as e:  # 200, но тело не JSON (страница обслуживания и т.п.)
+                self._count(host, errors=1)
+                raise HttpError(f"{host}: ответ не JSON: {e}") from e
+
+            if attempt == self.retries:
+                break
+            self._count(host, retries=1)
+            pause = self._delay(attempt, resp)
+            logger.warning(f"{host}: {err} – повтор через {pause:.1f}с")
+            time.sleep(pause)
+
+        self._count(host, errors=1)
+        raise HttpError(f"{host}: {err}") from err
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Счётчики по хостам (копия)."""
+        with self._lock:
+            return {h: dict(s) for h, s in self._stats.items()}
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+История индикаторов в SQLite вместо россыпи indicators_<ts>.json.
+
+Одна таблица obs, первичный ключ (name, ts) WITHOUT ROWID – строки одного
+индикатора лежат подряд, поэтому выборка диапазона по индикатору – это один
+проход по B‑дереву (миллисекунды даже на годах 15‑минутных снимков).
+Запись только добавляет строки (повторный снимок с тем же ts игнорируется).
+
+Пример:
+    python tools/indicators/indicator_store.py import            # старые JSON
+    python tools/indicators/indicator_store.py query net_liquidity --days 90 --resample D
+
+    store = IndicatorStore()
+    s = store.series("net_liquidity", start="2025-05-01", resample="D")
+"""
+
+import argparse
+import glob
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path("data/indicators/indicators.sqlite")
+IMPORT_GLOBS = [
+    "data/indicators/indicators_*.json",
+    "memory_bank/active_memory/indicators/indicators_*.json",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS obs (
+    name     TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,   -- время снимка, UTC epoch‑секунды
+    category TEXT    NOT NULL,
+    value    REAL,
+    status   TEXT,
+    source   TEXT,
+    obs_date TEXT,               -- дата наблюдения у источника (если есть)
+    PRIMARY KEY (name, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS obs_ts ON obs (ts);
+"""
+
+
+def _epoch(ts: Any) -> int:
+    t = pd.Timestamp(ts)
+    if t.tzinfo is None:
+        t = t.tz_localize("UTC")  # collect_indicators пишет utcnow() без зоны
+    return int(t.timestamp())
+
+
+def _rows(snapshot: Dict[str, Any]) -> List[tuple]:
+    ts = _epoch(snapshot["timestamp"])
+    rows = []
+    for cat, ind in snapshot.get("indicators", {}).items():
+        for name, v in ind.items():
+            if not isinstance(v, dict):
+                continue
+            val = v.get("value")
+            rows.append((
+                name, ts, cat,
+                float(val) if isinstance(val, (int, float)) else None,
+                v.get("status"), v.get("source"), v.get("date"),
+            ))
+    return rows
+
+
+class IndicatorStore:
+    """Append‑only хранилище снимков IndicatorCollector."""
+
+    def __init__(self, path: Path = DB_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # читатели не ждут писателя
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------------ #
+    # запись
+    # ------------------------------------------------------------------ #
+    def append_snapshot(self, snapshot: Dict[str, Any]) -> int:
+        """Добавляет снимок (формат IndicatorCollector.data); число новых строк."""
+        rows = _rows(snapshot)
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO obs VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return cur.rowcount
+
+    def import_json(self, paths: Iterable[str]) -> int:
+        """Разовый импорт старых indicators_<ts>.json."""
+        added = 0
+        for p in paths:
+            try:
+                with open(p, encoding="utf-8") as f:
+                    added += self.append_snapshot(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"{p}: {e}")
+        return added
+
+    # ------------------------------------------------------------------ #
+    # чтение
+    # ------------------------------------------------------------------ #
+    def names(self) -> List[str]:
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT name FROM obs ORDER BY name")]
+
+    def series(
+        self,
+        name: str,
+        start: Any = None,
+        end: Any = None,
+        resample: Optional[str] = None,
+        how: str = "last",
+    ) -> pd.Series:
+        """
+        Значения индикатора на [start, end] (только status=ok), индекс – UTC.
+        resample – правило pandas ("D", "W", "1h"…), how – агрегат ("last", "mean"…).
+        """
+        q = "SELECT ts, value FROM obs WHERE name = ? AND status = 'ok'"
+        args: list = [name]
+        if start is not None:
+            q += " AND ts >= ?"
+            args.append(_epoch(start))
+        if end is not None:
+            q += " AND ts <= ?"
+            args.append(_epoch(end))
+        rows = self.conn.execute(q + " ORDER BY ts", args).fetchall()
+
+        arr = np.array(rows, dtype=float).reshape(-1, 2)
+        idx = pd.to_datetime(arr[:, 0].astype(np.int64), unit="s", utc=True)
+        s = pd.Series(arr[:, 1], index=idx, name=name)
+        if resample:
+            s = getattr(s.resample(resample), how)().dropna()
+        return s
+
+    def frame(
+        self,
+        names: Iterable[str],
+        start: Any = None,
+        end: Any = None,
+        resample: Optional[str] = None,
+        how: str = "last",
+    ) -> pd.DataFrame:
+        """Несколько индикаторов колонками (выравнивание по времени снимка)."""
+        return pd.concat(
+            [self.series(n, start, end, resample, how) for n in names], axis=1
+        )
+
+
+# ------------------------------------------------------------------ #
+# C L I
+# ------------------------------------------------------------------ #
+def main() -> None:
+    p = argparse.ArgumentParser("indicator_store.py")
+    p.add_argument("--db", default=str(DB_PATH))
+    sub = p.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="импорт старых JSON‑снимков")
+    imp.add_argument("files", nargs="*", help=f"по умолчанию: {' '.join(IMPORT_GLOBS)}")
+    q = sub.add_parser("query", help="история индикатора")
+    q.add_argument("names", nargs="+")
+    q.add_argument("--days", type=float, help="последние N дней")
+    q.add_argument("--resample", help="правило pandas: D, W, 1h…")
+    sub.add_parser("names", help="список индикаторов")
+    args = p.parse_args()
+
+    store = IndicatorStore(Path(args.db))
+    if args.cmd == "import":
+        files = args.files or sorted(f for g in IMPORT_GLOBS for f in glob.glob(g))
+        n = store.import_json(files)
+        print(f"✔ {len(files)} файлов, {n} новых строк → {store.path}")
+    elif args.cmd == "names":
+        print("\n".join(store.names()))
+    else:
+        start = pd.Timestamp.utcnow() - pd.Timedelta(days=args.days) if args.days else None
+        print(store.frame(args.names, start=start, resample=args.resample).to_string())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s  %(message)s")
+    main()
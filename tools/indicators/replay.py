@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Офлайн‑стенд для сборщика индикаторов: запись, replay и бенчмарк.
+
+  • record – локальные stand‑in серверы проксируют запросы сборщика на
+    настоящие FRED / Treasury / CoinGecko и сохраняют ответы в фикстуры;
+    тики TWS снимаются с реального IB через RecordingIB;
+  • serve  – те же серверы отдают ответы из фикстур, с задержкой и
+    инъекцией ошибок (503), пока не нажат Ctrl‑C;
+  • bench  – N прогонов collect_all против stand‑in серверов и FakeIB,
+    время каждого прогона и сводка статусов.
+
+Фикстуры: <dir>/<upstream>.json = {"путь?query": {"status", "content_type",
+"body"}} (api_key из ключа выбрасывается) и <dir>/tws.json = {символ: тик}.
+Небольшой синтетический набор лежит в tools/indicators/fixtures – на нём
+test_replay.py гоняет сборщик без сети и TWS.
+
+Пример:
+    python tools/indicators/replay.py record --fixtures data/indicators/fixtures
+    python tools/indicators/replay.py bench --fixtures data/indicators/fixtures \\
+        --latency 0.2 --error-rate 0.05 --runs 5
+    python tools/indicators/replay.py bench --fixtures data/indicators/fixtures --serial
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+sys.path.append(os.path.dirname(__file__))
+
+logger = logging.getLogger(__name__)
+
+UPSTREAMS = {
+    "fred": "https://api.stlouisfed.org",
+    "treasury": "https://api.fiscaldata.treasury.gov",
+    "coingecko": "https://api.coingecko.com",
+}
+_DROP_PARAMS = {"api_key"}
+
+
+def fixture_key(path: str) -> str:
+    """Ключ запроса: путь + отсортированный query без секретов."""
+    parts = urlsplit(path)
+    q = sorted((k, v) for k, v in parse_qsl(parts.query) if k not in _DROP_PARAMS)
+    return parts.path + ("?" + urlencode(q) if q else "")
+
+
+# ------------------------------------------------------------------ #
+# 1.  S T A N D ‑ I N   H T T P
+# ------------------------------------------------------------------ #
+class StandIn:
+    """
+    Локальный HTTP‑сервер вместо одного upstream. В режиме record
+    проксирует запрос на upstream и запоминает ответ, иначе отдаёт его
+    из фикстуры (404 – если такого запроса не записано).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fixtures: Dict[str, Dict[str, Any]],
+        record: bool = False,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.name = name
+        self.upstream = UPSTREAMS[name]
+        self.fixtures = fixtures
+        self.record = record
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.hits = {"requests": 0, "injected_errors": 0, "missing": 0}
+
+        standin = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:  # noqa: N802
+                status, ctype, body = standin.respond(self.path)
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, path: str) -> tuple:
+        with self.lock:
+            self.hits["requests"] += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.error_rate
+        if self.record:
+            return self._forward(path)
+        time.sleep(delay)
+        if fail:
+            with self.lock:
+                self.hits["injected_errors"] += 1
+            return 503, "text/plain", "injected error"
+        fx = self.fixtures.get(fixture_key(path))
+        if fx is None:
+            with self.lock:
+                self.hits["missing"] += 1
+            logger.warning(f"{self.name}: нет фикстуры для {fixture_key(path)}")
+            return 404, "text/plain", "no fixture"
+        return fx["status"], fx["content_type"], fx["body"]
+
+    def _forward(self, path: str) -> tuple:
+        req = urllib.request.Request(self.upstream + path, headers={"User-Agent": "replay/1.0"})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as r:
+                status, ctype, body = r.status, r.headers.get("Content-Type", ""), r.read()
+        except urllib.error.HTTPError as e:
+            status, ctype, body = e.code, e.headers.get("Content-Type", ""), e.read()
+        text = body.decode("utf-8", "replace")
+        with self.lock:
+            self.fixtures[fixture_key(path)] = {"status": status, "content_type": ctype, "body": text}
+        return status, ctype, text
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ------------------------------------------------------------------ #
+# 2.  F A K E   I B
+# ------------------------------------------------------------------ #
+class FakeTicker:
+    def __init__(self, contract: Any) -> None:
+        self.contract = contract
+        self.last = self.bid = self.ask = float("nan")
+
+
+class _Event:
+    """Минимум eventkit.Event: подписка через += / -=."""
+
+    def __init__(self) -> None:
+        self.handlers: List[Any] = []
+
+    def __iadd__(self, fn: Any) -> "_Event":
+        self.handlers.append(fn)
+        return self
+
+    def __isub__(self, fn: Any) -> "_Event":
+        self.handlers.remove(fn)
+        return self
+
+
+class FakeIB:
+    """
+    Подмножество ib_insync.IB, которое использует сборщик. Тики из
+    фикстуры приходят через latency±jitter после reqMktData; символы без
+    тика не квалифицируются (как неизвестный контракт в TWS).
+    """
+
+    def __init__(
+        self,
+        ticks: Dict[str, Dict[str, float]],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.ticks = ticks
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.rng = random.Random(seed)
+        self._connected = False
+        self._pending: List[tuple] = []  # (время прихода, тикер)
+        self.disconnectedEvent = _Event()
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def connect(self, host: str = "127.0.0.1", port: int = 7496, clientId: int = 1, **kw: Any) -> "FakeIB":  # noqa: N803
+        time.sleep(self._delay())
+        if self.rng.random() < self.error_rate:
+            raise ConnectionRefusedError("injected: TWS недоступен")
+        self._connected = True
+        return self
+
+    def isConnected(self) -> bool:  # noqa: N802
+        return self._connected
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def reqMarketDataType(self, t: int) -> None:  # noqa: N802
+        pass
+
+    def qualifyContracts(self, *contracts: Any) -> List[Any]:  # noqa: N802
+        time.sleep(self._delay())
+        out = []
+        for i, c in enumerate(contracts, 1):
+            if c.symbol in self.ticks:
+                c.conId = 10_000 + i
+                out.append(c)
+        return out
+
+    def reqMktData(self, contract: Any, *args: Any) -> FakeTicker:  # noqa: N802
+        t = FakeTicker(contract)
+        if self.rng.random() >= self.error_rate:  # иначе тик «не придёт»
+            self._pending.append((time.monotonic() + self._delay(), t))
+        return t
+
+    def cancelMktData(self, contract: Any) -> None:  # noqa: N802
+        self._pending = [p for p in self._pending if p[1].contract is not contract]
+
+    def waitOnUpdate(self, timeout: float = 0) -> bool:  # noqa: N802
+        if not self._pending:
+            time.sleep(timeout)
+            return False
+        due = min(p[0] for p in self._pending)
+        time.sleep(max(0.0, min(due - time.monotonic(), timeout)))
+        now, arrived = time.monotonic(), []
+        for p in self._pending:
+            if p[0] <= now:
+                tick = self.ticks[p[1].contract.symbol]
+                p[1].last, p[1].bid, p[1].ask = tick.get("last"), tick.get("bid"), tick.get("ask")
+                arrived.append(p)
+        self._pending = [p for p in self._pending if p not in arrived]
+        return bool(arrived)
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class RecordingIB:
+    """Обёртка над настоящим IB: запоминает тики всех reqMktData."""
+
+    def __init__(self, ib: Any) -> None:
+        self._ib = ib
+        self._tickers: List[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ib, name)
+
+    def reqMktData(self, contract: Any, *args: Any) -> Any:  # noqa: N802
+        t = self._ib.reqMktData(contract, *args)
+        self._tickers.append(t)
+        return t
+
+    def dump(self) -> Dict[str, Dict[str, float]]:
+        def _num(x: Any) -> Optional[float]:
+            return x if isinstance(x, (int, float)) and x == x and x != -1 else None
+
+        return {
+            t.contract.symbol: {"last": _num(t.last), "bid": _num(t.bid), "ask": _num(t.ask)}
+            for t in self._tickers
+        }
+
+
+# ------------------------------------------------------------------ #
+# 3.  W I R I N G
+# ------------------------------------------------------------------ #
+def load_fixtures(directory: Path) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    out = {}
+    for name in list(UPSTREAMS) + ["tws"]:
+        p = directory / f"{name}.json"
+        out[name] = json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+    return out
+
+
+def save_fixtures(directory: Path, fixtures: Dict[str, Dict[str, Any]]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, fx in fixtures.items():
+        with open(directory / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(fx, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+def start_standins(fixtures: Dict[str, Dict[str, Any]], **opts: Any) -> Dict[str, StandIn]:
+    return {name: StandIn(name, fixtures[name], **opts) for name in UPSTREAMS}
+
+
+def make_collector(servers: Dict[str, StandIn], ib: Any, fred_cache_dir: Path):
+    """IndicatorCollector, у которого все сетевые клиенты смотрят в stand‑in."""
+    os.environ.setdefault("FRED_API_KEY", "replay")  # реальный ключ нужен только для record
+    from collect_indicators import IndicatorCollector
+    from fred_cache import FredCache
+    from tools.IBRK.ib_session import IBSession  # корень репо в sys.path добавляет collect_indicators
+
+    c = IndicatorCollector()
+    if ib is not None:
+        c.ib = ib
+        c.tws = IBSession(ib=ib, market_data_type=4)
+    c.fred.root_url = servers["fred"].url + "/fred"
+    c.fred_cache = FredCache(c.fred, cache_dir=fred_cache_dir)
+    c.TREASURY_API = servers["treasury"].url + "/services/api/fiscal_service"
+    c.cg.api = servers["coingecko"].url + "/api/v3"
+    return c
+
+
+def _summary(data: Dict[str, Any]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for ind in data["indicators"].values():
+        for v in ind.values():
+            counts[v.get("status", "?")] = counts.get(v.get("status", "?"), 0) + 1
+    return counts
+
+
+# ------------------------------------------------------------------ #
+# 4.  C O M M A N D S
+# ------------------------------------------------------------------ #
+def cmd_record(args: argparse.Namespace) -> None:
+    fixtures = {name: {} for name in UPSTREAMS}
+    servers = start_standins(fixtures, record=True)
+    ib = None
+    if not args.no_tws:
+        from ib_insync import IB
+        ib = RecordingIB(IB())
+    with tempfile.TemporaryDirectory() as tmp:
+        c = make_collector(servers, ib, Path(tmp))
+        sources = ["fred", "treasury", "coingecko", "custom"] + ([] if args.no_tws else ["tws"])
+        c.collect_all(sources, concurrent=False)
+    for s in servers.values():
+        s.close()
+    fixtures["tws"] = ib.dump() if ib else {}
+    save_fixtures(Path(args.fixtures), fixtures)
+    print(f"✔ {sum(len(v) for v in fixtures.values())} ответов → {args.fixtures}")
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    servers = start_standins(
+        load_fixtures(Path(args.fixtures)),
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed,
+    )
+    for name, s in servers.items():
+        print(f"{name:10s} {s.url}  (вместо {s.upstream})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_bench(args: argparse.Namespace) -> None:
+    fixtures = load_fixtures(Path(args.fixtures))
+    opts = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    servers = start_standins(fixtures, seed=args.seed, **opts)
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.runs):
+            cache = Path(tmp) / ("fred" if args.warm else f"fred_{i}")
+            ib = FakeIB(fixtures["tws"], seed=args.seed + i, **opts)
+            c = make_collector(servers, ib, cache)
+            t0 = time.perf_counter()
+            c.collect_all(None, concurrent=not args.serial)
+            dt = time.perf_counter() - t0
+            times.append(dt)
+            print(f"run {i + 1}: {dt:6.2f}s  {_summary(c.data)}")
+    hits = {n: s.hits for n, s in servers.items()}
+    for s in servers.values():
+        s.close()
+
+    mode = "serial" if args.serial else "concurrent"
+    print(f"\n{mode}, latency {args.latency}s ±{args.jitter}, errors {args.error_rate:.0%}, "
+          f"FRED cache {'warm' if args.warm else 'cold'}")
+    print(f"median {statistics.median(times):.2f}s  min {min(times):.2f}s  max {max(times):.2f}s")
+    print(f"stand-in hits: {hits}")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("replay.py")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("record", help="записать ответы настоящих API (нужна сеть)")
+    r.add_argument("--fixtures", default="data/indicators/fixtures")
+    r.add_argument("--no-tws", action="store_true")
+
+    for name, hlp in (("serve", "поднять stand‑in серверы"), ("bench", "замерить collect_all")):
+        s = sub.add_parser(name, help=hlp)
+        s.add_argument("--fixtures", default="data/indicators/fixtures")
+        s.add_argument("--latency", type=float, default=0.1, help="задержка ответа, сек")
+        s.add_argument("--jitter", type=float, default=0.0, help="± к задержке, сек")
+        s.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+        s.add_argument("--seed", type=int, default=0)
+    b = sub.choices["bench"]
+    b.add_argument("--runs", type=int, default=3)
+    b.add_argument("--serial", action="store_true", help="старый последовательный режим")
+    b.add_argument("--warm", action="store_true", help="FRED‑кэш общий для всех прогонов")
+    args = p.parse_args()
+
+    {"record": cmd_record, "serve": cmd_serve, "bench": cmd_bench}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    main()
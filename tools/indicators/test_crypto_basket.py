@@ -0,0 +1,69 @@
+"""Тесты CryptoBasket: один запрос на ключ, ключи друг друга не ждут."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(__file__))
+from crypto_basket import CryptoBasket  # noqa: E402
+
+ROWS = [
+    {"id": "bitcoin", "current_price": 100.0, "market_cap": 2000.0},
+    {"id": "tether", "current_price": 1.0, "market_cap": 3e9},
+]
+
+
+class _Http:
+    def __init__(self, global_delay: float = 0.0) -> None:
+        self.calls = []
+        self.global_delay = global_delay
+        self.lock = threading.Lock()
+
+    def get_json(self, url, params=None, timeout=10):
+        with self.lock:
+            self.calls.append(url.rsplit("/", 1)[-1])
+        if url.endswith("/global"):
+            time.sleep(self.global_delay)
+            return {"data": {"total_market_cap": {"usd": 5000.0}}}
+        time.sleep(0.05)
+        return ROWS
+
+
+def _basket(http):
+    return CryptoBasket(http, coins={"btc_price": "bitcoin"}, stablecoins=("tether",))
+
+
+def test_entries_share_one_markets_request():
+    http = _Http()
+    cg = _basket(http)
+    threads = [threading.Thread(target=cg.entry, args=(n,)) for n in ["btc_price", "stablecoin_supply"] * 4]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert http.calls.count("markets") == 1
+    assert cg.entry("stablecoin_supply")["value"] == 3.0
+    assert cg.entry("total_market_cap")["value"] == 5000.0
+
+
+def test_slow_global_does_not_block_markets():
+    http = _Http(global_delay=1.0)
+    cg = _basket(http)
+    slow = threading.Thread(target=cg.global_data)
+    slow.start()
+    time.sleep(0.05)  # /global уже держит свой lock
+    t0 = time.monotonic()
+    assert cg.entry("btc_price")["value"] == 100.0
+    assert time.monotonic() - t0 < 0.5
+    slow.join()
+
+
+def test_null_stablecoin_cap_is_skipped():
+    http = _Http()
+    http_rows = ROWS + [{"id": "usdd", "current_price": 1.0, "market_cap": None}]
+    http.get_json = lambda url, params=None, timeout=10: http_rows
+    cg = CryptoBasket(http, coins={}, stablecoins=("tether", "usdd"))
+    assert cg.entry("stablecoin_supply") == {"value": 3.0, "status": "ok", "source": "coingecko"}
+    cg = CryptoBasket(http, coins={}, stablecoins=("usdd",))
+    assert cg.entry("stablecoin_supply")["status"] == "no_data"
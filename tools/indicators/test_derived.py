@@ -0,0 +1,66 @@
+"""Тесты графа производных и ZScore (без сети и TWS)."""
+
+import os
+import statistics
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(__file__))
+from derived import DerivedGraph, Node, ZScore, flatten  # noqa: E402
+
+DAY = 86400.0
+
+
+class _Clock:
+    def __init__(self, t: float = 100 * DAY) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _z(window: int = 4):
+    clock = _Clock()
+    return ZScore("x_z", "macro", ("x",), None, window=window, every=DAY, clock=clock), clock
+
+
+def test_zscore_live_sample_equal_to_seed_is_not_counted_twice():
+    z, clock = _z()
+    z.seed([(96 * DAY, 1.0), (97 * DAY, 2.0), (98 * DAY, 3.0)])
+    z.compute(3.0)  # то же значение, что последняя точка прогрева
+    assert [v for _, v in z._hist] == [1.0, 2.0, 3.0]
+
+
+def test_zscore_keeps_last_value_per_interval():
+    z, clock = _z(window=6)
+    z.seed([(97 * DAY, 1.0), (98 * DAY, 2.0), (98 * DAY + 60, 5.0)])
+    assert [v for _, v in z._hist] == [1.0, 5.0]
+    z.compute(4.0)
+    clock.t += 3600  # тот же день: выборка заменяется, а не добавляется
+    out = z.compute(6.0)
+    vals = [v for _, v in z._hist]
+    assert vals == [1.0, 5.0, 6.0]
+    assert out == pytest.approx((6.0 - statistics.mean(vals)) / statistics.stdev(vals))
+
+
+def test_graph_recomputes_only_dirty_nodes():
+    g = DerivedGraph([
+        Node("a_plus_b", "macro", ("a", "b"), lambda a, b: a + b),
+        Node("double", "macro", ("a_plus_b",), lambda s: 2 * s),
+        Node("c_inv", "macro", ("c",), lambda c: 1 / c),
+    ])
+    ind = {"macro": {"a": {"value": 1, "status": "ok"}, "b": {"value": 2}, "c": {"value": 0}}}
+    first = g.update(flatten(ind))
+    assert first["double"]["value"] == 6
+    assert first["c_inv"]["status"] == "no_data"  # деление на ноль
+    assert g.update(flatten(ind)) == {}
+    ind["macro"]["b"]["value"] = 3
+    assert set(g.update(flatten(ind))) == {"a_plus_b", "double"}
+
+
+def test_seed_passes_node_cadence():
+    calls = []
+    g = DerivedGraph([ZScore("x_z", "macro", ("x",), None, window=5, every=3600.0)])
+    g.seed(lambda name, every: calls.append((name, every)) or [])
+    assert calls == [("x", 3600.0)]
@@ -0,0 +1,117 @@
+"""Тесты HttpClient на локальном http.server: повторы, 304/ETag, 4xx, счётчики."""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.append(os.path.dirname(__file__))
+import http_client  # noqa: E402
+from http_client import HttpClient, HttpError  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # path → список ответов (status, headers, body); последний повторяется
+    script: dict = {}
+    seen: list = []
+
+    def do_GET(self):  # noqa: N802
+        self.seen.append((self.path, dict(self.headers)))
+        queue = self.script[self.path.split("?")[0]]
+        status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(body, bytes):
+            data = body
+        else:
+            data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda s: None)  # без реальных пауз
+    _Handler.script, _Handler.seen = {}, []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_retries_5xx_and_429_then_succeeds(server):
+    srv, base = server
+    _Handler.script["/x"] = [(503, {}, None), (429, {"Retry-After": "1"}, None), (200, {}, {"ok": 1})]
+    http = HttpClient(retries=3)
+    assert http.get_json(base + "/x") == {"ok": 1}
+    host = f"127.0.0.1:{srv.server_address[1]}"
+    st = http.stats()[host]
+    assert st["requests"] == 3 and st["retries"] == 2 and st["errors"] == 0
+
+
+def test_gives_up_after_retries(server):
+    _, base = server
+    _Handler.script["/down"] = [(500, {}, None)]
+    http = HttpClient(retries=2)
+    with pytest.raises(HttpError):
+        http.get_json(base + "/down")
+    assert len(_Handler.seen) == 3
+
+
+def test_4xx_is_not_retried(server):
+    _, base = server
+    _Handler.script["/missing"] = [(404, {}, None)]
+    with pytest.raises(HttpError):
+        HttpClient(retries=3).get_json(base + "/missing")
+    assert len(_Handler.seen) == 1
+
+
+def test_etag_304_returns_cached_body(server):
+    srv, base = server
+    _Handler.script["/e"] = [(200, {"ETag": '"v1"'}, {"v": 1}), (304, {}, None)]
+    http = HttpClient()
+    assert http.get_json(base + "/e", params={"b": 2, "a": 1}) == {"v": 1}
+    assert http.get_json(base + "/e", params={"a": 1, "b": 2}) == {"v": 1}
+    assert _Handler.seen[1][1].get("If-None-Match") == '"v1"'
+    assert http.stats()[f"127.0.0.1:{srv.server_address[1]}"]["not_modified"] == 1
+
+
+def test_304_without_cached_body_refetches(server):
+    srv, base = server
+    _Handler.script["/p"] = [(304, {}, None), (200, {}, {"v": 2})]  # прокси ответил 304
+    http = HttpClient()
+    assert http.get_json(base + "/p") == {"v": 2}
+    assert _Handler.seen[1][1].get("Cache-Control") == "no-cache"
+    assert "If-None-Match" not in _Handler.seen[1][1]
+    assert http.stats()[f"127.0.0.1:{srv.server_address[1]}"]["not_modified"] == 0
+
+
+def test_invalid_json_counts_as_error(server):
+    srv, base = server
+    _Handler.script["/html"] = [(200, {}, b"<html>maintenance</html>")]
+    http = HttpClient(retries=3)
+    with pytest.raises(HttpError):
+        http.get_json(base + "/html")
+    assert http.stats()[f"127.0.0.1:{srv.server_address[1]}"]["errors"] == 1
+
+
+def test_throttle_spaces_requests_per_host(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client.time, "sleep", sleeps.append)
+    http = HttpClient(min_interval={"h": 10.0})
+    t0 = time.monotonic()
+    http._throttle("h")
+    http._throttle("h")
+    http._throttle("other")  # у другого хоста своё расписание
+    assert len(sleeps) == 1 and 9.0 < sleeps[0] <= 10.0 + (time.monotonic() - t0)
@@ -0,0 +1,83 @@
+"""
+Офлайн‑прогон IndicatorCollector: stand‑in серверы и FakeIB из replay.py
+отдают синтетические фикстуры (tools/indicators/fixtures), сеть и TWS не нужны.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ib_insync")
+pytest.importorskip("fredapi")
+pytest.importorskip("requests")
+
+sys.path.append(os.path.dirname(__file__))
+from replay import FakeIB, load_fixtures, make_collector, start_standins  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def replayed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # всё, что сборщик пишет, – во временный каталог
+    monkeypatch.setenv("FRED_API_KEY", "replay")
+    fixtures = load_fixtures(FIXTURES)
+    servers = start_standins(fixtures)
+
+    def _make():
+        c = make_collector(servers, FakeIB(fixtures["tws"]), tmp_path / "fred")
+        c.history_db = None  # без прогрева z‑score из IndicatorStore
+        return c
+
+    yield _make, servers
+    for s in servers.values():
+        s.close()
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_collect_all_from_fixtures(replayed, concurrent):
+    make, servers = replayed
+    data = make().collect_all(None, concurrent=concurrent)
+    ind = data["indicators"]
+
+    statuses = {n: v["status"] for cat in ind.values() for n, v in cat.items()}
+    assert {n for n, s in statuses.items() if s != "ok"} <= {"net_liquidity_z", "vix_z"}
+    assert all(s.hits["missing"] == 0 for s in servers.values())
+
+    macro, liq, crypto = ind["macro"], ind["liquidity"], ind["crypto"]
+    assert macro["m2_money_stock"]["value"] == pytest.approx(22010.7)
+    assert macro["m2_money_stock"]["date"] == "2026-08-01"
+    assert macro["fed_balance_sheet"]["value"] == pytest.approx(6600.0)  # млн → млрд
+    assert macro["ust_10y"]["value"] == pytest.approx(4.2)                # TNX / 10
+    assert macro["curve_30y_10y"]["value"] == pytest.approx(0.55)
+    assert macro["curve_10y_2y"]["value"] == pytest.approx(0.6)
+    assert macro["real_yield_10y"]["value"] == pytest.approx(1.9)
+    assert liq["tga_balance"]["value"] == pytest.approx(850.0)
+    assert liq["rrp_volume"]["value"] == pytest.approx(150.0)
+    assert liq["net_liquidity"]["value"] == pytest.approx(6600.0 - 850.0 - 150.0)
+    assert crypto["btc_price"]["value"] == 100000.0
+    assert crypto["stablecoin_supply"]["value"] == pytest.approx(255.0)
+    assert crypto["btc_dominance"]["value"] == pytest.approx(50.0)
+
+
+def test_single_source_keeps_ready_derived(replayed):
+    make, _ = replayed
+    ind = make().collect_all(["coingecko"])["indicators"]
+    assert ind["crypto"]["btc_dominance"]["value"] == pytest.approx(50.0)
+    assert "net_liquidity" not in ind["liquidity"]  # входов нет – узел не пишется
+    assert not Path("data").exists()  # IndicatorStore не создаётся при сборе
+
+
+def test_collectors_claim_distinct_client_ids(replayed, tmp_path, monkeypatch):
+    from tools.IBRK import ib_session
+
+    monkeypatch.setattr(ib_session, "LOCK_DIR", tmp_path / "locks")
+    make, _ = replayed
+    a, b = make(), make()
+    assert a.connect_tws() and b.connect_tws()
+    assert a.tws.client_id != b.tws.client_id
+    a.disconnect_tws()
+    assert not a.ib.isConnected() and a.tws.client_id is None
+    b.disconnect_tws()
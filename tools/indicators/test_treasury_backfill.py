@@ -0,0 +1,84 @@
+"""Тесты бэкфилла Treasury OCB: откат при упавшей странице, докачка, выбор баланса TGA."""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.append(os.path.dirname(__file__))
+from treasury_backfill import _connect, _insert, backfill, tga_series  # noqa: E402
+
+TGA = "Treasury General Account (TGA) Closing Balance"
+ROWS = [
+    {"record_date": f"2024-01-{d:02d}", "account_type": TGA,
+     "open_today_bal": str(700_000 + d), "close_today_bal": "null"}
+    for d in range(2, 11)
+]
+
+
+class _Http:
+    """FiscalData по 3 строки на страницу; страница ``fail`` падает."""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.pages = []
+        self.lock = threading.Lock()
+
+    def get_json(self, url, params=None, timeout=10):
+        n = params["page[number]"]
+        with self.lock:
+            self.pages.append(n)
+        if n == self.fail:
+            raise ConnectionError("page 2 timed out")
+        after = params.get("filter", "record_date:gt:").split(":gt:")[1]
+        rows = [r for r in ROWS if r["record_date"] > after]
+        size = params["page[size]"]
+        return {"data": rows[(n - 1) * size:n * size],
+                "meta": {"total-pages": -(-len(rows) // size)}}
+
+
+def _max_date(db):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT MAX(record_date) FROM treasury_ocb").fetchone()[0]
+
+
+def test_failed_page_rolls_back_and_rerun_fills_gap(tmp_path):
+    db = tmp_path / "indicators.db"
+    conn = _connect(db)
+    _insert(conn, [{"record_date": "2023-12-29", "account_type": TGA, "open_today_bal": "1"}])
+    conn.close()
+
+    with pytest.raises(ConnectionError):
+        backfill(_Http(fail=2), db=db, page_size=3, workers=2)
+    assert _max_date(db) == "2023-12-29"  # стр. 1 и 3 откатились вместе со стр. 2
+
+    http = _Http()
+    assert backfill(http, db=db, page_size=3, workers=2) == len(ROWS)
+    assert sorted(http.pages) == [1, 2, 3]
+    assert _max_date(db) == "2024-01-10"
+    assert len(tga_series(db)) == len(ROWS) + 1
+
+    http = _Http()
+    assert backfill(http, db=db, page_size=3) == 0 and http.pages == [1]
+
+
+def test_tga_series_handles_2021_layout_change(tmp_path):
+    db = tmp_path / "indicators.db"
+    conn = _connect(db)
+    _insert(conn, [
+        # до 2021‑10: баланс на конец дня в close_today_bal
+        {"record_date": "2021-09-30", "account_type": "Federal Reserve Account",
+         "open_today_bal": "1000", "close_today_bal": "2000"},
+        # после: строка «Closing Balance», сумма в open_today_bal, close пустой
+        {"record_date": "2021-10-01", "account_type": TGA,
+         "open_today_bal": "3000", "close_today_bal": "null"},
+        {"record_date": "2021-10-01", "account_type": "Treasury General Account (TGA) Opening Balance",
+         "open_today_bal": "9999", "close_today_bal": "null"},
+    ])
+    conn.close()
+    s = tga_series(db)
+    assert list(s.index.strftime("%Y-%m-%d")) == ["2021-09-30", "2021-10-01"]
+    assert list(s) == [2.0, 3.0]  # млн → млрд
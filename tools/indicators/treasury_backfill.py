@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+История TGA и RRP: бэкфилл Daily Treasury Statement + FRED.
+
+operating_cash_balance (FiscalData) выкачивается целиком страницами по
+PAGE_SIZE строк: первая страница даёт meta.total-pages, остальные
+запрашиваются параллельно через общий HttpClient (лимит на хост и
+повторы – там же). Строки сразу пишутся в таблицу treasury_ocb той же
+SQLite‑базы, что и история индикаторов. Повторный запуск запрашивает
+только record_date > последней сохранённой.
+
+RRP (RRPONTSYD) берётся через FredCache – он и так хранит полную
+историю серии.
+
+Пример:
+    python tools/indicators/treasury_backfill.py backfill
+    python tools/indicators/treasury_backfill.py export --out data/indicators/tga_rrp.csv
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from http_client import HttpClient  # noqa: E402
+from indicator_store import DB_PATH  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+OCB_URL = ("https://api.fiscaldata.treasury.gov/services/api/fiscal_service"
+           "/v1/accounting/dts/operating_cash_balance")
+FIELDS = ["record_date", "account_type", "open_today_bal", "close_today_bal"]
+PAGE_SIZE = 10_000   # максимум FiscalData
+WORKERS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS treasury_ocb (
+    record_date     TEXT NOT NULL,
+    account_type    TEXT NOT NULL,
+    open_today_bal  REAL,
+    close_today_bal REAL,
+    PRIMARY KEY (record_date, account_type)
+) WITHOUT ROWID;
+"""
+
+# строка «баланс TGA на конец дня» в разные годы называлась по‑разному;
+# с 2021‑10 сумма закрывающего баланса лежит в open_today_bal
+TGA_ACCOUNTS = (
+    "Treasury General Account (TGA) Closing Balance",
+    "TGA Closing Balance",
+    "Federal Reserve Account",
+)
+
+
+def _num(x: Any) -> Optional[float]:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return None  # "null" и пустые поля
+
+
+def _connect(db: Path) -> sqlite3.Connection:
+    db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _insert(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> int:
+    data = [
+        (r["record_date"], r["account_type"], _num(r.get("open_today_bal")),
+         _num(r.get("close_today_bal")))
+        for r in rows
+    ]
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO treasury_ocb VALUES (?, ?, ?, ?)", data)
+    return len(data)
+
+
+# ------------------------------------------------------------------ #
+# B A C K F I L L
+# ------------------------------------------------------------------ #
+def backfill(
+    http: Optional[HttpClient] = None,
+    db: Path = DB_PATH,
+    url: str = OCB_URL,
+    page_size: int = PAGE_SIZE,
+    workers: int = WORKERS,
+) -> int:
+    """Докачивает operating_cash_balance после последней record_date; число строк."""
+    http = http or HttpClient()
+    conn = _connect(db)
+    last = conn.execute("SELECT MAX(record_date) FROM treasury_ocb").fetchone()[0]
+
+    params: Dict[str, Any] = {
+        "fields": ",".join(FIELDS),
+        "sort": "record_date",
+        "page[size]": page_size,
+        "format": "json",
+    }
+    if last:
+        params["filter"] = f"record_date:gt:{last}"
+    logger.info(f"Treasury OCB: с {last or 'начала'}")
+
+    def _page(n: int) -> List[Dict[str, Any]]:
+        return http.get_json(url, params={**params, "page[number]": n}, timeout=60)["data"]
+
+    try:
+        first = http.get_json(url, params={**params, "page[number]": 1}, timeout=60)
+        pages = int(first.get("meta", {}).get("total-pages", 1) or 1)
+        added = _insert(conn, first["data"])
+
+        # остальные страницы параллельно; запись – в этом потоке по мере прихода
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocb") as pool:
+            futs = {pool.submit(_page, n): n for n in range(2, pages + 1)}
+            for fut in as_completed(futs):
+                added += _insert(conn, fut.result())
+                logger.info(f"  стр. {futs[fut]}/{pages}")
+    except Exception:
+        # без отката «дыра» из‑за упавшей средней страницы осталась бы навсегда:
+        # следующий запуск продолжает с MAX(record_date)
+        with conn:
+            conn.execute("DELETE FROM treasury_ocb WHERE record_date > ?", (last or "",))
+        raise
+    finally:
+        conn.close()
+    logger.info(f"Treasury OCB: +{added} строк, {pages} стр.")
+    return added
+
+
+# ------------------------------------------------------------------ #
+# Ч Т Е Н И Е
+# ------------------------------------------------------------------ #
+def tga_series(db: Path = DB_PATH) -> pd.Series:
+    """Дневной закрывающий баланс TGA, $ млрд."""
+    conn = _connect(db)
+    marks = ",".join("?" * len(TGA_ACCOUNTS))
+    rows = conn.execute(
+        f"SELECT record_date, COALESCE(close_today_bal, open_today_bal) FROM treasury_ocb "
+        f"WHERE account_type IN ({marks}) ORDER BY record_date",
+        TGA_ACCOUNTS,
+    ).fetchall()
+    conn.close()
+    s = pd.Series({pd.Timestamp(d): v for d, v in rows if v is not None}, dtype=float, name="tga")
+    return s.groupby(level=0).last() * 1e-3  # млн → млрд
+
+
+def history(db: Path = DB_PATH) -> pd.DataFrame:
+    """TGA (Treasury) и RRP (FRED RRPONTSYD) по дням, $ млрд."""
+    frame = tga_series(db).to_frame()
+    key = os.getenv("FRED_API_KEY")
+    if key:
+        from fredapi import Fred
+        from fred_cache import FredCache
+
+        rrp = FredCache(Fred(api_key=key)).series("RRPONTSYD")
+        frame = frame.join(rrp.rename("rrp") * 1e-3, how="outer")  # млн → млрд
+    return frame.sort_index()
+
+
+# ------------------------------------------------------------------ #
+# C L I
+# ------------------------------------------------------------------ #
+def main() -> None:
+    p = argparse.ArgumentParser("treasury_backfill.py")
+    p.add_argument("--db", default=str(DB_PATH))
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("backfill", help="докачать Daily Treasury Statement (и RRP из FRED)")
+    b.add_argument("--workers", type=int, default=WORKERS)
+    e = sub.add_parser("export", help="TGA/RRP по дням в CSV")
+    e.add_argument("--out", default="data/indicators/tga_rrp.csv")
+    args = p.parse_args()
+
+    db = Path(args.db)
+    if args.cmd == "backfill":
+        n = backfill(db=db, workers=args.workers)
+        h = history(db)  # заодно прогревает FRED‑кэш RRPONTSYD
+        print(f"✔ +{n} строк; TGA {h['tga'].first_valid_index()} … {h['tga'].last_valid_index()}")
+    else:
+        h = history(db)
+        h.to_csv(args.out, index_label="date", float_format="%.3f")
+        print("✔ saved →", args.out)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)s  %(message)s",
+                        datefmt="%H:%M:%S")
+    main()